@@ -0,0 +1,86 @@
+"""
+近似重复检测基准测试 - 写入时计算 MinHash 签名的开销、按段查找的延迟和检出率
+
+在临时目录生成一个用户的合成语料（词频按 Zipf 分布），其中一部分文档另有一篇“转载”：
+前后加上几句转载声明、截掉末尾一小段、随机替换少量词。
+统计写入耗时、逐篇查找近似重复的平均延迟、列出全部分组的耗时，
+以及转载文档被找回的比例和误报的分组数。
+    python benchmark/bench_duplicates.py --docs 10000 --reposts 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database_sqlite import NotedocsDB
+
+SYLLABLES = ["ka", "lo", "mi", "ner", "tos", "vu", "shi", "pra", "den", "gol", "rix", "ma", "te", "zu"]
+
+
+def make_corpus(rng: random.Random, docs: int, reposts: int, words: int) -> tuple:
+    vocab = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+
+    def text(count):
+        return rng.choices(vocab, weights, k=count)
+
+    originals = [text(rng.randint(words // 2, words * 2)) for _ in range(docs)]
+    contents = [" ".join(tokens) for tokens in originals]
+    pairs = []
+    for i in rng.sample(range(docs), reposts):
+        tokens = list(originals[i][:int(len(originals[i]) * 0.95)])
+        for _ in range(max(1, len(tokens) // 200)):
+            tokens[rng.randrange(len(tokens))] = rng.choice(vocab)
+        contents.append(" ".join(["reposted", "from"] + text(8) + tokens + ["all", "rights"] + text(8)))
+        pairs.append((i, len(contents) - 1))
+    return contents, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似重复检测的延迟和检出率")
+    parser.add_argument("--docs", type=int, default=10000, help="原始文档数")
+    parser.add_argument("--reposts", type=int, default=1000, help="其中有转载的文档数")
+    parser.add_argument("--words", type=int, default=400, help="每篇正文的平均词数")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    contents, pairs = make_corpus(rng, args.docs, args.reposts, args.words)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = NotedocsDB(os.path.join(tmp, "duplicates.db"))
+        print(f"📦 写入 {len(contents)} 篇文档（含 {len(pairs)} 篇转载）...")
+        started = time.perf_counter()
+        results = db.write_documents([{"uid": 1, "url": f"https://example.com/{i}", "title": f"文档 {i}",
+                                       "summary": "", "content": content} for i, content in enumerate(contents)])
+        elapsed = time.perf_counter() - started
+        print(f"  写入（含全文索引和签名）: {elapsed * 1000 / len(contents):.2f} ms/篇")
+        ids = [item["id"] for item in results]
+
+        timings, found = [], 0
+        for original, repost in pairs:
+            started = time.perf_counter()
+            duplicates = db.get_duplicate_ids([ids[repost]])[ids[repost]]
+            timings.append((time.perf_counter() - started) * 1000)
+            found += ids[original] in duplicates
+        timings.sort()
+        print(f"  查找一篇文档的近似重复: 平均 {statistics.mean(timings):.3f} ms，"
+              f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms")
+
+        started = time.perf_counter()
+        clusters = db.get_duplicate_clusters(1, limit=len(contents))
+        elapsed = (time.perf_counter() - started) * 1000
+        expected = {frozenset((ids[a], ids[b])) for a, b in pairs}
+        grouped = {frozenset(doc["id"] for doc in cluster["documents"]) for cluster in clusters}
+        false_groups = sum(1 for group in grouped if not any(pair <= group for pair in expected))
+        print(f"  列出全部分组: {elapsed:.1f} ms，{len(clusters)} 组")
+        print(f"  转载检出率: {found / len(pairs):.3f}，不含任何转载对的分组: {false_groups}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
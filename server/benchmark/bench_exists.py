@@ -0,0 +1,68 @@
+"""
+已保存页面判断基准测试 - find_document_by_url 经布隆过滤器与直接查询数据库的延迟对比
+
+在临时目录为一个用户写入若干篇文档，然后分别查询一半已保存、一半未保存的 URL：
+1. 直接按 (uid, canonical_url) 索引查询
+2. find_document_by_url：先查布隆过滤器，未保存的 URL 不查询数据库
+统计两类 URL 的平均延迟，以及未保存 URL 中被过滤器误判为“可能有”的比例。
+    python benchmark/bench_exists.py --docs 20000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database_sqlite import NotedocsDB
+from db.urls import canonicalize_url
+
+DIRECT_SQL = "SELECT id, uid, url, title, updated_at FROM docs WHERE uid = ? AND canonical_url = ? LIMIT 1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="已保存页面判断的延迟")
+    parser.add_argument("--docs", type=int, default=20000, help="该用户的文档数")
+    parser.add_argument("--lookups", type=int, default=5000, help="已保存和未保存的 URL 各查询多少次")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    saved = [f"https://site{rng.randint(0, 500)}.example.com/post/{i}?id={rng.random():.8f}" for i in range(args.docs)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = NotedocsDB(os.path.join(tmp, "exists.db"))
+        print(f"📦 写入 {args.docs} 篇文档 ...")
+        db.write_documents([{"uid": 1, "url": url, "title": f"文档 {i}", "summary": "", "content": ""}
+                            for i, url in enumerate(saved)])
+        queries = {
+            "已保存": [f"{url}&utm_source=bench#top" for url in rng.sample(saved, args.lookups)],
+            "未保存": [f"https://other.example.com/post/{i}" for i in range(args.lookups)],
+        }
+
+        started = time.perf_counter()
+        db.find_document_by_url(1, saved[0])
+        print(f"  加载布隆过滤器: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        for label, urls in queries.items():
+            direct, filtered = [], []
+            with db.get_connection() as conn:
+                for url in urls:
+                    started = time.perf_counter()
+                    conn.execute(DIRECT_SQL, (1, canonicalize_url(url))).fetchone()
+                    direct.append((time.perf_counter() - started) * 1000)
+            negatives = db.url_filter.negatives
+            for url in urls:
+                started = time.perf_counter()
+                db.find_document_by_url(1, url)
+                filtered.append((time.perf_counter() - started) * 1000)
+            passed = len(urls) - (db.url_filter.negatives - negatives)
+            print(f"  {label}: 直接查询 {statistics.mean(direct):.4f} ms，"
+                  f"经过滤器 {statistics.mean(filtered):.4f} ms，查询数据库的比例 {passed / len(urls):.3f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+列表页基准测试 - 正文拆分到 docs_content 前后 GET /api/documents 的查询延迟
+
+在临时目录生成同样的数据，分别构造两种存储布局：
+1. 旧布局：正文存放在 docs.content，与元数据在同一行
+2. 新布局：正文存放在 docs_content，docs 行只有元数据
+
+对两种布局执行与 list_documents 相同的分页查询，比较每页延迟和数据库文件中 docs 表占用的页数。
+    python benchmark/bench_list.py --docs 2000 --content-kb 32
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import compression
+from db.database_sqlite import NotedocsDB
+
+LIST_SQL = """
+    SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, created_at, updated_at
+    FROM docs WHERE uid = ?
+    ORDER BY updated_at DESC, id DESC
+    LIMIT ? OFFSET ?
+"""
+
+
+def build(db_path: str, docs: int, content_kb: int):
+    """用批量写入生成新布局的数据库"""
+    db = NotedocsDB(db_path)
+    body = ("正文内容，用于撑大文档体积。" * 64)[:512]
+    batch = []
+    for i in range(docs):
+        batch.append({
+            "uid": 1, "url": f"https://example.com/{i}", "title": f"列表基准文档{i}",
+            "summary": "摘要" * 20, "content": body * (content_kb * 2), "tags": "bench",
+        })
+    db.write_documents(batch)
+    db.close()
+
+
+def make_legacy(src: str, dst: str):
+    """复制数据库并把正文搬回 docs.content，模拟拆分前的布局"""
+    shutil.copy(src, dst)
+    conn = sqlite3.connect(dst)
+    conn.create_function("notedocs_decode", 2, compression.decode)
+    conn.execute("""
+        UPDATE docs SET content = (SELECT notedocs_decode(codec, content) FROM docs_content WHERE doc_id = docs.id)
+    """)
+    conn.execute("DROP TABLE docs_content")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def docs_pages(db_path: str) -> int:
+    """docs 表（含溢出页）占用的页数"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM dbstat WHERE name = 'docs'").fetchone()[0]
+    except sqlite3.OperationalError:
+        return -1  # 编译时未启用 dbstat
+    finally:
+        conn.close()
+
+
+def walk_pages(conn: sqlite3.Connection, docs: int, page_size: int) -> list:
+    """按 offset 翻完所有列表页，返回每页耗时（毫秒）"""
+    timings = []
+    for offset in range(0, docs, page_size):
+        started = time.perf_counter()
+        conn.execute(LIST_SQL, (1, page_size, offset)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench(db_path: str, docs: int, page_size: int, rounds: int) -> dict:
+    """冷缓存：每轮新建连接；热缓存：同一连接重复翻页"""
+    cold = []
+    for _ in range(rounds):
+        conn = sqlite3.connect(db_path)
+        cold.extend(walk_pages(conn, docs, page_size))
+        conn.close()
+
+    conn = sqlite3.connect(db_path)
+    walk_pages(conn, docs, page_size)
+    warm = []
+    for _ in range(rounds):
+        warm.extend(walk_pages(conn, docs, page_size))
+    conn.close()
+    return {
+        "cold_avg": statistics.mean(cold),
+        "warm_avg": statistics.mean(warm),
+        "warm_p95": statistics.quantiles(warm, n=20)[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="正文拆分前后列表页延迟对比")
+    parser.add_argument("--docs", type=int, default=2000, help="文档数")
+    parser.add_argument("--content-kb", type=int, default=32, help="每篇正文大小（KB）")
+    parser.add_argument("--page-size", type=int, default=20, help="每页数量")
+    parser.add_argument("--rounds", type=int, default=5, help="翻页轮数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        split_path = os.path.join(tmp, "split.db")
+        legacy_path = os.path.join(tmp, "legacy.db")
+        print(f"📦 生成 {args.docs} 篇文档，每篇正文约 {args.content_kb}KB ...")
+        build(split_path, args.docs, args.content_kb)
+        make_legacy(split_path, legacy_path)
+        conn = sqlite3.connect(split_path)
+        conn.execute("VACUUM")
+        conn.close()
+
+        results = {}
+        for name, path in (("正文在 docs 行内（旧）", legacy_path), ("正文在 docs_content（新）", split_path)):
+            results[name] = bench(path, args.docs, args.page_size, args.rounds)
+            r = results[name]
+            print(f"  {name}: docs 表 {docs_pages(path)} 页，"
+                  f"冷缓存 {r['cold_avg']:.3f} ms/页，热缓存 {r['warm_avg']:.3f} ms/页 (p95 {r['warm_p95']:.3f})")
+
+        old, new = results.values()
+        print(f"  提升: 冷缓存 {old['cold_avg'] / new['cold_avg']:.2f}x，热缓存 {old['warm_avg'] / new['warm_avg']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+连接池基准测试 - GET /api/documents/id/{doc_id}
+
+两种模式：
+1. 本地模式（默认）：在临时数据库上用同一条查询对比“每次新建连接”（旧实现）与连接池的读取吞吐，
+   另外列出经过文档缓存的 read_document_by_id 作参考
+   python benchmark/bench_pool.py --threads 8 --seconds 5
+2. HTTP 模式：对运行中的服务压测文档详情接口，分别在旧版本和新版本上运行对比 req/s
+   python benchmark/bench_pool.py --url http://127.0.0.1:8000 --doc-id 1
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database_sqlite import NotedocsDB
+
+
+# 两种实现执行同一条查询，只比较取得连接的方式
+READ_SQL = """
+    SELECT id, uid, url, title, summary, content, source, favicon, tags, evaluate, created_at, updated_at
+    FROM docs WHERE id = ?
+"""
+
+
+def legacy_read_document_by_id(db_path: str, doc_id: int):
+    """旧实现：每次调用新建连接，with 块只提交不关闭"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    with conn:
+        cursor = conn.cursor()
+        cursor.execute(READ_SQL, (doc_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+def pooled_read_document_by_id(db: NotedocsDB, doc_id: int):
+    """连接池：从池中借出连接执行同一条查询，不经过 read_document_by_id 的文档缓存"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(READ_SQL, (doc_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+
+def run_load(func, threads: int, seconds: float) -> float:
+    """多线程循环调用 func，返回每秒完成次数"""
+    counts = [0] * threads
+    stop_at = time.perf_counter() + seconds
+
+    def worker(index: int):
+        n = 0
+        while time.perf_counter() < stop_at:
+            func(n)
+            n += 1
+        counts[index] = n
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return sum(counts) / (time.perf_counter() - started)
+
+
+def bench_local(threads: int, seconds: float, docs: int):
+    """本地模式：旧实现 vs 连接池"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db = NotedocsDB(db_path)
+        for i in range(docs):
+            db.write_document(uid=1, url=f"https://example.com/{i}", title=f"基准测试文档{i}",
+                              summary="摘要" * 20, content="正文内容。" * 400, tags="bench")
+        doc_ids = [d["id"] for d in db.list_documents(uid=1, limit=docs)]
+
+        def pick(n: int) -> int:
+            return doc_ids[n % len(doc_ids)]
+
+        print(f"📦 文档数: {len(doc_ids)}，线程数: {threads}，每轮 {seconds}s")
+        legacy = run_load(lambda n: legacy_read_document_by_id(db_path, pick(n)), threads, seconds)
+        print(f"  旧实现（每次新建连接）: {legacy:,.0f} ops/s")
+        pooled = run_load(lambda n: pooled_read_document_by_id(db, pick(n)), threads, seconds)
+        print(f"  连接池:                 {pooled:,.0f} ops/s")
+        print(f"  连接池带来的提升: {pooled / legacy:.2f}x")
+        # 供参考：接口实际走的 read_document_by_id 还有文档缓存，命中时不查询数据库，不计入上面的对比
+        cached = run_load(lambda n: db.read_document_by_id(pick(n)), threads, seconds)
+        print(f"  连接池 + 文档缓存:      {cached:,.0f} ops/s（参考）")
+        print(f"  连接池状态: {db.get_pool_stats()}")
+        db.close()
+
+
+def bench_http(url: str, doc_id: int, threads: int, seconds: float):
+    """HTTP 模式：压测文档详情接口"""
+    import requests
+
+    endpoint = f"{url.rstrip('/')}/api/documents/id/{doc_id}"
+    local = threading.local()
+    errors = [0]
+
+    def fetch(_n: int):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        if session.get(endpoint).status_code != 200:
+            errors[0] += 1
+
+    print(f"🌐 {endpoint}，线程数: {threads}，持续 {seconds}s")
+    rate = run_load(fetch, threads, seconds)
+    print(f"  吞吐: {rate:,.0f} req/s，非200响应: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文档详情读取基准测试")
+    parser.add_argument("--url", help="服务地址，指定后进入 HTTP 模式")
+    parser.add_argument("--doc-id", type=int, default=1, help="HTTP 模式下读取的文档ID")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--docs", type=int, default=200, help="本地模式下生成的文档数")
+    args = parser.parse_args()
+
+    if args.url:
+        bench_http(args.url, args.doc_id, args.threads, args.seconds)
+    else:
+        bench_local(args.threads, args.seconds, args.docs)
+
+
+if __name__ == "__main__":
+    main()
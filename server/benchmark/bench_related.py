@@ -0,0 +1,93 @@
+"""
+相关文档基准测试 - RelatedIndex 的构建耗时、单次查询延迟和结果质量
+
+用合成语料构造一个用户的索引（不经过数据库）：每篇文档属于一个主题，
+标题、标签和正文的词大部分来自主题词表，其余来自公共词表。
+统计构建耗时、查询的平均和 p95 延迟、增量写入的耗时，
+以及前 10 个结果中与原文档同主题的比例（P@10）。
+    python benchmark/bench_related.py --docs 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import RELATED_CONFIG
+from db.related import RelatedIndex
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_docs(rng: random.Random, docs: int, topics: int, words: int) -> list:
+    def word():
+        return "".join(rng.choice(LETTERS) for _ in range(rng.randint(4, 9)))
+
+    common = [word() for _ in range(20000)]
+    topic_words = [[word() for _ in range(40)] for _ in range(topics)]
+
+    def text(topic, count):
+        # 约一成的词来自主题词表，其余为公共词
+        return " ".join(rng.choice(topic_words[topic]) if rng.random() < 0.1 else rng.choice(common)
+                        for _ in range(count))
+
+    result = []
+    for i in range(docs):
+        topic = i % topics
+        result.append({"id": i + 1, "uid": 1, "topic": topic, "title": text(topic, 8),
+                       "summary": text(topic, 30), "content": text(topic, words),
+                       "tags": ",".join(rng.sample(topic_words[topic], 2) + [rng.choice(common)])})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="相关文档查询延迟和质量")
+    parser.add_argument("--docs", type=int, default=50000, help="该用户的文档数")
+    parser.add_argument("--topics", type=int, default=500, help="主题数")
+    parser.add_argument("--words", type=int, default=300, help="每篇正文的词数")
+    parser.add_argument("--queries", type=int, default=500, help="查询次数")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"📦 生成 {args.docs} 篇文档（{args.topics} 个主题）...")
+    docs = make_docs(rng, args.docs, args.topics, args.words)
+    topic_of = {doc["id"]: doc["topic"] for doc in docs}
+    index = RelatedIndex(lambda uid: docs, max_users=RELATED_CONFIG['max_users'],
+                         max_terms=RELATED_CONFIG['max_terms'],
+                         query_terms=RELATED_CONFIG['query_terms'],
+                         content_chars=RELATED_CONFIG['content_chars'])
+
+    started = time.perf_counter()
+    index.similar(1, 1)
+    print(f"  构建向量: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def measure(label):
+        timings, precisions = [], []
+        for doc_id in rng.sample(sorted(topic_of), args.queries):
+            started = time.perf_counter()
+            results = index.similar(1, doc_id, 10)
+            timings.append((time.perf_counter() - started) * 1000)
+            precisions.append(sum(1 for other, _ in results if topic_of[other] == topic_of[doc_id]) / 10)
+        timings.sort()
+        print(f"  {label}: 平均 {statistics.mean(timings):.2f} ms，p95 {timings[int(len(timings) * 0.95)]:.2f} ms，"
+              f"P@10 {statistics.mean(precisions):.3f}")
+
+    measure("查询")
+
+    # 增量写入：修改已有文档的内容（先移出主矩阵再放入增量区），数量不超过重建阈值
+    updates = []
+    for doc in rng.sample(docs, 200):
+        doc = dict(doc, content=doc["content"][::-1])
+        started = time.perf_counter()
+        index.on_docs_changed([doc], [doc])
+        updates.append((time.perf_counter() - started) * 1000)
+    print(f"  增量写入一篇文档: 平均 {statistics.mean(updates):.3f} ms")
+    measure("有增量文档时查询")
+
+
+if __name__ == "__main__":
+    main()
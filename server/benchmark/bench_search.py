@@ -0,0 +1,157 @@
+"""
+搜索相关度基准测试 - 按评分/时间排序与 BM25 加权排序的结果质量对比
+
+在临时目录生成合成语料：每个查询词分别出现在若干文档的标题、标签、摘要中，
+另有更多文档只在长正文里顺带提到一次，其余为噪声文档；评分和更新时间随机。
+相关度标注：标题命中 3、标签命中 2、摘要命中 1、只在正文中提到 0。
+
+对每个查询词比较各排序的 NDCG@10、P@10（相关度 >= 2 视为相关）和查询延迟：
+1. 旧排序：全文索引命中后按 evaluate、updated_at 降序
+2. search_documents 只用字段加权 BM25（评分系数和时间半衰期置 0）
+3. search_documents 按当前配置混合评分和时间（SEARCH_* 环境变量）
+    python benchmark/bench_search.py --queries 20 --noise 2000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SEARCH_CONFIG
+from db.database_sqlite import NotedocsDB
+from db.fts import build_match_query
+
+LEGACY_SQL = """
+    SELECT d.title FROM docs_fts INNER JOIN docs d ON d.id = docs_fts.rowid
+    WHERE docs_fts MATCH ?
+    ORDER BY d.evaluate DESC, d.updated_at DESC, d.id DESC
+    LIMIT ?
+"""
+
+SYLLABLES = ["ka", "lo", "mi", "ner", "tos", "vu", "shi", "pra", "den", "gol", "rix", "ma", "te", "zu"]
+
+# 各位置的命中数量及相关度
+PLACEMENTS = (("title", 5, 3), ("tags", 5, 2), ("summary", 5, 1), ("content", 20, 0))
+
+
+def make_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def filler(rng: random.Random, vocab: list, words: int) -> str:
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def build(db: NotedocsDB, rng: random.Random, queries: int, noise: int) -> dict:
+    """生成语料，返回 {查询词: {文档标题: 相关度}}"""
+    vocab = [make_word(rng) for _ in range(3000)]
+    terms = [f"{make_word(rng)}q{i}" for i in range(queries)]
+    docs, labels = [], {term: {} for term in terms}
+
+    def doc(title, summary, content, tags):
+        docs.append({"uid": 1, "url": f"https://example.com/{len(docs)}", "title": title,
+                     "summary": summary, "content": content, "tags": tags,
+                     "evaluate": rng.randint(0, 5)})
+
+    for term in terms:
+        for place, count, gain in PLACEMENTS:
+            for _ in range(count):
+                title = filler(rng, vocab, 6)
+                summary = filler(rng, vocab, 25)
+                content = filler(rng, vocab, 600)
+                tags = ",".join(rng.sample(vocab, 3))
+                if place == "title":
+                    title = f"{title} {term}"
+                elif place == "tags":
+                    tags = f"{tags},{term}"
+                elif place == "summary":
+                    summary = f"{summary} {term}"
+                else:
+                    words = content.split()
+                    words.insert(rng.randint(100, len(words)), term)
+                    content = " ".join(words)
+                title = f"{title} #{len(docs)}"
+                labels[term][title] = gain
+                doc(title, summary, content, tags)
+    for _ in range(noise):
+        doc(f"{filler(rng, vocab, 6)} #{len(docs)}", filler(rng, vocab, 25),
+            filler(rng, vocab, 600), ",".join(rng.sample(vocab, 3)))
+
+    db.write_documents(docs)
+    with db.get_connection() as conn:
+        # 更新时间在三年内随机分布，与相关度无关
+        ids = [row[0] for row in conn.execute("SELECT id FROM docs ORDER BY id")]
+        conn.executemany("UPDATE docs SET updated_at = datetime('now', ?) WHERE id = ?",
+                         [(f"-{rng.randint(0, 1094)} days", doc_id) for doc_id in ids])
+        conn.commit()
+    return labels
+
+
+def ndcg(gains: list, ideal: list, k: int) -> float:
+    def dcg(values):
+        return sum((2 ** g - 1) / math.log2(i + 2) for i, g in enumerate(values[:k]))
+    best = dcg(sorted(ideal, reverse=True))
+    return dcg(gains) / best if best else 0.0
+
+
+def evaluate(titles: list, label: dict, k: int) -> tuple:
+    gains = [label.get(title, 0) for title in titles[:k]]
+    return ndcg(gains, list(label.values()), k), sum(1 for g in gains if g >= 2) / k
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索排序质量对比")
+    parser.add_argument("--queries", type=int, default=20, help="查询词个数")
+    parser.add_argument("--noise", type=int, default=2000, help="噪声文档数")
+    parser.add_argument("--k", type=int, default=10, help="评估前 k 个结果")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = NotedocsDB(os.path.join(tmp, "search.db"))
+        print(f"📦 生成 {args.queries} 个查询词的语料和 {args.noise} 篇噪声文档 ...")
+        labels = build(db, rng, args.queries, args.noise)
+
+        legacy = "按评分/时间（旧）"
+        results = {legacy: ([], [], [])}
+        with db.get_connection() as conn:
+            for term, label in labels.items():
+                started = time.perf_counter()
+                titles = [row[0] for row in conn.execute(LEGACY_SQL, (build_match_query(term), args.k))]
+                elapsed = (time.perf_counter() - started) * 1000
+                n, p = evaluate(titles, label, args.k)
+                results[legacy][0].append(n)
+                results[legacy][1].append(p)
+                results[legacy][2].append(elapsed)
+
+        # 语料中的评分和时间与相关度无关，单独列出纯 BM25 的结果以看出混合带来的影响
+        configured = dict(SEARCH_CONFIG)
+        variants = (("BM25 加权，不混合评分和时间", {"evaluate_boost": 0.0, "recency_half_life_days": 0.0}),
+                    ("BM25 加权，混合评分和时间（当前配置）", {}))
+        for name, overrides in variants:
+            SEARCH_CONFIG.update(configured, **overrides)
+            results[name] = ([], [], [])
+            for term, label in labels.items():
+                started = time.perf_counter()
+                rows = db.search_documents(term, limit=args.k, fields=["title"])
+                elapsed = (time.perf_counter() - started) * 1000
+                n, p = evaluate([row["title"] for row in rows], label, args.k)
+                results[name][0].append(n)
+                results[name][1].append(p)
+                results[name][2].append(elapsed)
+        SEARCH_CONFIG.update(configured)
+        db.close()
+
+        for name, (ndcgs, precisions, timings) in results.items():
+            print(f"  {name}: NDCG@{args.k} {statistics.mean(ndcgs):.3f}，P@{args.k} {statistics.mean(precisions):.3f}，"
+                  f"平均 {statistics.mean(timings):.3f} ms/次")
+
+
+if __name__ == "__main__":
+    main()
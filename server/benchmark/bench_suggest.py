@@ -0,0 +1,65 @@
+"""
+输入提示基准测试 - SuggestIndex 的加载耗时和单次前缀查找延迟
+
+用合成的标题和标签构造一个用户的索引（不经过数据库），
+按 1~4 个字符的随机前缀查找，统计平均和 p99 延迟，并测量增量更新的耗时。
+    python benchmark/bench_suggest.py --docs 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.suggest import SuggestIndex
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_docs(rng: random.Random, docs: int, tags: int) -> list:
+    vocab = ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10))) for _ in range(5000)]
+    tag_pool = [rng.choice(vocab) for _ in range(tags)]
+    return [(f"{' '.join(rng.sample(vocab, 5))} {i}", ",".join(rng.sample(tag_pool, 3)))
+            for i in range(docs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="输入提示查找延迟")
+    parser.add_argument("--docs", type=int, default=50000, help="该用户的文档数")
+    parser.add_argument("--tags", type=int, default=2000, help="不同标签数")
+    parser.add_argument("--lookups", type=int, default=20000, help="查找次数")
+    parser.add_argument("--seed", type=int, default=7, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = make_docs(rng, args.docs, args.tags)
+    index = SuggestIndex(lambda uid: docs)
+
+    started = time.perf_counter()
+    index.lookup(1, "a")
+    print(f"📦 加载 {args.docs} 篇文档的标题和标签: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    timings = []
+    for _ in range(args.lookups):
+        prefix = "".join(rng.choice(LETTERS) for _ in range(rng.randint(1, 4)))
+        started = time.perf_counter()
+        index.lookup(1, prefix)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(f"  前缀查找: 平均 {statistics.mean(timings):.4f} ms，"
+          f"p99 {timings[int(len(timings) * 0.99)]:.4f} ms，最大 {timings[-1]:.4f} ms")
+
+    updates = []
+    for i in range(1000):
+        doc = {"id": i, "uid": 1, "title": f"new title {i}", "tags": "benchmark,new"}
+        started = time.perf_counter()
+        index.on_docs_changed([], [doc])
+        updates.append((time.perf_counter() - started) * 1000)
+    print(f"  增量写入一篇文档: 平均 {statistics.mean(updates):.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
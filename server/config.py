@@ -16,6 +16,98 @@ MYSQL_CONFIG = {
     'database': os.getenv('MYSQL_DATABASE', 'notedocs')
 }
 
+# MySQL 连接池配置
+MYSQL_POOL_CONFIG = {
+    'min_size': int(os.getenv('MYSQL_POOL_MIN_SIZE', 2)),
+    'max_size': int(os.getenv('MYSQL_POOL_MAX_SIZE', 10)),
+    'timeout': float(os.getenv('MYSQL_POOL_TIMEOUT', 30)),
+    'max_idle_time': float(os.getenv('MYSQL_POOL_MAX_IDLE_TIME', 300))
+}
+
+# SQLite 数据库配置
+SQLITE_CONFIG = {
+    'db_path': os.getenv('SQLITE_DB_PATH', 'data/notedocs.db'),
+    'pool_size': int(os.getenv('SQLITE_POOL_SIZE', 8)),
+    # 执行数据库查询的线程数，默认与连接池大小一致
+    'executor_workers': int(os.getenv('DB_EXECUTOR_WORKERS', os.getenv('SQLITE_POOL_SIZE', 8))),
+    'pool_timeout': float(os.getenv('SQLITE_POOL_TIMEOUT', 30)),
+    'health_check_interval': float(os.getenv('SQLITE_HEALTH_CHECK_INTERVAL', 30)),
+    'pragmas': {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -16000)),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 268435456)),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+        'foreign_keys': 'ON',
+    }
+}
+
+# 文档正文压缩配置
+CONTENT_COMPRESSION_CONFIG = {
+    # 新写入正文的编码：zlib 或 raw（不压缩），已有数据按各自记录的编码读取
+    'codec': os.getenv('CONTENT_CODEC', 'zlib'),
+    'level': int(os.getenv('CONTENT_COMPRESSION_LEVEL', 6)),
+    # 短于该字节数的正文不压缩
+    'min_size': int(os.getenv('CONTENT_COMPRESSION_MIN_SIZE', 512))
+}
+
+# 文档缓存配置（按ID读取文档的进程内 LRU 缓存，任一上限为 0 时关闭）
+DOC_CACHE_CONFIG = {
+    'max_entries': int(os.getenv('DOC_CACHE_MAX_ENTRIES', 1000)),
+    'max_bytes': int(os.getenv('DOC_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+}
+
+# 搜索排序配置
+SEARCH_CONFIG = {
+    # 相关度乘以 (1 + evaluate_boost * evaluate)，评分高的文档排得更靠前
+    'evaluate_boost': float(os.getenv('SEARCH_EVALUATE_BOOST', 0.2)),
+    # BM25 各字段的权重，标题命中比正文中顺带提到更相关
+    'weight_title': float(os.getenv('SEARCH_WEIGHT_TITLE', 10.0)),
+    'weight_tags': float(os.getenv('SEARCH_WEIGHT_TAGS', 5.0)),
+    'weight_summary': float(os.getenv('SEARCH_WEIGHT_SUMMARY', 3.0)),
+    'weight_content': float(os.getenv('SEARCH_WEIGHT_CONTENT', 1.0)),
+    # 时间加权的半衰期（天）：早更新这么多天的文档需要两倍的相关度才能排在同一位置，0 表示不考虑时间
+    'recency_half_life_days': float(os.getenv('SEARCH_RECENCY_HALF_LIFE_DAYS', 730)),
+    # 模糊搜索（fuzzy=true）时，关键词的三元组至少有这个比例出现在标题或标签中才算命中
+    'fuzzy_threshold': float(os.getenv('SEARCH_FUZZY_THRESHOLD', 0.5)),
+    # 搜索结果中关键词摘要 snippet 的长度（字符数）
+    'snippet_length': int(os.getenv('SEARCH_SNIPPET_LENGTH', 120)),
+    # MySQL 全文索引 ngram 解析器的 ngram_token_size（服务端参数，默认 2），更短的词改用 LIKE 搜索
+    'ngram_token_size': int(os.getenv('MYSQL_NGRAM_TOKEN_SIZE', 2))
+}
+
+# 输入提示配置
+SUGGEST_CONFIG = {
+    # 内存中最多保留多少个用户的标题和标签索引，超出时淘汰最久未使用的用户
+    'max_users': int(os.getenv('SUGGEST_MAX_USERS', 1000))
+}
+
+# 相关文档配置
+RELATED_CONFIG = {
+    # 内存中最多保留多少个用户的 TF-IDF 向量，超出时淘汰最久未使用的用户
+    'max_users': int(os.getenv('RELATED_MAX_USERS', 16)),
+    # 每篇文档保留出现次数最多的词数
+    'max_terms': int(os.getenv('RELATED_MAX_TERMS', 100)),
+    # 查询时使用当前文档权重最高的词数
+    'query_terms': int(os.getenv('RELATED_QUERY_TERMS', 50)),
+    # 正文只取前这么多个字符参与计算
+    'content_chars': int(os.getenv('RELATED_CONTENT_CHARS', 20000))
+}
+
+# 近似重复检测配置
+DUPLICATE_CONFIG = {
+    # 正文词组集合的相似度（由 MinHash 签名估计）不低于该值视为近似重复，低于 0.5 时按段查找会漏掉较多
+    'min_similarity': float(os.getenv('DUPLICATE_MIN_SIMILARITY', 0.7))
+}
+
+# 已保存 URL 过滤器配置
+URL_FILTER_CONFIG = {
+    # 内存中最多保留多少个用户的布隆过滤器，超出时淘汰最久未使用的用户
+    'max_users': int(os.getenv('URL_FILTER_MAX_USERS', 1000)),
+    # 布隆过滤器的目标误判率，误判时多查一次数据库
+    'error_rate': float(os.getenv('URL_FILTER_ERROR_RATE', 0.01))
+}
+
 # FastAPI 配置
 API_CONFIG = {
     'host': os.getenv('API_HOST', '127.0.0.1'),
@@ -0,0 +1,54 @@
+"""
+异步数据库访问 - 在专用的有界线程池中执行 NotedocsDB 的同步方法
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+from config import SQLITE_CONFIG
+from db.database_sqlite import NotedocsDB, db
+
+class AsyncNotedocsDB:
+    """
+    NotedocsDB 的异步版本：每个公开方法都有同名的可 await 版本，
+    例如 await async_db.read_document_by_id(doc_id)。
+
+    线程数默认与连接池大小一致，每个工作线程固定复用自己的连接，
+    慢查询只占用一个工作线程，不会阻塞事件循环。
+    """
+
+    def __init__(self, sync_db: NotedocsDB, max_workers: int):
+        self.sync_db = sync_db
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="notedocs-db")
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.sync_db, name)
+        if name.startswith("_") or not callable(attr):
+            raise AttributeError(name)
+
+        @functools.wraps(attr)
+        async def run_in_executor(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(attr, *args, **kwargs))
+
+        # 缓存包装后的方法，后续访问不再走 __getattr__
+        setattr(self, name, run_in_executor)
+        return run_in_executor
+
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """数据库线程池状态"""
+        return {
+            "max_workers": self.max_workers,
+            "threads": len(self.executor._threads),
+            "queued": self.executor._work_queue.qsize(),
+        }
+
+    def shutdown(self):
+        """等待进行中的查询完成后关闭线程池"""
+        self.executor.shutdown(wait=True)
+
+# 全局异步数据库实例
+async_db = AsyncNotedocsDB(db, SQLITE_CONFIG['executor_workers'])
@@ -0,0 +1,124 @@
+"""
+布隆过滤器 - 按用户在内存中记录已保存页面的规范化 URL，“没有保存过”的判断不需要查询数据库
+
+过滤器回答“一定没有”或“可能有”：前者直接返回，后者再查 docs.canonical_url 确认。
+删除文档时不从过滤器中移除（布隆过滤器不支持删除），只会让少量查询多查一次数据库；
+写入的 URL 超过容量后误判率上升，该用户的过滤器在下次查询时按当前数据重建。
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from db.urls import canonicalize_url
+
+
+class BloomFilter:
+    """按容量和目标误判率确定位数和哈希函数个数的布隆过滤器"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # 两个 64 位哈希线性组合出 k 个位置（Kirsch-Mitzenmacher）
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        """加入一项；所有位都已置位（已加入过，或极少数误判）时不计入 count，重复保存同一页面不会提前触发重建"""
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+
+class UrlFilter:
+    """
+    按用户懒加载的已保存 URL 过滤器。loader(uid) 返回该用户所有文档的规范化 URL。
+
+    与 SuggestIndex 相同，加载期间该用户的文档有变化时，加载结果不放入缓存；
+    此时本次查询也不使用它（新写入的 URL 可能不在其中），直接查数据库。
+    """
+
+    def __init__(self, loader: Callable[[int], List[str]], max_users: int = 1000,
+                 error_rate: float = 0.01, min_capacity: int = 1024):
+        self.loader = loader
+        self.max_users = max_users
+        self.error_rate = error_rate
+        # 过滤器容量取当前 URL 数的两倍（至少 min_capacity），留出写入新文档的余量
+        self.min_capacity = min_capacity
+        self._users: "OrderedDict[int, BloomFilter]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.negatives = 0
+
+    def _filter(self, uid: int) -> Optional[BloomFilter]:
+        with self._lock:
+            bloom = self._users.get(uid)
+            if bloom is not None and not bloom.full:
+                self._users.move_to_end(uid)
+                return bloom
+            version = self._versions.get(uid, 0)
+
+        urls = self.loader(uid)
+        bloom = BloomFilter(max(len(urls) * 2, self.min_capacity), self.error_rate)
+        for url in urls:
+            bloom.add(url)
+
+        with self._lock:
+            if self._versions.get(uid, 0) != version:
+                return None
+            self._users[uid] = bloom
+            self._users.move_to_end(uid)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return bloom
+
+    def might_contain(self, uid: int, canonical_url: str) -> bool:
+        """该用户可能保存过这个 URL 时返回 True，返回 False 时一定没有保存过"""
+        bloom = self._filter(uid)
+        with self._lock:
+            self.lookups += 1
+            if bloom is not None and canonical_url not in bloom:
+                self.negatives += 1
+                return False
+        return True
+
+    def on_docs_changed(self, removed: List[Dict], added: List[Dict]) -> None:
+        """文档变更通知：记录写入或修改后的 URL，只更新已加载的用户；删除的 URL 不处理"""
+        with self._lock:
+            for doc in added:
+                self._versions[doc["uid"]] = self._versions.get(doc["uid"], 0) + 1
+                bloom = self._users.get(doc["uid"])
+                if bloom is not None:
+                    bloom.add(canonicalize_url(doc.get("url")))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "max_users": self.max_users,
+                "urls": sum(bloom.count for bloom in self._users.values()),
+                "bytes": sum(len(bloom.bits) for bloom in self._users.values()),
+                "lookups": self.lookups,
+                "negatives": self.negatives,
+                "negative_rate": self.negatives / self.lookups if self.lookups else 0.0,
+            }
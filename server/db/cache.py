@@ -0,0 +1,111 @@
+"""
+进程内 LRU 缓存 - 同时按条目数和估算的内存字节数限制容量
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """估算字典形式的文档占用的字节数（各字段对象大小之和）"""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    线程安全的 LRU 缓存，超过 max_entries 或 max_bytes 时淘汰最久未访问的条目。
+
+    读库之前先取 generation，写回时传入：读库期间发生过失效的话放弃写回，
+    避免并发的写操作提交后，读到旧快照的线程又把旧数据放回缓存。
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 sizeof: Callable[[Any], int] = estimate_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """命中时返回缓存值并标记为最近使用，未命中返回 None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """写入缓存，返回是否写入（超过单条容量上限或读库期间发生失效时不写入）"""
+        if not self.enabled:
+            return False
+        size = self.sizeof(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                self._rejected += 1
+                return False
+            if size > self.max_bytes:
+                self._rejected += 1
+                return False
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+            return True
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """删除指定条目（不存在也会推进 generation）"""
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                item = self._data.pop(key, None)
+                if item is not None:
+                    self._bytes -= item[1]
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._invalidations += len(self._data)
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存状态，用于调整容量"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "rejected": self._rejected,
+            }
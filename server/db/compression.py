@@ -0,0 +1,78 @@
+"""
+文档正文压缩 - docs_content 按行记录编码方式（codec），旧数据无需改写即可读取
+
+codec 取值：
+    0  原文（TEXT），压缩之前写入的数据和太短不值得压缩的正文
+    1  zlib 压缩的 UTF-8（BLOB）
+
+decode 注册为 SQL 函数 notedocs_decode，全文索引触发器用它取得正文原文。
+content_hash 是正文原文的摘要，存入 docs.content_hash，写入时据此判断正文有没有变化。
+"""
+import hashlib
+import zlib
+from typing import Any, Optional, Tuple
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+CODEC_NAMES = {"raw": CODEC_RAW, "zlib": CODEC_ZLIB}
+
+
+def codec_by_name(name: str) -> int:
+    """配置中的编码名转换为 codec 值"""
+    try:
+        return CODEC_NAMES[name.lower()]
+    except KeyError:
+        raise ValueError(f"不支持的正文编码: {name}，可选 {', '.join(CODEC_NAMES)}")
+
+
+def encode(text: Optional[str], codec: int = CODEC_ZLIB, level: int = 6,
+           min_size: int = 512) -> Tuple[int, Any]:
+    """
+    按指定编码压缩正文，返回 (实际使用的 codec, 存储值)。
+
+    正文短于 min_size 字节或压缩后没有变小时按原文存储。
+    """
+    if text is None or codec == CODEC_RAW:
+        return CODEC_RAW, text
+    raw = text.encode("utf-8")
+    if len(raw) < min_size:
+        return CODEC_RAW, text
+    if codec == CODEC_ZLIB:
+        packed = zlib.compress(raw, level)
+        if len(packed) < len(raw):
+            return CODEC_ZLIB, packed
+        return CODEC_RAW, text
+    raise ValueError(f"未知的正文编码: {codec}")
+
+
+def decode(codec: Optional[int], data: Any) -> Optional[str]:
+    """还原正文原文，注册为 SQL 函数 notedocs_decode"""
+    if data is None or not codec:
+        return data
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"未知的正文编码: {codec}")
+
+
+def decode_prefix(codec: Optional[int], data: Any, length: int) -> Optional[str]:
+    """只解压还原前 length 个字符左右的正文，用于搜索结果预览"""
+    if data is None or not codec:
+        return data[:length] if data is not None else None
+    if codec == CODEC_ZLIB:
+        # 一个字符最多 4 个 UTF-8 字节，截断处不完整的字符直接丢弃
+        raw = zlib.decompressobj().decompress(data, length * 4)
+        return raw.decode("utf-8", errors="ignore")[:length]
+    raise ValueError(f"未知的正文编码: {codec}")
+
+
+def content_hash(text: Optional[str]) -> Optional[str]:
+    """正文原文的摘要（与编码方式无关），比较它就能知道正文是否变化，不用读取和解压旧正文"""
+    if text is None:
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def content_hash_sql(codec: Optional[int], data: Any) -> Optional[str]:
+    """按存储的 codec 和值计算正文摘要，注册为 SQL 函数 notedocs_content_hash，迁移回填时使用"""
+    return content_hash(decode(codec, data))
@@ -2,8 +2,10 @@
 数据库配置和表结构 - MySQL 5.7
 """
 import pymysql
-from typing import Optional, List, Dict
-from config import MYSQL_CONFIG
+from typing import Optional, List, Dict, Any
+from config import MYSQL_CONFIG, MYSQL_POOL_CONFIG, SEARCH_CONFIG
+from db.pool import MySQLPool
+from db.fts import build_boolean_query
 
 class NotedocsDB:
     def __init__(self):
@@ -12,10 +14,30 @@ class NotedocsDB:
             'charset': 'utf8mb4',
             'autocommit': True
         }
+        self.pool = MySQLPool(
+            self.config,
+            min_size=MYSQL_POOL_CONFIG['min_size'],
+            max_size=MYSQL_POOL_CONFIG['max_size'],
+            timeout=MYSQL_POOL_CONFIG['timeout'],
+            max_idle_time=MYSQL_POOL_CONFIG['max_idle_time']
+        )
+        try:
+            self.pool.fill()
+        except Exception as e:
+            # MySQL 暂不可用时不影响启动，连接在首次使用时再建立
+            print(f"预建MySQL连接失败: {e}")
     
     def get_connection(self):
-        """获取数据库连接"""
-        return pymysql.connect(**self.config)
+        """从连接池借出连接（取出时 ping 检查），with 块结束时归还"""
+        return self.pool.connection()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取连接池状态（使用中、等待数、等待时间等）"""
+        return self.pool.stats()
+
+    def close(self):
+        """关闭连接池中的所有连接"""
+        self.pool.close_all()
     
     def write_document(self, uid: int, title: str, summary: str, content: str, 
                       source: str = '', tags: str = '', evaluate: int = 0) -> bool:
@@ -196,14 +218,42 @@ class NotedocsDB:
     
     def search_documents(self, keyword: str, uid: Optional[int] = None, 
                         limit: int = 50, offset: int = 0) -> List[Dict]:
-        """搜索文档（支持用户过滤和分页）"""
+        """搜索文档（基于 ft_docs_search 全文索引，按相关度和评分排序，支持用户过滤和分页）"""
+        against = build_boolean_query(keyword, SEARCH_CONFIG['ngram_token_size'])
+        if against is None:
+            return self._search_documents_like(keyword, uid, limit, offset)
+
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                uid_filter = "AND uid = %s" if uid is not None else ""
+                params = [against, against] + ([uid] if uid is not None else []) + \
+                         [SEARCH_CONFIG['evaluate_boost'], limit, offset]
+                # 正文只取前201个字符用于预览，不传输整篇内容
+                cursor.execute(f"""
+                    SELECT id, uid, title, summary, LEFT(content, 201), source, tags, evaluate,
+                           created_at, updated_at,
+                           MATCH(title, summary, content, tags) AGAINST (%s IN BOOLEAN MODE) AS relevance
+                    FROM docs
+                    WHERE MATCH(title, summary, content, tags) AGAINST (%s IN BOOLEAN MODE) {uid_filter}
+                    ORDER BY relevance * (1 + %s * evaluate) DESC, updated_at DESC
+                    LIMIT %s OFFSET %s
+                """, params)
+                return [self._search_row_to_dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"搜索文档失败: {e}")
+            return []
+
+    def _search_documents_like(self, keyword: str, uid: Optional[int],
+                               limit: int, offset: int) -> List[Dict]:
+        """LIKE 全表扫描搜索，用于全文索引无法处理的关键词"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 if uid is not None:
                     cursor.execute("""
-                        SELECT id, uid, title, summary, content, source, tags, evaluate, created_at, updated_at
+                        SELECT id, uid, title, summary, LEFT(content, 201), source, tags, evaluate, created_at, updated_at
                         FROM docs 
                         WHERE uid = %s AND (title LIKE %s OR summary LIKE %s OR content LIKE %s OR tags LIKE %s)
                         ORDER BY evaluate DESC, updated_at DESC
@@ -211,31 +261,33 @@ class NotedocsDB:
                     """, (uid, f"%{keyword}%", f"%{keyword}%", f"%{keyword}%", f"%{keyword}%", limit, offset))
                 else:
                     cursor.execute("""
-                        SELECT id, uid, title, summary, content, source, tags, evaluate, created_at, updated_at
+                        SELECT id, uid, title, summary, LEFT(content, 201), source, tags, evaluate, created_at, updated_at
                         FROM docs 
                         WHERE title LIKE %s OR summary LIKE %s OR content LIKE %s OR tags LIKE %s
                         ORDER BY evaluate DESC, updated_at DESC
                         LIMIT %s OFFSET %s
                     """, (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%", f"%{keyword}%", limit, offset))
                 
-                results = []
-                for row in cursor.fetchall():
-                    results.append({
-                        "id": row[0],
-                        "uid": row[1],
-                        "title": row[2],
-                        "summary": row[3],
-                        "content": row[4][:200] + "..." if len(row[4]) > 200 else row[4],
-                        "source": row[5],
-                        "tags": row[6],
-                        "evaluate": row[7],
-                        "created_at": str(row[8]),
-                        "updated_at": str(row[9])
-                    })
-                return results
+                return [self._search_row_to_dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"搜索文档失败: {e}")
             return []
+
+    def _search_row_to_dict(self, row) -> Dict:
+        """搜索结果行转换为字典，正文只保留前200个字符"""
+        content = row[4] or ""
+        return {
+            "id": row[0],
+            "uid": row[1],
+            "title": row[2],
+            "summary": row[3],
+            "content": content[:200] + "..." if len(content) > 200 else content,
+            "source": row[5],
+            "tags": row[6],
+            "evaluate": row[7],
+            "created_at": str(row[8]),
+            "updated_at": str(row[9])
+        }
     
     def get_documents_by_tag(self, tag: str, uid: Optional[int] = None, 
                             limit: int = 50, offset: int = 0) -> List[Dict]:
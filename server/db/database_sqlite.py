@@ -3,12 +3,81 @@
 """
 import sqlite3
 import os
-from typing import Optional, List, Dict
+import json
+import math
+from typing import Callable, Optional, List, Dict, Any
 from datetime import datetime
+from config import (
+    SQLITE_CONFIG, CONTENT_COMPRESSION_CONFIG, DOC_CACHE_CONFIG, SEARCH_CONFIG, SUGGEST_CONFIG, RELATED_CONFIG,
+    DUPLICATE_CONFIG, URL_FILTER_CONFIG
+)
+from db.pool import SQLitePool
+from db.fts import build_match_query, tokenize_for_index, trigrams_for_index, query_trigrams
+from db import compression
+from db.cache import LRUCache
+from db.suggest import SuggestIndex
+from db.related import RelatedIndex
+from db.bloom import UrlFilter
+from db.urls import canonicalize_url
+from db.fields import DOC_LIST_FIELDS, DOC_SEARCH_FIELDS, DOC_COMPUTED_FIELDS, project
+from db.pagination import SEARCH_SORT_KEYS
+from db import snippet, ranking, minhash
+from db.tags import normalize_tags
 
 class NotedocsDB:
-    def __init__(self, db_path: str = "data/notedocs.db"):
+    def __init__(self, db_path: str = SQLITE_CONFIG['db_path']):
         self.db_path = db_path
+        functions = {
+            # 全文索引触发器用它把中文展开为二元组
+            'notedocs_tokenize': (1, tokenize_for_index),
+            # 触发器用它从 docs_content 取得解压后的正文
+            'notedocs_decode': (2, compression.decode),
+            # 模糊搜索倒排表的触发器用它生成标题和标签的三元组
+            'notedocs_trigrams': (2, trigrams_for_index),
+            # 搜索结果的正文预览和关键词摘要，只在分页后的结果行上调用
+            'notedocs_preview': (3, snippet.preview_sql),
+            'notedocs_snippet': (4, snippet.snippet_sql),
+            # 近似重复检测：触发器用它计算正文的 MinHash 签名及分段哈希，查询时比较签名
+            'notedocs_minhash': (2, minhash.signature_sql),
+            'notedocs_minhash_bands': (1, minhash.bands_for_index),
+            'notedocs_similarity': (2, minhash.similarity),
+            # 写入和修改文档时由 url 生成 canonical_url
+            'notedocs_canonical_url': (1, canonicalize_url),
+            # 迁移时按已存储的正文回填 docs.content_hash
+            'notedocs_content_hash': (2, compression.content_hash_sql)
+        }
+        if not ranking.has_math_functions():
+            # 搜索排序分用到 ln()，SQLite 未编译数学函数时补上
+            functions['ln'] = (1, ranking.ln)
+        self.pool = SQLitePool(
+            db_path,
+            pragmas=SQLITE_CONFIG['pragmas'],
+            functions=functions,
+            max_size=SQLITE_CONFIG['pool_size'],
+            timeout=SQLITE_CONFIG['pool_timeout'],
+            health_check_interval=SQLITE_CONFIG['health_check_interval']
+        )
+        self.content_codec = compression.codec_by_name(CONTENT_COMPRESSION_CONFIG['codec'])
+        self.compression_level = CONTENT_COMPRESSION_CONFIG['level']
+        self.compression_min_size = CONTENT_COMPRESSION_CONFIG['min_size']
+        # read_document_by_id 的结果缓存，所有改动文档的操作提交后按文档ID失效
+        self.doc_cache = LRUCache(max_entries=DOC_CACHE_CONFIG['max_entries'],
+                                  max_bytes=DOC_CACHE_CONFIG['max_bytes'])
+        # 写操作提交后的文档变更监听器，见 add_doc_listener
+        self._doc_listeners: List[Callable[[List[Dict], List[Dict]], None]] = []
+        # 标题和标签输入提示，按用户懒加载，随文档变更增量更新
+        self.suggest_index = SuggestIndex(self._load_suggest_docs, max_users=SUGGEST_CONFIG['max_users'])
+        self.add_doc_listener(self.suggest_index.on_docs_changed)
+        # 相关文档的 TF-IDF 向量，同样按用户懒加载、随文档变更增量更新
+        self.related_index = RelatedIndex(self._load_related_docs, max_users=RELATED_CONFIG['max_users'],
+                                          max_terms=RELATED_CONFIG['max_terms'],
+                                          query_terms=RELATED_CONFIG['query_terms'],
+                                          content_chars=RELATED_CONFIG['content_chars'])
+        self.add_doc_listener(self.related_index.on_docs_changed)
+        # 已保存 URL 的布隆过滤器，按用户懒加载，“没有保存过”的判断不查询数据库
+        self.url_filter = UrlFilter(self._load_doc_urls, max_users=URL_FILTER_CONFIG['max_users'],
+                                    error_rate=URL_FILTER_CONFIG['error_rate'])
+        self.add_doc_listener(self.url_filter.on_docs_changed)
         self.init_database()
     
     def init_database(self):
@@ -23,7 +92,7 @@ class NotedocsDB:
                         url TEXT NOT NULL,
                         title TEXT NOT NULL UNIQUE,
                         summary TEXT,
-                        content TEXT,
+                        content TEXT,  -- 已废弃，正文存放在 docs_content 表
                         source TEXT DEFAULT '',
                         favicon TEXT DEFAULT '',
                         tags TEXT DEFAULT '',
@@ -60,53 +129,1334 @@ class NotedocsDB:
                 """)
                 
                 # 创建索引
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_uid ON docs(uid)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_url ON docs(url)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_title ON docs(title)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags ON docs(tags)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_updated_at ON docs(updated_at)")
                 
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_uid ON categories(uid)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_name ON categories(name)")
                 
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_docs_category_id ON categories_docs(category_id)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_docs_doc_id ON categories_docs(doc_id)")
                 
                 conn.commit()
+                self.run_migrations(cursor)
         except Exception as e:
             print(f"初始化数据库失败: {e}")
+
+    # ========== 数据库迁移 ==========
+
+    def run_migrations(self, cursor):
+        """
+        按顺序执行尚未执行的迁移，PRAGMA user_version 记录已执行到第几个。
+        每个迁移在独立事务中执行，新迁移只能追加到列表末尾。
+
+        迁移期间关闭外键约束：重建被引用的表（DROP TABLE docs）时不能级联删除 categories_docs、doc_tags，
+        而 PRAGMA foreign_keys 在事务中设置无效，只能在事务外关闭、全部迁移结束后恢复。
+        """
+        migrations = [
+            self._migrate_fts_index,
+            self._migrate_fts_cjk_bigram,
+            self._migrate_doc_tags,
+            self._migrate_keyset_indexes,
+            self._migrate_doc_counters,
+            self._migrate_categories_docs_unique,
+            self._migrate_docs_content,
+            self._migrate_content_codec,
+            self._migrate_change_tracking,
+            self._migrate_doc_trigrams,
+            self._migrate_doc_minhash,
+            self._migrate_canonical_url,
+            self._migrate_docs_identity,
+            self._migrate_canonical_url_rules,
+        ]
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        if version >= len(migrations):
+            return
+        foreign_keys = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+        cursor.execute("PRAGMA foreign_keys = OFF")
+        try:
+            for index, migration in enumerate(migrations[version:], start=version + 1):
+                print(f"执行数据库迁移 {index}: {migration.__doc__}")
+                cursor.execute("BEGIN")
+                try:
+                    migration(cursor)
+                    cursor.execute(f"PRAGMA user_version = {index}")
+                    cursor.connection.commit()
+                except Exception:
+                    cursor.connection.rollback()
+                    raise
+        finally:
+            cursor.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+
+    def _migrate_fts_index(self, cursor):
+        """创建 docs_fts 全文索引及同步触发器，并回填已有文档"""
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+                title, summary, content, tags,
+                content='docs', content_rowid='id'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS docs_fts_insert AFTER INSERT ON docs BEGIN
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, new.title, new.summary, new.content, new.tags);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS docs_fts_delete AFTER DELETE ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, old.title, old.summary, old.content, old.tags);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS docs_fts_update AFTER UPDATE OF title, summary, content, tags ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, old.title, old.summary, old.content, old.tags);
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, new.title, new.summary, new.content, new.tags);
+            END
+        """)
+        # 回填已有文档
+        cursor.execute("INSERT INTO docs_fts(docs_fts) VALUES ('rebuild')")
+
+    def _migrate_fts_cjk_bigram(self, cursor):
+        """全文索引改为中文二元组分词（无内容 FTS5 表，由 notedocs_tokenize 生成词元），并重建索引"""
+        cursor.execute("DROP TRIGGER IF EXISTS docs_fts_insert")
+        cursor.execute("DROP TRIGGER IF EXISTS docs_fts_delete")
+        cursor.execute("DROP TRIGGER IF EXISTS docs_fts_update")
+        cursor.execute("DROP TABLE IF EXISTS docs_fts")
+        # 索引的是分词后的文本而不是 docs 的原文，所以不能再用外部内容表
+        cursor.execute("""
+            CREATE VIRTUAL TABLE docs_fts USING fts5(
+                title, summary, content, tags,
+                content=''
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_fts_insert AFTER INSERT ON docs BEGIN
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, notedocs_tokenize(new.title), notedocs_tokenize(new.summary),
+                        notedocs_tokenize(new.content), notedocs_tokenize(new.tags));
+            END
+        """)
+        # 无内容表删除时必须提供与写入时完全相同的词元
+        cursor.execute("""
+            CREATE TRIGGER docs_fts_delete AFTER DELETE ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, notedocs_tokenize(old.title), notedocs_tokenize(old.summary),
+                        notedocs_tokenize(old.content), notedocs_tokenize(old.tags));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_fts_update AFTER UPDATE OF title, summary, content, tags ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, notedocs_tokenize(old.title), notedocs_tokenize(old.summary),
+                        notedocs_tokenize(old.content), notedocs_tokenize(old.tags));
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, notedocs_tokenize(new.title), notedocs_tokenize(new.summary),
+                        notedocs_tokenize(new.content), notedocs_tokenize(new.tags));
+            END
+        """)
+        cursor.execute("""
+            INSERT INTO docs_fts(rowid, title, summary, content, tags)
+            SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                   notedocs_tokenize(content), notedocs_tokenize(tags)
+            FROM docs
+        """)
     
+    def _migrate_doc_tags(self, cursor):
+        """创建规范化标签表 doc_tags 并从 docs.tags 回填，删除无法用于子串匹配的 idx_tags"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS doc_tags (
+                doc_id INTEGER NOT NULL,
+                uid INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (doc_id, tag),
+                FOREIGN KEY (doc_id) REFERENCES docs(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        """)
+        # 按标签查文档（可带 uid 过滤），doc_id 在索引内，无需回表
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_doc_tags_tag_uid ON doc_tags(tag, uid, doc_id)")
+        cursor.execute("DROP INDEX IF EXISTS idx_tags")
+
+        cursor.execute("SELECT id, uid, tags FROM docs")
+        for row in cursor.fetchall():
+            self._sync_doc_tags(cursor, row["id"], row["uid"], row["tags"])
+
+    def _migrate_keyset_indexes(self, cursor):
+        """创建与游标分页排序一致的复合索引（SQLite 索引末尾自带 rowid 即 id）"""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_docs_uid_updated_at ON docs(uid, updated_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_docs_uid_evaluate ON docs(uid, evaluate, updated_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_docs_evaluate ON docs(evaluate, updated_at)")
+        # 已被 idx_docs_uid_updated_at 的前缀覆盖
+        cursor.execute("DROP INDEX IF EXISTS idx_uid")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_docs_category_doc ON categories_docs(category_id, doc_id)")
+        cursor.execute("DROP INDEX IF EXISTS idx_categories_docs_category_id")
+
+    def _migrate_doc_counters(self, cursor):
+        """创建按用户、按分类的文档数计数表及维护触发器，并回填计数"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_doc_stats (
+                uid INTEGER PRIMARY KEY,
+                doc_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS category_doc_stats (
+                category_id INTEGER PRIMARY KEY,
+                doc_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # 文档的增删改（包括 INSERT OR REPLACE 删除旧行）同步调整用户计数
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS user_doc_stats_insert AFTER INSERT ON docs BEGIN
+                INSERT INTO user_doc_stats (uid, doc_count) VALUES (new.uid, 1)
+                ON CONFLICT(uid) DO UPDATE SET doc_count = doc_count + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS user_doc_stats_delete AFTER DELETE ON docs BEGIN
+                UPDATE user_doc_stats SET doc_count = doc_count - 1 WHERE uid = old.uid;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS user_doc_stats_update AFTER UPDATE OF uid ON docs
+            WHEN old.uid IS NOT new.uid BEGIN
+                UPDATE user_doc_stats SET doc_count = doc_count - 1 WHERE uid = old.uid;
+                INSERT INTO user_doc_stats (uid, doc_count) VALUES (new.uid, 1)
+                ON CONFLICT(uid) DO UPDATE SET doc_count = doc_count + 1;
+            END
+        """)
+        # 分类关联的增删（包括删除文档时的级联删除）同步调整分类计数
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS category_doc_stats_insert AFTER INSERT ON categories_docs BEGIN
+                INSERT INTO category_doc_stats (category_id, doc_count) VALUES (new.category_id, 1)
+                ON CONFLICT(category_id) DO UPDATE SET doc_count = doc_count + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS category_doc_stats_delete AFTER DELETE ON categories_docs BEGIN
+                UPDATE category_doc_stats SET doc_count = doc_count - 1 WHERE category_id = old.category_id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS category_doc_stats_update AFTER UPDATE OF category_id ON categories_docs
+            WHEN old.category_id IS NOT new.category_id BEGIN
+                UPDATE category_doc_stats SET doc_count = doc_count - 1 WHERE category_id = old.category_id;
+                INSERT INTO category_doc_stats (category_id, doc_count) VALUES (new.category_id, 1)
+                ON CONFLICT(category_id) DO UPDATE SET doc_count = doc_count + 1;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS category_doc_stats_cleanup AFTER DELETE ON categories BEGIN
+                DELETE FROM category_doc_stats WHERE category_id = old.id;
+            END
+        """)
+        # 未开启外键时 INSERT OR REPLACE 留下的指向已删除文档的关联
+        cursor.execute("DELETE FROM categories_docs WHERE doc_id NOT IN (SELECT id FROM docs)")
+        cursor.execute("""
+            INSERT INTO user_doc_stats (uid, doc_count)
+            SELECT uid, COUNT(*) FROM docs GROUP BY uid
+        """)
+        cursor.execute("""
+            INSERT INTO category_doc_stats (category_id, doc_count)
+            SELECT category_id, COUNT(*) FROM categories_docs GROUP BY category_id
+        """)
+
+    def _migrate_categories_docs_unique(self, cursor):
+        """删除重复的分类-文档关联，并把 (category_id, doc_id) 索引改为唯一索引"""
+        # 每对关联保留最早的一行，删除时计数触发器同步扣减分类计数
+        cursor.execute("""
+            DELETE FROM categories_docs WHERE id NOT IN (
+                SELECT MIN(id) FROM categories_docs GROUP BY category_id, doc_id
+            )
+        """)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uk_categories_docs_category_doc
+            ON categories_docs(category_id, doc_id)
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_categories_docs_category_doc")
+
+    def _migrate_docs_content(self, cursor):
+        """正文移到 docs_content 表，docs 行只保留元数据；全文索引触发器改为从 docs_content 读取正文"""
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS docs_content (
+                doc_id INTEGER PRIMARY KEY,
+                content TEXT
+            )
+        """)
+        # 先搬正文再建 docs_content 的触发器，索引中的词元与搬迁后读到的正文一致，无需重建
+        cursor.execute("""
+            INSERT OR IGNORE INTO docs_content (doc_id, content)
+            SELECT id, content FROM docs WHERE content IS NOT NULL
+        """)
+
+        cursor.execute("DROP TRIGGER IF EXISTS docs_fts_insert")
+        cursor.execute("DROP TRIGGER IF EXISTS docs_fts_delete")
+        cursor.execute("DROP TRIGGER IF EXISTS docs_fts_update")
+        # 新文档写入 docs 时还没有正文，正文由随后写入 docs_content 的触发器补进索引
+        cursor.execute("""
+            CREATE TRIGGER docs_fts_insert AFTER INSERT ON docs BEGIN
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, notedocs_tokenize(new.title), notedocs_tokenize(new.summary),
+                        notedocs_tokenize((SELECT content FROM docs_content WHERE doc_id = new.id)),
+                        notedocs_tokenize(new.tags));
+            END
+        """)
+        # 先用正文删除索引行，再删除正文（此时 docs 行已不存在，docs_content 的删除触发器不再改索引）
+        cursor.execute("""
+            CREATE TRIGGER docs_fts_delete AFTER DELETE ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, notedocs_tokenize(old.title), notedocs_tokenize(old.summary),
+                        notedocs_tokenize((SELECT content FROM docs_content WHERE doc_id = old.id)),
+                        notedocs_tokenize(old.tags));
+                DELETE FROM docs_content WHERE doc_id = old.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_fts_update AFTER UPDATE OF title, summary, tags ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, notedocs_tokenize(old.title), notedocs_tokenize(old.summary),
+                        notedocs_tokenize((SELECT content FROM docs_content WHERE doc_id = old.id)),
+                        notedocs_tokenize(old.tags));
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, notedocs_tokenize(new.title), notedocs_tokenize(new.summary),
+                        notedocs_tokenize((SELECT content FROM docs_content WHERE doc_id = new.id)),
+                        notedocs_tokenize(new.tags));
+            END
+        """)
+        # 正文的增删改：用 docs 当前的元数据和旧正文删除索引行，再用新正文写入
+        cursor.execute("""
+            CREATE TRIGGER docs_content_fts_insert AFTER INSERT ON docs_content BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                SELECT 'delete', id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(NULL), notedocs_tokenize(tags)
+                FROM docs WHERE id = new.doc_id;
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(new.content), notedocs_tokenize(tags)
+                FROM docs WHERE id = new.doc_id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_content_fts_update AFTER UPDATE OF content ON docs_content BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                SELECT 'delete', id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(old.content), notedocs_tokenize(tags)
+                FROM docs WHERE id = old.doc_id;
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(new.content), notedocs_tokenize(tags)
+                FROM docs WHERE id = new.doc_id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_content_fts_delete AFTER DELETE ON docs_content BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                SELECT 'delete', id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(old.content), notedocs_tokenize(tags)
+                FROM docs WHERE id = old.doc_id;
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(NULL), notedocs_tokenize(tags)
+                FROM docs WHERE id = old.doc_id;
+            END
+        """)
+        # docs_fts_update 不再监听 content 列，清空旧正文不会改动索引；腾出的页需要 VACUUM 才能归还给文件系统
+        cursor.execute("UPDATE docs SET content = NULL WHERE content IS NOT NULL")
+
+    def _migrate_content_codec(self, cursor):
+        """docs_content 增加 codec 列记录正文编码（已有行为 0 即原文），触发器改为经 notedocs_decode 读取正文"""
+        cursor.execute("ALTER TABLE docs_content ADD COLUMN codec INTEGER NOT NULL DEFAULT 0")
+        for name in ("docs_fts_insert", "docs_fts_delete", "docs_fts_update",
+                     "docs_content_fts_insert", "docs_content_fts_update", "docs_content_fts_delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+        body = "notedocs_decode(codec, content)"
+        cursor.execute(f"""
+            CREATE TRIGGER docs_fts_insert AFTER INSERT ON docs BEGIN
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, notedocs_tokenize(new.title), notedocs_tokenize(new.summary),
+                        notedocs_tokenize((SELECT {body} FROM docs_content WHERE doc_id = new.id)),
+                        notedocs_tokenize(new.tags));
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER docs_fts_delete AFTER DELETE ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, notedocs_tokenize(old.title), notedocs_tokenize(old.summary),
+                        notedocs_tokenize((SELECT {body} FROM docs_content WHERE doc_id = old.id)),
+                        notedocs_tokenize(old.tags));
+                DELETE FROM docs_content WHERE doc_id = old.id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER docs_fts_update AFTER UPDATE OF title, summary, tags ON docs BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                VALUES ('delete', old.id, notedocs_tokenize(old.title), notedocs_tokenize(old.summary),
+                        notedocs_tokenize((SELECT {body} FROM docs_content WHERE doc_id = old.id)),
+                        notedocs_tokenize(old.tags));
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                VALUES (new.id, notedocs_tokenize(new.title), notedocs_tokenize(new.summary),
+                        notedocs_tokenize((SELECT {body} FROM docs_content WHERE doc_id = new.id)),
+                        notedocs_tokenize(new.tags));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_content_fts_insert AFTER INSERT ON docs_content BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                SELECT 'delete', id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(NULL), notedocs_tokenize(tags)
+                FROM docs WHERE id = new.doc_id;
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(notedocs_decode(new.codec, new.content)), notedocs_tokenize(tags)
+                FROM docs WHERE id = new.doc_id;
+            END
+        """)
+        # 只改编码（重新压缩）时原文不变，跳过索引更新
+        cursor.execute("""
+            CREATE TRIGGER docs_content_fts_update AFTER UPDATE OF content, codec ON docs_content
+            WHEN notedocs_decode(old.codec, old.content) IS NOT notedocs_decode(new.codec, new.content) BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                SELECT 'delete', id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(notedocs_decode(old.codec, old.content)), notedocs_tokenize(tags)
+                FROM docs WHERE id = old.doc_id;
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(notedocs_decode(new.codec, new.content)), notedocs_tokenize(tags)
+                FROM docs WHERE id = new.doc_id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER docs_content_fts_delete AFTER DELETE ON docs_content BEGIN
+                INSERT INTO docs_fts(docs_fts, rowid, title, summary, content, tags)
+                SELECT 'delete', id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(notedocs_decode(old.codec, old.content)), notedocs_tokenize(tags)
+                FROM docs WHERE id = old.doc_id;
+                INSERT INTO docs_fts(rowid, title, summary, content, tags)
+                SELECT id, notedocs_tokenize(title), notedocs_tokenize(summary),
+                       notedocs_tokenize(NULL), notedocs_tokenize(tags)
+                FROM docs WHERE id = old.doc_id;
+            END
+        """)
+
+    def _migrate_change_tracking(self, cursor):
+        """docs 增加 version 列，计数表增加 generation / last_modified 列，用于 ETag 和 Last-Modified"""
+        cursor.execute("ALTER TABLE docs ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        for table in ("user_doc_stats", "category_doc_stats"):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN last_modified DATETIME")
+            cursor.execute(f"UPDATE {table} SET generation = 1, last_modified = datetime('now')")
+
+        for name in ("user_doc_stats_insert", "user_doc_stats_delete", "user_doc_stats_update",
+                     "category_doc_stats_insert", "category_doc_stats_delete", "category_doc_stats_update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        # 计数变化的同时推进 generation；用户的文档列表或分类的文档列表有任何变化都会改变 generation
+        bump = "generation = generation + 1, last_modified = datetime('now')"
+        cursor.execute(f"""
+            CREATE TRIGGER user_doc_stats_insert AFTER INSERT ON docs BEGIN
+                INSERT INTO user_doc_stats (uid, doc_count, generation, last_modified)
+                VALUES (new.uid, 1, 1, datetime('now'))
+                ON CONFLICT(uid) DO UPDATE SET doc_count = doc_count + 1, {bump};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER user_doc_stats_delete AFTER DELETE ON docs BEGIN
+                UPDATE user_doc_stats SET doc_count = doc_count - 1, {bump} WHERE uid = old.uid;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER user_doc_stats_update AFTER UPDATE OF uid ON docs
+            WHEN old.uid IS NOT new.uid BEGIN
+                UPDATE user_doc_stats SET doc_count = doc_count - 1, {bump} WHERE uid = old.uid;
+                INSERT INTO user_doc_stats (uid, doc_count, generation, last_modified)
+                VALUES (new.uid, 1, 1, datetime('now'))
+                ON CONFLICT(uid) DO UPDATE SET doc_count = doc_count + 1, {bump};
+            END
+        """)
+        # 修改文档（不换用户）时计数不变，只推进 generation
+        cursor.execute(f"""
+            CREATE TRIGGER user_doc_stats_touch AFTER UPDATE ON docs
+            WHEN old.uid IS new.uid BEGIN
+                UPDATE user_doc_stats SET {bump} WHERE uid = new.uid;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER category_doc_stats_insert AFTER INSERT ON categories_docs BEGIN
+                INSERT INTO category_doc_stats (category_id, doc_count, generation, last_modified)
+                VALUES (new.category_id, 1, 1, datetime('now'))
+                ON CONFLICT(category_id) DO UPDATE SET doc_count = doc_count + 1, {bump};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER category_doc_stats_delete AFTER DELETE ON categories_docs BEGIN
+                UPDATE category_doc_stats SET doc_count = doc_count - 1, {bump}
+                WHERE category_id = old.category_id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER category_doc_stats_update AFTER UPDATE OF category_id ON categories_docs
+            WHEN old.category_id IS NOT new.category_id BEGIN
+                UPDATE category_doc_stats SET doc_count = doc_count - 1, {bump}
+                WHERE category_id = old.category_id;
+                INSERT INTO category_doc_stats (category_id, doc_count, generation, last_modified)
+                VALUES (new.category_id, 1, 1, datetime('now'))
+                ON CONFLICT(category_id) DO UPDATE SET doc_count = doc_count + 1, {bump};
+            END
+        """)
+        # 分类下的文档被修改时，所在分类的文档列表也随之变化
+        cursor.execute(f"""
+            CREATE TRIGGER category_doc_stats_touch AFTER UPDATE ON docs BEGIN
+                UPDATE category_doc_stats SET {bump}
+                WHERE category_id IN (SELECT category_id FROM categories_docs WHERE doc_id = new.id);
+            END
+        """)
+
+    def _migrate_doc_trigrams(self, cursor):
+        """创建标题和标签的三元组倒排表 doc_trigrams 及同步触发器，并回填已有文档，用于模糊搜索"""
+        # 按 (trigram, uid) 查找命中文档，查询只读取关键词三元组各自的倒排列表
+        cursor.execute("""
+            CREATE TABLE doc_trigrams (
+                trigram TEXT NOT NULL,
+                uid INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (trigram, uid, doc_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX idx_doc_trigrams_doc ON doc_trigrams(doc_id)")
+        cursor.execute("""
+            CREATE TRIGGER doc_trigrams_insert AFTER INSERT ON docs BEGIN
+                INSERT OR IGNORE INTO doc_trigrams (trigram, uid, doc_id)
+                SELECT value, new.uid, new.id FROM json_each(notedocs_trigrams(new.title, new.tags));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER doc_trigrams_delete AFTER DELETE ON docs BEGIN
+                DELETE FROM doc_trigrams WHERE doc_id = old.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER doc_trigrams_update AFTER UPDATE OF uid, title, tags ON docs BEGIN
+                DELETE FROM doc_trigrams WHERE doc_id = old.id;
+                INSERT OR IGNORE INTO doc_trigrams (trigram, uid, doc_id)
+                SELECT value, new.uid, new.id FROM json_each(notedocs_trigrams(new.title, new.tags));
+            END
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO doc_trigrams (trigram, uid, doc_id)
+            SELECT t.value, d.uid, d.id FROM docs d, json_each(notedocs_trigrams(d.title, d.tags)) t
+        """)
+
+    def _migrate_doc_minhash(self, cursor):
+        """创建正文 MinHash 签名表 doc_minhash、分段哈希表 doc_minhash_bands 及同步触发器，并回填已有文档，用于近似重复检测"""
+        cursor.execute("""
+            CREATE TABLE doc_minhash (
+                doc_id INTEGER PRIMARY KEY,
+                uid INTEGER NOT NULL,
+                signature BLOB NOT NULL
+            )
+        """)
+        # 按 (uid, 段号, 段哈希) 查找候选，只读取同一用户、某一段相同的文档
+        cursor.execute("""
+            CREATE TABLE doc_minhash_bands (
+                uid INTEGER NOT NULL,
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                PRIMARY KEY (uid, band, value, doc_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX idx_doc_minhash_bands_doc ON doc_minhash_bands(doc_id)")
+
+        # 签名只由正文计算，随 docs_content 的写入、修改、删除同步；正文太短时没有签名
+        insert = """
+                INSERT INTO doc_minhash (doc_id, uid, signature)
+                SELECT new.doc_id, d.uid, sig
+                FROM docs d, (SELECT notedocs_minhash(new.codec, new.content) AS sig)
+                WHERE d.id = new.doc_id AND sig IS NOT NULL;
+                INSERT INTO doc_minhash_bands (uid, band, value, doc_id)
+                SELECT m.uid, b.key, b.value, m.doc_id
+                FROM doc_minhash m, json_each(notedocs_minhash_bands(m.signature)) b
+                WHERE m.doc_id = new.doc_id;"""
+        delete = """
+                DELETE FROM doc_minhash WHERE doc_id = old.doc_id;
+                DELETE FROM doc_minhash_bands WHERE doc_id = old.doc_id;"""
+        cursor.execute(f"""
+            CREATE TRIGGER doc_minhash_insert AFTER INSERT ON docs_content BEGIN{insert}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER doc_minhash_update AFTER UPDATE OF content, codec ON docs_content BEGIN{delete}{insert}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER doc_minhash_delete AFTER DELETE ON docs_content BEGIN{delete}
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER doc_minhash_uid AFTER UPDATE OF uid ON docs
+            WHEN old.uid IS NOT new.uid BEGIN
+                UPDATE doc_minhash SET uid = new.uid WHERE doc_id = new.id;
+                UPDATE doc_minhash_bands SET uid = new.uid WHERE doc_id = new.id;
+            END
+        """)
+        cursor.execute("""
+            INSERT INTO doc_minhash (doc_id, uid, signature)
+            SELECT doc_id, uid, sig FROM (
+                SELECT dc.doc_id, d.uid, notedocs_minhash(dc.codec, dc.content) AS sig
+                FROM docs_content dc INNER JOIN docs d ON d.id = dc.doc_id
+            ) WHERE sig IS NOT NULL
+        """)
+        cursor.execute("""
+            INSERT INTO doc_minhash_bands (uid, band, value, doc_id)
+            SELECT m.uid, b.key, b.value, m.doc_id
+            FROM doc_minhash m, json_each(notedocs_minhash_bands(m.signature)) b
+        """)
+
+    def _migrate_canonical_url(self, cursor):
+        """docs 增加规范化 URL 列 canonical_url 并回填，按 (uid, canonical_url) 建索引，用于判断页面是否已保存"""
+        cursor.execute("ALTER TABLE docs ADD COLUMN canonical_url TEXT")
+        cursor.execute("UPDATE docs SET canonical_url = notedocs_canonical_url(url)")
+        cursor.execute("CREATE INDEX idx_docs_uid_canonical_url ON docs(uid, canonical_url)")
+
+    def _migrate_docs_identity(self, cursor):
+        """docs 去掉 title 的全局唯一约束（重建表），同一用户的同一页面 (uid, canonical_url) 只保留最新一篇（其余存入 docs_merged_archive）并建唯一索引，增加正文摘要列 content_hash"""
+        # 重建前记下 docs 上的索引和触发器（自动索引 sqlite_autoindex_docs_1 即 UNIQUE(title) 没有 sql），重建后原样创建
+        cursor.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE tbl_name = 'docs' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+        """)
+        schema = [row["sql"] for row in cursor.fetchall() if row["name"] != "idx_docs_uid_canonical_url"]
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'docs'")
+        sequence = cursor.fetchone()
+
+        cursor.execute("""
+            CREATE TABLE docs_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                uid INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                content TEXT,  -- 已废弃，正文存放在 docs_content 表
+                source TEXT DEFAULT '',
+                favicon TEXT DEFAULT '',
+                tags TEXT DEFAULT '',
+                evaluate INTEGER DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                version INTEGER NOT NULL DEFAULT 1,
+                canonical_url TEXT,  -- 没有 URL 的文档为 NULL，不参与唯一约束
+                content_hash TEXT
+            )
+        """)
+        columns = ("id, uid, url, title, summary, content, source, favicon, tags, evaluate, "
+                   "created_at, updated_at, version, canonical_url")
+        cursor.execute(f"INSERT INTO docs_new ({columns}) SELECT {columns} FROM docs")
+        cursor.execute("DROP TABLE docs")
+        # docs_content 等表的触发器引用了 docs，改名时按旧规则处理，不检查这些触发器
+        cursor.execute("PRAGMA legacy_alter_table = ON")
+        cursor.execute("ALTER TABLE docs_new RENAME TO docs")
+        cursor.execute("PRAGMA legacy_alter_table = OFF")
+        for sql in schema:
+            cursor.execute(sql)
+        # 删除文档后 ID 不复用
+        if sequence is not None:
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('docs', 'docs_new')")
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('docs', ?)", (sequence["seq"],))
+
+        # 按当前的规范化规则重新计算 canonical_url：迁移 12 写入的值可能来自更激进的旧规则，会把不同的页面当成同一个
+        cursor.execute("UPDATE docs SET canonical_url = NULLIF(notedocs_canonical_url(url), '')")
+
+        # 同一用户同一页面的多篇文档保留最近更新的一篇，其余的分类关联转到保留的文档上，
+        # 文档本身连同正文和原来所在的分类存入 docs_merged_archive 后再删除，需要时可以找回
+        cursor.execute("""
+            CREATE TEMP TABLE merged_docs AS
+            SELECT id AS doc_id, keep_id FROM (
+                SELECT id, first_value(id) OVER (
+                    PARTITION BY uid, canonical_url ORDER BY updated_at DESC, id DESC
+                ) AS keep_id
+                FROM docs WHERE canonical_url IS NOT NULL
+            ) WHERE id <> keep_id
+        """)
+        cursor.execute("""
+            CREATE TABLE docs_merged_archive (
+                id INTEGER PRIMARY KEY,  -- 原文档ID
+                merged_into INTEGER NOT NULL,  -- 保留下来的文档ID
+                uid INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                source TEXT,
+                favicon TEXT,
+                tags TEXT,
+                evaluate INTEGER,
+                created_at DATETIME,
+                updated_at DATETIME,
+                version INTEGER,
+                canonical_url TEXT,
+                codec INTEGER,  -- 正文按 docs_content 中的编码原样保存
+                content,
+                category_ids TEXT NOT NULL DEFAULT '[]',  -- 原来所在分类的ID（JSON 数组）
+                archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO docs_merged_archive (id, merged_into, uid, url, title, summary, source, favicon, tags,
+                                             evaluate, created_at, updated_at, version, canonical_url, codec,
+                                             content, category_ids)
+            SELECT d.id, m.keep_id, d.uid, d.url, d.title, d.summary, d.source, d.favicon, d.tags, d.evaluate,
+                   d.created_at, d.updated_at, d.version, d.canonical_url, dc.codec, dc.content,
+                   (SELECT json_group_array(cd.category_id) FROM categories_docs cd WHERE cd.doc_id = d.id)
+            FROM merged_docs m
+            INNER JOIN docs d ON d.id = m.doc_id
+            LEFT JOIN docs_content dc ON dc.doc_id = d.id
+        """)
+        cursor.execute("SELECT doc_id, keep_id FROM merged_docs ORDER BY keep_id, doc_id")
+        merged = [f"{row['doc_id']}->{row['keep_id']}" for row in cursor.fetchall()]
+        if merged:
+            print(f"合并同一用户同一页面的文档 {len(merged)} 篇（原ID->保留的ID，已存入 docs_merged_archive）: "
+                  f"{', '.join(merged)}")
+        cursor.execute("""
+            INSERT OR IGNORE INTO categories_docs (category_id, doc_id)
+            SELECT cd.category_id, m.keep_id FROM categories_docs cd INNER JOIN merged_docs m ON m.doc_id = cd.doc_id
+        """)
+        # 外键约束已关闭，不会级联删除，关联行需要手动删除
+        cursor.execute("DELETE FROM categories_docs WHERE doc_id IN (SELECT doc_id FROM merged_docs)")
+        cursor.execute("DELETE FROM doc_tags WHERE doc_id IN (SELECT doc_id FROM merged_docs)")
+        cursor.execute("DELETE FROM docs WHERE id IN (SELECT doc_id FROM merged_docs)")
+        cursor.execute("DROP TABLE merged_docs")
+        cursor.execute("CREATE UNIQUE INDEX idx_docs_uid_canonical_url ON docs(uid, canonical_url)")
+
+        cursor.execute("""
+            UPDATE docs SET content_hash = (
+                SELECT notedocs_content_hash(codec, content) FROM docs_content WHERE doc_id = docs.id
+            )
+        """)
+
+    def _migrate_canonical_url_rules(self, cursor):
+        """按收窄后的规范化规则（from、scene 等只在特定网站上去掉，保留 #/ 路由）重新计算 canonical_url"""
+        # 新规则只会把原来相同的 URL 分开，不会让不同的 URL 变得相同，不会违反唯一索引
+        cursor.execute("""
+            UPDATE docs SET canonical_url = NULLIF(notedocs_canonical_url(url), '')
+            WHERE canonical_url IS NOT NULLIF(notedocs_canonical_url(url), '')
+        """)
+
+    def _rebuild_counters(self, cursor):
+        """按实际数据重建计数表，generation 只增不减，保证重建后不会出现用过的 ETag"""
+        bump = "generation = generation + 1, last_modified = datetime('now')"
+        cursor.execute(f"UPDATE user_doc_stats SET doc_count = 0, {bump}")
+        cursor.execute(f"""
+            INSERT INTO user_doc_stats (uid, doc_count, generation, last_modified)
+            SELECT uid, COUNT(*), 1, datetime('now') FROM docs WHERE true GROUP BY uid
+            ON CONFLICT(uid) DO UPDATE SET doc_count = excluded.doc_count
+        """)
+        cursor.execute(f"UPDATE category_doc_stats SET doc_count = 0, {bump}")
+        cursor.execute(f"""
+            INSERT INTO category_doc_stats (category_id, doc_count, generation, last_modified)
+            SELECT category_id, COUNT(*), 1, datetime('now') FROM categories_docs WHERE true GROUP BY category_id
+            ON CONFLICT(category_id) DO UPDATE SET doc_count = excluded.doc_count
+        """)
+
+    def _diff_counts(self, cursor, key: str, expected_sql: str, actual_sql: str) -> List[Dict]:
+        """比较实际计数与计数表，返回不一致的条目"""
+        cursor.execute(expected_sql)
+        expected = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.execute(actual_sql)
+        actual = {row[0]: row[1] for row in cursor.fetchall()}
+        return [
+            {key: k, "expected": expected.get(k, 0), "actual": actual.get(k, 0)}
+            for k in sorted(set(expected) | set(actual))
+            if expected.get(k, 0) != actual.get(k, 0)
+        ]
+
+    def check_counters(self, repair: bool = False) -> Dict[str, Any]:
+        """
+        核对计数表与实际数据是否一致，返回不一致的条目；repair 为 True 时重建计数表。
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # 在同一个快照中读取实际数据和计数；需要修复时直接持有写锁
+                cursor.execute("BEGIN IMMEDIATE" if repair else "BEGIN")
+                user_mismatches = self._diff_counts(
+                    cursor, "uid",
+                    "SELECT uid, COUNT(*) FROM docs GROUP BY uid",
+                    "SELECT uid, doc_count FROM user_doc_stats"
+                )
+                category_mismatches = self._diff_counts(
+                    cursor, "category_id",
+                    "SELECT category_id, COUNT(*) FROM categories_docs GROUP BY category_id",
+                    "SELECT category_id, doc_count FROM category_doc_stats"
+                )
+
+                repaired = False
+                if repair and (user_mismatches or category_mismatches):
+                    self._rebuild_counters(cursor)
+                    conn.commit()
+                    repaired = True
+                return {
+                    "consistent": not (user_mismatches or category_mismatches),
+                    "user_mismatches": user_mismatches,
+                    "category_mismatches": category_mismatches,
+                    "repaired": repaired
+                }
+        except Exception as e:
+            print(f"核对计数失败: {e}")
+            return {"consistent": False, "error": str(e)}
+
+    def recompress_content(self, batch_size: int = 200) -> Dict[str, Any]:
+        """
+        把编码与当前配置不同的正文重新编码，每批在一个事务中完成。
+
+        正文原文不变，全文索引不会被改动。返回处理的行数及前后占用的字节数。
+        """
+        result = {"rows": 0, "bytes_before": 0, "bytes_after": 0}
+        last_id = 0
+        try:
+            while True:
+                with self.get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        SELECT doc_id, codec, content FROM docs_content
+                        WHERE doc_id > ? AND content IS NOT NULL
+                        ORDER BY doc_id LIMIT ?
+                    """, (last_id, batch_size))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        return result
+
+                    updates = []
+                    for row in rows:
+                        last_id = row["doc_id"]
+                        codec, data = self._encode_content(compression.decode(row["codec"], row["content"]))
+                        if codec == row["codec"]:
+                            continue
+                        result["rows"] += 1
+                        result["bytes_before"] += len(row["content"]) if isinstance(row["content"], bytes) \
+                                                  else len(row["content"].encode("utf-8"))
+                        result["bytes_after"] += len(data) if isinstance(data, bytes) else len(data.encode("utf-8"))
+                        updates.append((codec, data, row["doc_id"]))
+                    cursor.executemany("UPDATE docs_content SET codec = ?, content = ? WHERE doc_id = ?", updates)
+                    conn.commit()
+        except Exception as e:
+            print(f"重新压缩正文失败: {e}")
+            result["error"] = str(e)
+            return result
+
+    def vacuum(self) -> bool:
+        """整理数据库文件，归还空闲页（会短暂独占数据库）"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute("VACUUM")
+                # WAL 模式下整理结果先写入 WAL，检查点之后主文件才会变小
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                return True
+        except Exception as e:
+            print(f"整理数据库失败: {e}")
+            return False
+
+    def _sync_doc_tags(self, cursor, doc_id: int, uid: int, tags: str):
+        """用 docs.tags 重写该文档在 doc_tags 中的标签（与文档写入在同一事务中）"""
+        cursor.execute("DELETE FROM doc_tags WHERE doc_id = ?", (doc_id,))
+        cursor.executemany(
+            "INSERT INTO doc_tags (doc_id, uid, tag) VALUES (?, ?, ?)",
+            [(doc_id, uid, tag) for tag in normalize_tags(tags)]
+        )
+
     def get_connection(self):
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 启用行工厂，方便访问列名
-        return conn
+        """从连接池借出连接，with 块结束时提交并归还"""
+        return self.pool.connection()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """获取连接池状态"""
+        return self.pool.stats()
+
+    def close(self):
+        """关闭连接池中的所有连接"""
+        self.pool.close_all()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取文档缓存状态"""
+        return self.doc_cache.stats()
+
+    def get_suggest_stats(self) -> Dict[str, Any]:
+        """获取输入提示索引状态"""
+        return self.suggest_index.stats()
+
+    def suggest(self, uid: int, prefix: str, limit: int = 10) -> Dict[str, List]:
+        """按前缀提示该用户的文档标题和标签，从内存索引中查找"""
+        return self.suggest_index.lookup(uid, prefix, limit)
+
+    def _load_suggest_docs(self, uid: int) -> List[tuple]:
+        """输入提示索引首次查询某个用户时加载其所有文档的 (title, tags)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT title, tags FROM docs WHERE uid = ?", (uid,))
+            return [(row["title"], row["tags"]) for row in cursor.fetchall()]
+
+    def get_related_stats(self) -> Dict[str, Any]:
+        """获取相关文档索引状态"""
+        return self.related_index.stats()
+
+    def get_related_documents(self, doc_id: int, limit: int = 10) -> Optional[List[Dict]]:
+        """
+        同一用户的文档中与该文档内容最相似的 limit 篇（TF-IDF 余弦相似度），
+        按相似度 score 从高到低排列；文档不存在时返回 None。
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT uid FROM docs WHERE id = ?", (doc_id,))
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            similar = self.related_index.similar(row["uid"], doc_id, limit)
+            if not similar:
+                return []
+
+            scores = dict(similar)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                placeholders = ", ".join("?" for _ in scores)
+                cursor.execute(f"""
+                    SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, created_at, updated_at
+                    FROM docs WHERE id IN ({placeholders})
+                """, list(scores))
+                docs = [dict(row, score=round(scores[row["id"]], 4)) for row in cursor.fetchall()]
+            return sorted(docs, key=lambda doc: scores[doc["id"]], reverse=True)
+        except Exception as e:
+            print(f"获取相关文档失败: {e}")
+            return []
+
+    def _load_related_docs(self, uid: int) -> List[Dict]:
+        """相关文档索引首次查询某个用户时加载其所有文档，正文只解压前 content_chars 个字符"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT d.id, d.title, d.summary, d.tags, notedocs_preview(dc.codec, dc.content, ?) AS content
+                FROM docs d LEFT JOIN docs_content dc ON dc.doc_id = d.id
+                WHERE d.uid = ?
+            """, (RELATED_CONFIG['content_chars'], uid))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _duplicate_pairs_sql(self, where: str) -> str:
+        """
+        至少有一段签名相同、且估计相似度不低于阈值的文档对 (a, b, similarity)。
+
+        候选由 doc_minhash_bands 按 (uid, band, value) 等值连接得到；where 限定 a 侧的文档。
+        """
+        return f"""
+            SELECT p.a, p.b, notedocs_similarity(ma.signature, mb.signature) AS similarity
+            FROM (
+                SELECT DISTINCT a.doc_id AS a, b.doc_id AS b
+                FROM doc_minhash_bands a INNER JOIN doc_minhash_bands b
+                    ON b.uid = a.uid AND b.band = a.band AND b.value = a.value AND b.doc_id != a.doc_id
+                WHERE {where}
+            ) p
+            INNER JOIN doc_minhash ma ON ma.doc_id = p.a
+            INNER JOIN doc_minhash mb ON mb.doc_id = p.b
+            WHERE similarity >= ?
+        """
+
+    def get_duplicate_ids(self, doc_ids: List[int], min_similarity: Optional[float] = None) -> Dict[int, List[int]]:
+        """这些文档各自的近似重复文档ID（同一用户、估计相似度不低于 min_similarity），用于写入时标记"""
+        if not doc_ids:
+            return {}
+        if min_similarity is None:
+            min_similarity = DUPLICATE_CONFIG['min_similarity']
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                placeholders = ", ".join("?" for _ in doc_ids)
+                cursor.execute(self._duplicate_pairs_sql(f"a.doc_id IN ({placeholders})") + " ORDER BY a, b",
+                               list(doc_ids) + [min_similarity])
+                duplicates = {doc_id: [] for doc_id in doc_ids}
+                for row in cursor.fetchall():
+                    duplicates[row["a"]].append(row["b"])
+                return duplicates
+        except Exception as e:
+            print(f"查找近似重复文档失败: {e}")
+            return {}
+
+    def find_duplicates(self, doc_id: int, min_similarity: Optional[float] = None) -> Optional[List[Dict]]:
+        """
+        与该文档正文近似重复的同一用户的文档，按估计的相似度 similarity 从高到低排列；
+        文档不存在时返回 None，正文太短（没有签名）时返回空列表。
+        """
+        if min_similarity is None:
+            min_similarity = DUPLICATE_CONFIG['min_similarity']
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1 FROM docs WHERE id = ?", (doc_id,))
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute(f"""
+                    SELECT d.id, d.uid, d.url, d.title, d.summary, d.source, d.favicon, d.tags, d.evaluate,
+                           d.created_at, d.updated_at, p.similarity
+                    FROM ({self._duplicate_pairs_sql("a.doc_id = ?")}) p INNER JOIN docs d ON d.id = p.b
+                    ORDER BY p.similarity DESC, d.id
+                """, [doc_id, min_similarity])
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查找近似重复文档失败: {e}")
+            return []
+
+    def get_duplicate_clusters(self, uid: int, limit: int = 50,
+                               min_similarity: Optional[float] = None) -> List[Dict]:
+        """
+        某个用户的近似重复文档分组：估计相似度不低于 min_similarity 的文档连成一组（传递闭包），
+        按组内文档数从多到少返回前 limit 组，组内按ID排列。
+        """
+        if min_similarity is None:
+            min_similarity = DUPLICATE_CONFIG['min_similarity']
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # 每对只取一次（a < b）
+                cursor.execute(self._duplicate_pairs_sql("a.uid = ? AND b.doc_id > a.doc_id"),
+                               [uid, min_similarity])
+                parent: Dict[int, int] = {}
+
+                def find(doc_id: int) -> int:
+                    root = doc_id
+                    while parent.get(root, root) != root:
+                        root = parent[root]
+                    while doc_id != root:
+                        parent[doc_id], doc_id = root, parent[doc_id]
+                    return root
+
+                for row in cursor.fetchall():
+                    parent.setdefault(row["a"], row["a"])
+                    parent.setdefault(row["b"], row["b"])
+                    a, b = find(row["a"]), find(row["b"])
+                    if a != b:
+                        parent[max(a, b)] = min(a, b)
+
+                groups: Dict[int, List[int]] = {}
+                for doc_id in parent:
+                    groups.setdefault(find(doc_id), []).append(doc_id)
+                clusters = sorted((sorted(ids) for ids in groups.values()), key=lambda ids: (-len(ids), ids[0]))[:limit]
+                if not clusters:
+                    return []
+
+                ids = [doc_id for cluster in clusters for doc_id in cluster]
+                placeholders = ", ".join("?" for _ in ids)
+                cursor.execute(f"""
+                    SELECT id, url, title, tags, evaluate, created_at, updated_at
+                    FROM docs WHERE id IN ({placeholders})
+                """, ids)
+                docs = {row["id"]: dict(row) for row in cursor.fetchall()}
+                return [{"size": len(cluster), "documents": [docs[doc_id] for doc_id in cluster if doc_id in docs]}
+                        for cluster in clusters]
+        except Exception as e:
+            print(f"获取近似重复文档分组失败: {e}")
+            return []
+
+    def get_url_filter_stats(self) -> Dict[str, Any]:
+        """获取已保存 URL 过滤器状态"""
+        return self.url_filter.stats()
+
+    def find_document_by_url(self, uid: int, url: str) -> Optional[Dict]:
+        """
+        该用户保存过的、规范化 URL 与 url 相同的文档（同一用户的同一页面只有一篇），没有时返回 None。
+
+        先查布隆过滤器，一定没有保存过时不查询数据库。
+        """
+        canonical_url = canonicalize_url(url)
+        if not self.url_filter.might_contain(uid, canonical_url):
+            return None
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, uid, url, title, updated_at FROM docs
+                    WHERE uid = ? AND canonical_url = ?
+                """, (uid, canonical_url))
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"按URL查找文档失败: {e}")
+            return None
+
+    def _load_doc_urls(self, uid: int) -> List[str]:
+        """URL 过滤器首次查询某个用户时加载其所有文档的规范化 URL"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT canonical_url FROM docs WHERE uid = ?", (uid,))
+            return [row[0] for row in cursor.fetchall() if row[0] is not None]
+
+    def _invalidate_docs(self, doc_ids) -> None:
+        """事务提交后让这些文档的缓存失效"""
+        self.doc_cache.invalidate(*doc_ids)
+
+    def add_doc_listener(self, listener: Callable[[List[Dict], List[Dict]], None]) -> None:
+        """
+        注册文档变更监听器，写操作提交后调用 listener(removed, added)。
+
+        removed 为被删除、被替换或修改前的文档 {"id", "uid", "title", "tags"}，
+        added 为写入或修改后的文档，另有 "url"、"summary" 和 "content"。监听器出错不影响写操作。
+        """
+        self._doc_listeners.append(listener)
+
+    def _docs_changed(self, removed: List[Dict], added: List[Dict]) -> None:
+        """事务提交后让变更文档的缓存失效，并通知监听器"""
+        self._invalidate_docs({doc["id"] for doc in removed} | {doc["id"] for doc in added})
+        for listener in self._doc_listeners:
+            try:
+                listener(removed, added)
+            except Exception as e:
+                print(f"文档变更监听器出错: {e}")
+
+    def _docs_by_titles(self, cursor, titles: List[str]) -> List[Dict]:
+        """按标题查文档，按标题删除前用它取得被删除的文档"""
+        placeholders = ", ".join("?" for _ in titles)
+        cursor.execute(f"SELECT id, uid, title, tags FROM docs WHERE title IN ({placeholders})", titles)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def _docs_by_ids(self, cursor, doc_ids: List[int]) -> List[Dict]:
+        """按ID查文档，修改和删除前用它取得变更前的文档"""
+        placeholders = ", ".join("?" for _ in doc_ids)
+        cursor.execute(f"SELECT id, uid, title, tags FROM docs WHERE id IN ({placeholders})", doc_ids)
+        return [dict(row) for row in cursor.fetchall()]
     
     def write_document(self, uid: int, url: str, title: str, summary: str, content: str, 
-                      source: str = '', favicon: str = '', tags: str = '', evaluate: int = 0) -> bool:
-        """写入文档"""
+                      source: str = '', favicon: str = '', tags: str = '', evaluate: int = 0) -> Optional[int]:
+        """
+        写入文档，成功时返回文档ID，失败返回 None。
+
+        该用户已保存过同一页面（规范化 URL 相同）时原地更新这篇文档，ID 不变；内容完全相同时不写入。
+        """
         try:
             print(f"写入文档: {title}")
+            row = self._doc_row(uid, url, title, summary, source, favicon, tags, evaluate, content)
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO docs (uid, url, title, summary, content, source, favicon, tags, evaluate, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                """, (uid, url, title, summary, content, source, favicon, tags, evaluate))
+                # 查询已有文档和写入在同一个写事务中，比较结果不会被并发写入打破
+                cursor.execute("BEGIN IMMEDIATE")
+                doc_id, previous, changed = self._upsert_doc(cursor, row, content)
                 conn.commit()
-                return True
+                if changed:
+                    self._docs_changed(previous, [self._written_doc(doc_id, row, content)])
+                return doc_id
         except Exception as e:
             print(f"写入文档失败: {e}")
-            return False
+            return None
+
+    # 正文单独写入 docs_content，docs 行只存元数据；canonical_url 由第 2 个参数 url 生成，没有 URL 时为 NULL。
+    # 同一用户的同一页面按 (uid, canonical_url) 原地更新，各列和正文摘要都没变时不更新。
+    # 批量写入用 executemany 执行；单篇写入在末尾加 RETURNING id，没有写入时不返回行
+    _UPSERT_DOC_SQL = """
+        INSERT INTO docs (uid, url, title, summary, source, favicon, tags, evaluate, content_hash, updated_at,
+                          canonical_url)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), NULLIF(notedocs_canonical_url(?2), ''))
+        ON CONFLICT(uid, canonical_url) DO UPDATE SET
+            url = excluded.url, title = excluded.title, summary = excluded.summary, source = excluded.source,
+            favicon = excluded.favicon, tags = excluded.tags, evaluate = excluded.evaluate,
+            content_hash = excluded.content_hash, updated_at = excluded.updated_at, version = version + 1
+        WHERE (url, title, summary, source, favicon, tags, evaluate, content_hash)
+              IS NOT (excluded.url, excluded.title, excluded.summary, excluded.source, excluded.favicon,
+                      excluded.tags, excluded.evaluate, excluded.content_hash)
+    """
+
+    # 写入前按 (uid, canonical_url) 一次查出一批文档中已有的文档，参数为 [[uid, canonical_url], ...] 的 JSON
+    _SELECT_DOCS_BY_KEYS_SQL = """
+        SELECT d.id, d.uid, d.canonical_url, d.url, d.title, d.summary, d.source, d.favicon, d.tags, d.evaluate,
+               d.content_hash
+        FROM json_each(?) k
+        INNER JOIN docs d ON d.uid = json_extract(k.value, '$[0]') AND d.canonical_url = json_extract(k.value, '$[1]')
+    """
+
+    def _doc_row(self, uid: int, url: str, title: str, summary: str, source: str, favicon: str,
+                 tags: str, evaluate: int, content: str) -> tuple:
+        """_UPSERT_DOC_SQL 的参数"""
+        return (uid, url, title, summary, source, favicon, tags, evaluate, compression.content_hash(content))
+
+    def _upsert_doc(self, cursor, row: tuple, content: str) -> tuple:
+        """
+        按 _UPSERT_DOC_SQL 写入一篇文档，返回 (文档ID, 更新前的文档列表, 是否有变化)。
+
+        调用方需要先用 BEGIN IMMEDIATE 开始写事务，保证查到的已有文档就是被更新的那一篇。
+        更新已有文档时，正文摘要没变不重写 docs_content，标签没变不重建 doc_tags。
+        """
+        previous = None
+        canonical_url = canonicalize_url(row[1])
+        if canonical_url:
+            cursor.execute("""
+                SELECT id, uid, title, tags, content_hash FROM docs WHERE uid = ? AND canonical_url = ?
+            """, (row[0], canonical_url))
+            previous = cursor.fetchone()
+        cursor.execute(self._UPSERT_DOC_SQL + " RETURNING id", row)
+        written = cursor.fetchone()
+        if written is None:
+            # 与已有文档完全相同，没有写入；不依赖写入前查到的 previous，按唯一键重新取ID
+            cursor.execute("SELECT id FROM docs WHERE uid = ? AND canonical_url = ?", (row[0], canonical_url))
+            return cursor.fetchone()["id"], [], False
+
+        doc_id = written["id"]
+        if previous is None or previous["content_hash"] != row[8]:
+            self._write_doc_content(cursor, doc_id, content)
+        if previous is None or previous["tags"] != row[6]:
+            self._sync_doc_tags(cursor, doc_id, row[0], row[6])
+        if previous is None:
+            return doc_id, [], True
+        return doc_id, [{"id": previous["id"], "uid": previous["uid"], "title": previous["title"],
+                         "tags": previous["tags"]}], True
+
+    def _encode_content(self, content: Optional[str]) -> tuple:
+        """按配置压缩正文，返回 (codec, 存储值)"""
+        return compression.encode(content, self.content_codec,
+                                  self.compression_level, self.compression_min_size)
+
+    _UPSERT_CONTENT_SQL = """
+        INSERT INTO docs_content (doc_id, codec, content) VALUES (?, ?, ?)
+        ON CONFLICT(doc_id) DO UPDATE SET codec = excluded.codec, content = excluded.content
+    """
+
+    def _write_doc_content(self, cursor, doc_id: int, content: str):
+        """写入或更新文档正文（按配置压缩）"""
+        cursor.execute(self._UPSERT_CONTENT_SQL, (doc_id, *self._encode_content(content)))
     
+    def write_documents(self, documents: List[Dict], chunk_size: int = 500) -> List[Dict]:
+        """
+        批量写入文档，每 chunk_size 篇在一个事务中用 executemany 写入，与 write_document 一样按 (uid, 规范化 URL) 更新已有文档。
+
+        返回与输入一一对应的结果 {"index", "title", "success", "id", "changed", "error"}，
+        changed 为 False 表示已有完全相同的文档，没有写入。
+        某个分块整体写入失败时，该分块退回逐篇写入，只有出错的文档标记为失败。
+        """
+        results = [{"index": i, "title": doc.get("title", ""), "success": False, "id": None, "changed": False,
+                    "error": None}
+                   for i, doc in enumerate(documents)]
+        rows = []
+        for i, doc in enumerate(documents):
+            if not doc.get("title"):
+                results[i]["error"] = "title 不能为空"
+                continue
+            content = doc.get("content", "")
+            rows.append((i, self._doc_row(doc["uid"], doc.get("url", ""), doc["title"], doc.get("summary", ""),
+                                          doc.get("source", ""), doc.get("favicon", ""),
+                                          doc.get("tags", ""), doc.get("evaluate", 0), content),
+                         content))
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                self._write_documents_chunk(chunk, results)
+            except Exception as e:
+                print(f"批量写入分块失败，改为逐篇写入: {e}")
+                self._write_documents_one_by_one(chunk, results)
+        return results
+
+    def _write_documents_chunk(self, chunk: List[tuple], results: List[Dict]):
+        """
+        一个分块在一个事务中写入，任一文档失败则整个分块回滚并抛出异常。
+
+        先一次查出分块中已有的文档，在 Python 中比较出有变化的文档，再用 executemany 写入 docs、docs_content，
+        没有变化的文档不写入。同一批中同一用户的同一页面出现多次时以最后一篇为准，这几项结果的ID和 changed 相同。
+        没有 URL 的文档没有唯一键，逐篇插入。
+        """
+        keys = [(row[0], canonicalize_url(row[1])) for _, row, _ in chunk]
+        latest = {key: pos for pos, key in enumerate(keys) if key[1]}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            existing = self._select_docs_by_keys(cursor, list(latest))
+            changed = [pos for key, pos in latest.items()
+                       if key not in existing or self._doc_values(existing[key]) != chunk[pos][1][1:]]
+            cursor.executemany(self._UPSERT_DOC_SQL, [chunk[pos][1] for pos in changed])
+
+            ids = {key: previous["id"] for key, previous in existing.items()}
+            created = [key for key in latest if key not in existing]
+            ids.update((key, written["id"]) for key, written in self._select_docs_by_keys(cursor, created).items())
+            doc_ids = {pos: ids[key] for key, pos in latest.items()}
+            for pos, key in enumerate(keys):
+                if not key[1]:
+                    cursor.execute(self._UPSERT_DOC_SQL + " RETURNING id", chunk[pos][1])
+                    doc_ids[pos] = cursor.fetchone()["id"]
+                    changed.append(pos)
+
+            content_rows, removed, added = [], {}, {}
+            for pos in changed:
+                _, row, content = chunk[pos]
+                previous = existing.get(keys[pos])
+                if previous is None or previous["content_hash"] != row[8]:
+                    content_rows.append((doc_ids[pos], *self._encode_content(content)))
+                if previous is None or previous["tags"] != row[6]:
+                    self._sync_doc_tags(cursor, doc_ids[pos], row[0], row[6])
+                old = [] if previous is None else [{"id": previous["id"], "uid": previous["uid"],
+                                                   "title": previous["title"], "tags": previous["tags"]}]
+                self._collect_written(removed, added, old, self._written_doc(doc_ids[pos], row, content))
+            cursor.executemany(self._UPSERT_CONTENT_SQL, content_rows)
+            conn.commit()
+            if added:
+                self._docs_changed(list(removed.values()), list(added.values()))
+
+        changed = set(changed)
+        for pos, (index, _, _) in enumerate(chunk):
+            final = latest.get(keys[pos], pos)
+            results[index].update(success=True, id=doc_ids[final], changed=final in changed)
+
+    def _select_docs_by_keys(self, cursor, keys: List[tuple]) -> Dict[tuple, sqlite3.Row]:
+        """按 (uid, canonical_url) 查出已有的文档，返回 {(uid, canonical_url): 行}"""
+        if not keys:
+            return {}
+        cursor.execute(self._SELECT_DOCS_BY_KEYS_SQL, (json.dumps(keys),))
+        return {(row["uid"], row["canonical_url"]): row for row in cursor.fetchall()}
+
+    def _doc_values(self, row: sqlite3.Row) -> tuple:
+        """已有文档中与 _UPSERT_DOC_SQL 参数（uid 之后）对应的各列，用于判断文档是否有变化"""
+        return (row["url"], row["title"], row["summary"], row["source"], row["favicon"], row["tags"],
+                row["evaluate"], row["content_hash"])
+
+    def _write_documents_one_by_one(self, chunk: List[tuple], results: List[Dict]):
+        """逐篇写入一个分块，每篇使用独立的保存点"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            removed, added = {}, {}
+            for index, row, content in chunk:
+                cursor.execute("SAVEPOINT batch_item")
+                try:
+                    doc_id, previous, changed = self._upsert_doc(cursor, row, content)
+                    cursor.execute("RELEASE SAVEPOINT batch_item")
+                    results[index].update(success=True, id=doc_id, changed=changed)
+                    if changed:
+                        self._collect_written(removed, added, previous, self._written_doc(doc_id, row, content))
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT batch_item")
+                    cursor.execute("RELEASE SAVEPOINT batch_item")
+                    results[index]["error"] = str(e)
+            conn.commit()
+            if added:
+                self._docs_changed(list(removed.values()), list(added.values()))
+
+    def _collect_written(self, removed: Dict[int, Dict], added: Dict[int, Dict], previous: List[Dict],
+                         doc: Dict):
+        """汇总批量写入要通知监听器的文档：同一批中先新增后更新的文档，修改前的版本对监听器来说从未存在过"""
+        for old in previous:
+            if old["id"] not in added:
+                removed[old["id"]] = old
+        added[doc["id"]] = doc
+
+    def _written_doc(self, doc_id: int, row: tuple, content: str) -> Dict:
+        """写入的一行（_UPSERT_DOC_SQL 的参数）转换为通知监听器的文档"""
+        return {"id": doc_id, "uid": row[0], "url": row[1], "title": row[2], "summary": row[3],
+                "content": content, "tags": row[6]}
+
     def read_document(self, title: str) -> Optional[Dict]:
-        """读取文档"""
+        """按标题读取文档（标题不唯一，有多篇时取最新写入的一篇）"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT id, uid, url, title, summary, content, source, favicon, tags, evaluate, created_at, updated_at
-                    FROM docs WHERE title = ?
+                    SELECT d.id, d.uid, d.url, d.title, d.summary, dc.codec, dc.content, d.source, d.favicon,
+                           d.tags, d.evaluate, d.version, d.created_at, d.updated_at
+                    FROM docs d LEFT JOIN docs_content dc ON dc.doc_id = d.id
+                    WHERE d.title = ?
+                    ORDER BY d.id DESC LIMIT 1
                 """, (title,))
                 row = cursor.fetchone()
                 
@@ -117,11 +1467,12 @@ class NotedocsDB:
                         "url": row["url"],
                         "title": row["title"],
                         "summary": row["summary"],
-                        "content": row["content"],
+                        "content": compression.decode(row["codec"], row["content"]),
                         "source": row["source"],
                         "favicon": row["favicon"],
                         "tags": row["tags"],
                         "evaluate": row["evaluate"],
+                        "version": row["version"],
                         "created_at": row["created_at"],
                         "updated_at": row["updated_at"]
                     }
@@ -130,109 +1481,214 @@ class NotedocsDB:
             print(f"读取文档失败: {e}")
             return None
     
-    def update_document_by_id(self, doc_id: int, uid: int, url: str, title: str, summary: str, 
-                             content: str, source: str = '', favicon: str = '', tags: str = '', evaluate: int = 0) -> bool:
-        """根据ID更新文档"""
-        print(f"更新文档ID: {doc_id}")
-        
+    # patch_document 可以修改的字段
+    PATCHABLE_FIELDS = ("uid", "url", "title", "summary", "content", "source", "favicon", "tags", "evaluate")
+    # 文档变更监听器用到的字段，只修改其他字段（如评分）时不通知监听器
+    _LISTENED_FIELDS = frozenset({"uid", "url", "title", "summary", "content", "tags"})
+
+    def patch_document(self, doc_id: int, changes: Dict[str, Any],
+                       expected_versions: Optional[List[int]] = None) -> Optional[Dict]:
+        """
+        部分更新文档：只把 changes 中与当前值不同的字段写进一条 UPDATE，都相同时不写入。
+        没有给出正文或正文摘要没变时不读取、不重写 docs_content。
+
+        expected_versions 不为 None 时，文档当前的版本号必须在其中（If-Match）。
+        返回 {"status", "version", "updated_at"}，status 为 updated、unchanged、not_found、
+        precondition_failed 或 conflict（该用户已有同一页面的另一篇文档）；出错返回 None。
+        """
+        unknown = set(changes) - set(self.PATCHABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"不支持修改的字段: {', '.join(sorted(unknown))}")
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                # 读取当前值和写入在同一个写事务中，比较结果不会被并发修改打破
+                cursor.execute("BEGIN IMMEDIATE")
                 cursor.execute("""
-                    UPDATE docs SET 
-                    uid = ?, url = ?, title = ?, summary = ?, content = ?, 
-                    source = ?, favicon = ?, tags = ?, evaluate = ?, updated_at = datetime('now')
-                    WHERE id = ?
-                """, (uid, url, title, summary, content, source, favicon, tags, evaluate, doc_id))
-                
+                    SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, content_hash,
+                           version, updated_at
+                    FROM docs WHERE id = ?
+                """, (doc_id,))
+                current = cursor.fetchone()
+                if current is None:
+                    return {"status": "not_found", "version": None, "updated_at": None}
+                result = {"version": current["version"], "updated_at": current["updated_at"]}
+                if expected_versions is not None and current["version"] not in expected_versions:
+                    return dict(result, status="precondition_failed")
+
+                columns = {name: value for name, value in changes.items() if name != "content"}
+                if "content" in changes:
+                    columns["content_hash"] = compression.content_hash(changes["content"])
+                columns = {name: value for name, value in columns.items() if current[name] != value}
+                if not columns:
+                    return dict(result, status="unchanged")
+
+                assignments = [f"{name} = ?" for name in columns]
+                params = list(columns.values())
+                if "url" in columns:
+                    assignments.append("canonical_url = NULLIF(notedocs_canonical_url(?), '')")
+                    params.append(columns["url"])
+                try:
+                    cursor.execute(f"""
+                        UPDATE docs SET {', '.join(assignments)}, updated_at = datetime('now'), version = version + 1
+                        WHERE id = ?
+                        RETURNING uid, url, title, summary, tags, version, updated_at
+                    """, params + [doc_id])
+                except sqlite3.IntegrityError:
+                    return dict(result, status="conflict")
+                row = cursor.fetchone()
+                if "content_hash" in columns:
+                    self._write_doc_content(cursor, doc_id, changes["content"])
+                if "uid" in columns or "tags" in columns:
+                    self._sync_doc_tags(cursor, doc_id, row["uid"], row["tags"])
+
+                added = None
+                changed_fields = {"content" if name == "content_hash" else name for name in columns}
+                if changed_fields & self._LISTENED_FIELDS:
+                    content = changes.get("content")
+                    if "content" not in changes:
+                        cursor.execute("SELECT notedocs_decode(codec, content) FROM docs_content WHERE doc_id = ?",
+                                       (doc_id,))
+                        stored = cursor.fetchone()
+                        content = stored[0] if stored else None
+                    added = {"id": doc_id, "uid": row["uid"], "url": row["url"], "title": row["title"],
+                             "summary": row["summary"], "content": content, "tags": row["tags"]}
                 conn.commit()
-                affected_rows = cursor.rowcount
-                print(f"影响的行数: {affected_rows}")
-                
-                return affected_rows > 0
+
+                if added is not None:
+                    self._docs_changed([{"id": doc_id, "uid": current["uid"], "title": current["title"],
+                                         "tags": current["tags"]}], [added])
+                else:
+                    self._invalidate_docs([doc_id])
+                return {"status": "updated", "version": row["version"], "updated_at": row["updated_at"]}
         except Exception as e:
-            print(f"更新文档失败: {e}")
-            return False
+            print(f"部分更新文档失败: {e}")
+            return None
 
     def read_document_by_id(self, doc_id: int) -> Optional[Dict]:
-        """根据ID读取文档"""
+        """根据ID读取文档（正文从 docs_content 读取），结果经 LRU 缓存"""
+        cached = self.doc_cache.get(doc_id)
+        if cached is not None:
+            return dict(cached)
+        generation = self.doc_cache.generation
+
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT id, uid, url, title, summary, content, source, favicon, tags, evaluate, created_at, updated_at
-                    FROM docs WHERE id = ?
+                    SELECT d.id, d.uid, d.url, d.title, d.summary, dc.codec, dc.content, d.source, d.favicon,
+                           d.tags, d.evaluate, d.version, d.created_at, d.updated_at
+                    FROM docs d LEFT JOIN docs_content dc ON dc.doc_id = d.id
+                    WHERE d.id = ?
                 """, (doc_id,))
                 row = cursor.fetchone()
                 
                 if row:
-                    return {
+                    doc = {
                         "id": row["id"],
                         "uid": row["uid"],
                         "url": row["url"],
                         "title": row["title"],
                         "summary": row["summary"],
-                        "content": row["content"],
+                        "content": compression.decode(row["codec"], row["content"]),
                         "source": row["source"],
                         "favicon": row["favicon"],
                         "tags": row["tags"],
                         "evaluate": row["evaluate"],
+                        "version": row["version"],
                         "created_at": row["created_at"],
                         "updated_at": row["updated_at"]
                     }
+                    self.doc_cache.put(doc_id, doc, generation)
+                    return dict(doc)
                 return None
         except Exception as e:
             print(f"读取文档失败: {e}")
             return None
     
-    def list_documents(self, uid: Optional[int] = None, limit: int = 100, offset: int = 0) -> List[Dict]:
-        """列出文档（支持分页和用户过滤）"""
+    def get_document_validator(self, doc_id: int) -> Optional[Dict]:
+        """获取文档的缓存校验信息（主键查询），用于 ETag / Last-Modified，文档不存在返回 None"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT version, updated_at FROM docs WHERE id = ?", (doc_id,))
+                row = cursor.fetchone()
+                return {"version": row["version"], "updated_at": row["updated_at"]} if row else None
+        except Exception as e:
+            print(f"读取文档版本失败: {e}")
+            return None
+
+    def get_documents_validator(self, uid: Optional[int] = None) -> Optional[Dict]:
+        """获取文档列表的缓存校验信息（计数表中的 generation），不指定用户时汇总所有用户"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                
                 if uid is not None:
                     cursor.execute("""
-                        SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, created_at, updated_at
-                        FROM docs WHERE uid = ? 
-                        ORDER BY updated_at DESC 
-                        LIMIT ? OFFSET ?
-                    """, (uid, limit, offset))
+                        SELECT generation, last_modified FROM user_doc_stats WHERE uid = ?
+                    """, (uid,))
                 else:
                     cursor.execute("""
-                        SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, created_at, updated_at
-                        FROM docs 
-                        ORDER BY updated_at DESC 
-                        LIMIT ? OFFSET ?
-                    """, (limit, offset))
+                        SELECT COALESCE(SUM(generation), 0) AS generation, MAX(last_modified) AS last_modified
+                        FROM user_doc_stats
+                    """)
+                row = cursor.fetchone()
+                if row is None:
+                    return {"generation": 0, "last_modified": None}
+                return {"generation": row["generation"], "last_modified": row["last_modified"]}
+        except Exception as e:
+            print(f"读取文档列表版本失败: {e}")
+            return None
+
+    def list_documents(self, uid: Optional[int] = None, limit: int = 100, offset: int = 0,
+                       after: Optional[List] = None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        列出文档（支持分页和用户过滤），after 为上一页最后一行的 (updated_at, id)，传入时忽略 offset。
+
+        fields 为需要返回的字段，None 表示全部；id 和排序键总会返回。
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                columns = project(fields, DOC_LIST_FIELDS, ("updated_at", "id"))
+                where, params = [], []
+                if uid is not None:
+                    where.append("uid = ?")
+                    params.append(uid)
+                if after is not None:
+                    where.append("(updated_at, id) < (?, ?)")
+                    params.extend(after)
+                    offset = 0
+                where_sql = f"WHERE {' AND '.join(where)}" if where else ""
                 
-                results = []
-                for row in cursor.fetchall():
-                    results.append({
-                        "id": row["id"],
-                        "uid": row["uid"],
-                        "url": row["url"],
-                        "title": row["title"],
-                        "summary": row["summary"],
-                        "source": row["source"],
-                        "favicon": row["favicon"],
-                        "tags": row["tags"],
-                        "evaluate": row["evaluate"],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"]
-                    })
-                return results
+                cursor.execute(f"""
+                    SELECT {self._doc_columns(columns)}
+                    FROM docs {where_sql}
+                    ORDER BY updated_at DESC, id DESC
+                    LIMIT ? OFFSET ?
+                """, params + [limit, offset])
+                return [self._row_to_doc(row, columns) for row in cursor.fetchall()]
         except Exception as e:
             print(f"列出文档失败: {e}")
             return []
+
+    def _doc_columns(self, columns: List[str], prefix: str = "") -> str:
+        """投影字段对应的 SELECT 列（正文预览 content、摘要 snippet 和排序分 score 由调用方单独处理）"""
+        return ", ".join(prefix + name for name in columns if name not in DOC_COMPUTED_FIELDS)
+
+    def _row_to_doc(self, row, columns: List[str]) -> Dict:
+        """按投影字段把查询行转换为字典"""
+        return {name: row[name] for name in columns}
     
     def delete_document(self, title: str) -> bool:
-        """删除文档"""
+        """按标题删除文档（标题不唯一，删除所有同标题的文档）"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                removed = self._docs_by_titles(cursor, [title])
                 cursor.execute("DELETE FROM docs WHERE title = ?", (title,))
                 conn.commit()
+                self._docs_changed(removed, [])
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"删除文档失败: {e}")
@@ -243,117 +1699,258 @@ class NotedocsDB:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                removed = self._docs_by_ids(cursor, [doc_id])
                 cursor.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
                 conn.commit()
+                self._docs_changed(removed, [])
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"删除文档失败: {e}")
             return False
     
+    def _docs_filters(self, uid: Optional[int], after: Optional[List],
+                      sort_keys: tuple, prefix: str = "") -> tuple:
+        """
+        生成追加在 WHERE 之后的 uid 过滤和游标条件（以 AND 开头）及其参数。
+        排序键全部按降序排列，所以下一页是排序键整体小于上一页最后一行的行。
+        """
+        filters, params = [], []
+        if uid is not None:
+            filters.append(f"{prefix}uid = ?")
+            params.append(uid)
+        if after is not None:
+            columns = ", ".join(prefix + key for key in sort_keys)
+            placeholders = ", ".join("?" for _ in sort_keys)
+            filters.append(f"({columns}) < ({placeholders})")
+            params.extend(after)
+        return "".join(f" AND {f}" for f in filters), params
+
     def search_documents(self, keyword: str, uid: Optional[int] = None, 
-                        limit: int = 50, offset: int = 0) -> List[Dict]:
-        """搜索文档（支持用户过滤和分页）"""
+                        limit: int = 50, offset: int = 0, after: Optional[List] = None,
+                        fields: Optional[List[str]] = None, fuzzy: bool = False) -> List[Dict]:
+        """
+        搜索文档（基于 docs_fts 全文索引，按相关度排序，支持用户过滤和分页）
+
+        相关度为各字段加权的 BM25，再与评分和更新时间混合为排序分 score（见 db/ranking.py），
+        在索引查询内计算并排序。after 为上一页最后一行的 (score, id)，传入时忽略 offset。
+        fields 为需要返回的字段，None 表示全部；不需要 content 和 snippet 时不读取正文。
+        fuzzy 为 True 时改用标题和标签的三元组模糊匹配（见 _search_documents_fuzzy）。
+        """
+        if fuzzy:
+            return self._search_documents_fuzzy(keyword, uid, limit, offset, after, fields)
+        match_query = build_match_query(keyword)
+        if match_query is None:
+            # 没有可检索的词或有单独的汉字时回退到 LIKE
+            return self._search_documents_like(keyword, uid, limit, offset, after, fields)
+
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                columns = project(fields, DOC_SEARCH_FIELDS, SEARCH_SORT_KEYS)
+                weights = ranking.bm25_weights(SEARCH_CONFIG)
+                score_sql, score_params = self._search_score_sql(
+                    f"-bm25(docs_fts, {', '.join('?' for _ in weights)})")
+                filters, params = self._docs_filters(uid, None, SEARCH_SORT_KEYS, "d.")
+                after_filter, after_params = self._docs_filters(None, after, SEARCH_SORT_KEYS)
+                if after is not None:
+                    offset = 0
+                sql, sql_params = self._search_page_sql(f"""
+                    SELECT * FROM (
+                        SELECT {self._doc_columns(columns, "d.")}, {score_sql} AS score
+                        FROM docs_fts
+                        INNER JOIN docs d ON d.id = docs_fts.rowid
+                        WHERE docs_fts MATCH ? {filters}
+                    )
+                    WHERE score IS NOT NULL {after_filter}
+                    ORDER BY score DESC, id DESC
+                    LIMIT ? OFFSET ?
+                """, weights + score_params + [match_query] + params + after_params + [limit, offset],
+                    columns, keyword)
+                cursor.execute(sql, sql_params)
+                return [self._search_row_to_dict(row, columns) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"搜索文档失败: {e}")
+            return []
+
+    def _search_documents_like(self, keyword: str, uid: Optional[int], limit: int, offset: int,
+                               after: Optional[List] = None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """LIKE 全表扫描搜索，用于全文索引无法处理的关键词，相关度为命中字段的权重之和"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                columns = project(fields, DOC_SEARCH_FIELDS, SEARCH_SORT_KEYS)
                 search_pattern = f"%{keyword}%"
+                score_sql, score_params = self._search_score_sql("""
+                    ? * (d.title LIKE ?) + ? * (d.summary LIKE ?)
+                    + ? * (notedocs_decode(dc.codec, dc.content) LIKE ?) + ? * (d.tags LIKE ?)
+                """)
+                hit_params = []
+                for weight in ranking.bm25_weights(SEARCH_CONFIG):
+                    hit_params.extend([weight, search_pattern])
+                uid_sql = "WHERE d.uid = ?" if uid is not None else ""
+                params = [uid] if uid is not None else []
+                after_filter, after_params = self._docs_filters(None, after, SEARCH_SORT_KEYS)
+                if after is not None:
+                    offset = 0
                 
-                if uid is not None:
-                    cursor.execute("""
-                        SELECT id, uid, url, title, summary, content, source, favicon, tags, evaluate, created_at, updated_at
-                        FROM docs 
-                        WHERE uid = ? AND (title LIKE ? OR summary LIKE ? OR content LIKE ? OR tags LIKE ?)
-                        ORDER BY evaluate DESC, updated_at DESC
-                        LIMIT ? OFFSET ?
-                    """, (uid, search_pattern, search_pattern, search_pattern, search_pattern, limit, offset))
-                else:
-                    cursor.execute("""
-                        SELECT id, uid, url, title, summary, content, source, favicon, tags, evaluate, created_at, updated_at
-                        FROM docs 
-                        WHERE title LIKE ? OR summary LIKE ? OR content LIKE ? OR tags LIKE ?
-                        ORDER BY evaluate DESC, updated_at DESC
-                        LIMIT ? OFFSET ?
-                    """, (search_pattern, search_pattern, search_pattern, search_pattern, limit, offset))
+                # 没有命中任何字段时相关度为 0，取对数后为 NULL 被过滤掉
+                sql, sql_params = self._search_page_sql(f"""
+                    SELECT * FROM (
+                        SELECT {self._doc_columns(columns, "d.")}, {score_sql} AS score
+                        FROM docs d LEFT JOIN docs_content dc ON dc.doc_id = d.id
+                        {uid_sql}
+                    )
+                    WHERE score IS NOT NULL {after_filter}
+                    ORDER BY score DESC, id DESC
+                    LIMIT ? OFFSET ?
+                """, hit_params + score_params + params + after_params + [limit, offset], columns, keyword)
+                cursor.execute(sql, sql_params)
                 
-                results = []
-                for row in cursor.fetchall():
-                    content = row["content"]
-                    content_preview = content[:200] + "..." if len(content) > 200 else content
-                    
-                    results.append({
-                        "id": row["id"],
-                        "uid": row["uid"],
-                        "url": row["url"],
-                        "title": row["title"],
-                        "summary": row["summary"],
-                        "content": content_preview,
-                        "source": row["source"],
-                        "favicon": row["favicon"],
-                        "tags": row["tags"],
-                        "evaluate": row["evaluate"],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"]
-                    })
-                return results
+                return [self._search_row_to_dict(row, columns) for row in cursor.fetchall()]
         except Exception as e:
             print(f"搜索文档失败: {e}")
             return []
+
+    def _search_documents_fuzzy(self, keyword: str, uid: Optional[int], limit: int, offset: int,
+                                after: Optional[List] = None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        三元组模糊搜索标题和标签，容忍拼写错误和只输入半个词。
+
+        相关度为关键词三元组出现在文档标题和标签中的比例，不低于 fuzzy_threshold 才算命中；
+        只读取 doc_trigrams 中关键词各三元组的倒排列表，不扫描 docs 表。
+        """
+        trigrams = query_trigrams(keyword)
+        if not trigrams:
+            return []
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                columns = project(fields, DOC_SEARCH_FIELDS, SEARCH_SORT_KEYS)
+                min_shared = max(1, math.ceil(SEARCH_CONFIG['fuzzy_threshold'] * len(trigrams)))
+                score_sql, score_params = self._search_score_sql("t.shared * 1.0 / ?")
+                uid_sql = "AND uid = ?" if uid is not None else ""
+                params = [uid] if uid is not None else []
+                after_filter, after_params = self._docs_filters(None, after, SEARCH_SORT_KEYS)
+                if after is not None:
+                    offset = 0
+                sql, sql_params = self._search_page_sql(f"""
+                    SELECT * FROM (
+                        SELECT {self._doc_columns(columns, "d.")}, {score_sql} AS score
+                        FROM (
+                            SELECT doc_id, COUNT(*) AS shared FROM doc_trigrams
+                            WHERE trigram IN ({", ".join("?" for _ in trigrams)}) {uid_sql}
+                            GROUP BY doc_id HAVING COUNT(*) >= ?
+                        ) t
+                        INNER JOIN docs d ON d.id = t.doc_id
+                    )
+                    WHERE score IS NOT NULL {after_filter}
+                    ORDER BY score DESC, id DESC
+                    LIMIT ? OFFSET ?
+                """, [len(trigrams)] + score_params + trigrams + params + [min_shared]
+                    + after_params + [limit, offset], columns, keyword)
+                cursor.execute(sql, sql_params)
+                return [self._search_row_to_dict(row, columns) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"模糊搜索文档失败: {e}")
+            return []
+
+    def _search_score_sql(self, relevance_sql: str) -> tuple:
+        """相关度与评分、更新时间混合后的排序分表达式及其参数（相关度表达式的参数在前）"""
+        sql = f"""ln({relevance_sql})
+                  + ln(1 + ? * max(COALESCE(d.evaluate, 0), 0))
+                  + ? * (COALESCE(julianday(d.updated_at), julianday('{ranking.RECENCY_EPOCH}'))
+                         - julianday('{ranking.RECENCY_EPOCH}'))"""
+        return sql, [SEARCH_CONFIG['evaluate_boost'], ranking.recency_rate(SEARCH_CONFIG)]
+
+    def _search_page_sql(self, page_sql: str, page_params: List, columns: List[str], keyword: str) -> tuple:
+        """
+        在分页后的搜索结果外层计算正文预览和关键词摘要，返回 (SQL, 参数)。
+
+        预览和摘要由 SQL 函数在库内生成，只对当前页的行调用，结果行里不带正文；
+        排序时 SQLite 会先算出所有命中行的结果列，所以不能放在分页查询自己的 SELECT 里。
+        """
+        extra, params = [], []
+        if "content" in columns:
+            extra.append("notedocs_preview(dc.codec, dc.content, 201) AS content")
+        if "snippet" in columns:
+            extra.append("notedocs_snippet(dc.codec, dc.content, ?, ?) AS snippet")
+            params.extend([json.dumps(snippet.keyword_terms(keyword), ensure_ascii=False),
+                           SEARCH_CONFIG['snippet_length']])
+        if not extra:
+            return page_sql, page_params
+        sql = f"""
+            SELECT p.*, {", ".join(extra)}
+            FROM ({page_sql}) p
+            LEFT JOIN docs_content dc ON dc.doc_id = p.id
+            ORDER BY p.score DESC, p.id DESC
+        """
+        return sql, params + page_params
+
+    def _search_row_to_dict(self, row, columns: List[str]) -> Dict:
+        """搜索结果行转换为字典，正文预览保留前200个字符"""
+        result = {}
+        for name in columns:
+            if name == "content":
+                content = row["content"] or ""
+                result["content"] = content[:200] + "..." if len(content) > 200 else content
+            elif name == "snippet":
+                result["snippet"] = json.loads(row["snippet"]) if row["snippet"] else {"text": "", "highlights": []}
+            else:
+                result[name] = row[name]
+        return result
     
     def get_documents_by_tag(self, tag: str, uid: Optional[int] = None, 
-                            limit: int = 50, offset: int = 0) -> List[Dict]:
-        """根据标签获取文档"""
+                            limit: int = 50, offset: int = 0, match_all: bool = False,
+                            after: Optional[List] = None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        根据标签获取文档（基于 doc_tags 索引，标签完整匹配）
+
+        tag 可以是逗号分隔的多个标签，match_all 为 True 时要求同时包含所有标签，否则包含任一即可。
+        after 为上一页最后一行的 (evaluate, updated_at, id)，传入时忽略 offset。
+        fields 为需要返回的字段，None 表示全部；id 和排序键总会返回。
+        """
+        tag_list = normalize_tags(tag)
+        if not tag_list:
+            return []
+
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                tag_pattern = f"%{tag}%"
-                
-                if uid is not None:
-                    cursor.execute("""
-                        SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, created_at, updated_at
-                        FROM docs 
-                        WHERE uid = ? AND tags LIKE ?
-                        ORDER BY evaluate DESC, updated_at DESC
-                        LIMIT ? OFFSET ?
-                    """, (uid, tag_pattern, limit, offset))
-                else:
-                    cursor.execute("""
-                        SELECT id, uid, url, title, summary, source, favicon, tags, evaluate, created_at, updated_at
-                        FROM docs 
-                        WHERE tags LIKE ?
-                        ORDER BY evaluate DESC, updated_at DESC
-                        LIMIT ? OFFSET ?
-                    """, (tag_pattern, limit, offset))
-                
-                results = []
-                for row in cursor.fetchall():
-                    results.append({
-                        "id": row["id"],
-                        "uid": row["uid"],
-                        "url": row["url"],
-                        "title": row["title"],
-                        "summary": row["summary"],
-                        "source": row["source"],
-                        "favicon": row["favicon"],
-                        "tags": row["tags"],
-                        "evaluate": row["evaluate"],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"]
-                    })
-                return results
+                columns = project(fields, DOC_LIST_FIELDS, ("evaluate", "updated_at", "id"))
+                placeholders = ", ".join("?" for _ in tag_list)
+                uid_filter = "AND uid = ?" if uid is not None else ""
+                having = "HAVING COUNT(*) = ?" if match_all else ""
+                params = tag_list + ([uid] if uid is not None else []) + \
+                         ([len(tag_list)] if match_all else [])
+                keyset, keyset_params = self._docs_filters(None, after, ("evaluate", "updated_at", "id"))
+                if after is not None:
+                    offset = 0
+                cursor.execute(f"""
+                    SELECT {self._doc_columns(columns)}
+                    FROM docs
+                    WHERE id IN (
+                        SELECT doc_id FROM doc_tags
+                        WHERE tag IN ({placeholders}) {uid_filter}
+                        GROUP BY doc_id {having}
+                    ) {keyset}
+                    ORDER BY evaluate DESC, updated_at DESC, id DESC
+                    LIMIT ? OFFSET ?
+                """, params + keyset_params + [limit, offset])
+                return [self._row_to_doc(row, columns) for row in cursor.fetchall()]
         except Exception as e:
             print(f"根据标签获取文档失败: {e}")
             return []
 
     def get_documents_count(self, uid: Optional[int] = None) -> int:
-        """获取文档总数（支持用户过滤）"""
+        """获取文档总数（支持用户过滤），读取触发器维护的 user_doc_stats 计数"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 if uid is not None:
-                    cursor.execute("SELECT COUNT(*) FROM docs WHERE uid = ?", (uid,))
+                    cursor.execute("SELECT doc_count FROM user_doc_stats WHERE uid = ?", (uid,))
                 else:
-                    cursor.execute("SELECT COUNT(*) FROM docs")
+                    cursor.execute("SELECT COALESCE(SUM(doc_count), 0) FROM user_doc_stats")
                 
                 result = cursor.fetchone()
                 return result[0] if result else 0
@@ -410,11 +2007,14 @@ class NotedocsDB:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.execute("SELECT doc_id FROM categories_docs WHERE category_id = ?", (category_id,))
+                doc_ids = [row["doc_id"] for row in cursor.fetchall()]
                 # 先删除关联的文档关系
                 cursor.execute("DELETE FROM categories_docs WHERE category_id = ?", (category_id,))
                 # 再删除分类
                 cursor.execute("DELETE FROM categories WHERE id = ? AND uid = ?", (category_id, uid))
                 conn.commit()
+                self._invalidate_docs(doc_ids)
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"删除分类失败: {e}")
@@ -453,30 +2053,85 @@ class NotedocsDB:
     # ========== 分类-文档关联操作 ==========
     
     def add_doc_to_category(self, category_id: int, doc_id: int) -> bool:
-        """给分类目录增加文章"""
+        """给分类目录增加文章（已在分类中时忽略）"""
+        return self.add_docs_to_category(category_id, [doc_id]) is not None
+
+    def add_docs_to_category(self, category_id: int, doc_ids: List[int]) -> Optional[int]:
+        """
+        批量给分类目录增加文章，单条语句完成，已在分类中的文档由唯一索引忽略。
+
+        不存在的文档ID会被跳过。返回新增的关联数，失败返回 None。
+        """
         try:
+            doc_ids = list(dict.fromkeys(doc_ids))
+            placeholders = ", ".join("?" for _ in doc_ids)
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                # 检查是否已存在关联
-                cursor.execute("""
-                    SELECT id FROM categories_docs 
-                    WHERE category_id = ? AND doc_id = ?
-                """, (category_id, doc_id))
-                
-                if cursor.fetchone():
-                    print(f"文档 {doc_id} 已在分类 {category_id} 中")
-                    return True
-                
-                # 添加关联
-                cursor.execute("""
-                    INSERT INTO categories_docs (category_id, doc_id, updated_at)
-                    VALUES (?, ?, datetime('now'))
-                """, (category_id, doc_id))
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO categories_docs (category_id, doc_id, updated_at)
+                    SELECT c.id, d.id, datetime('now')
+                    FROM categories c, docs d
+                    WHERE c.id = ? AND d.id IN ({placeholders})
+                """, [category_id] + doc_ids)
                 conn.commit()
-                return True
+                self._invalidate_docs(doc_ids)
+                return cursor.rowcount
         except Exception as e:
-            print(f"添加文档到分类失败: {e}")
-            return False
+            print(f"批量添加文档到分类失败: {e}")
+            return None
+
+    def remove_docs_from_category(self, category_id: int, doc_ids: List[int]) -> Optional[int]:
+        """批量删除分类目录下的文章，返回删除的关联数，失败返回 None"""
+        try:
+            doc_ids = list(dict.fromkeys(doc_ids))
+            placeholders = ", ".join("?" for _ in doc_ids)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    DELETE FROM categories_docs
+                    WHERE category_id = ? AND doc_id IN ({placeholders})
+                """, [category_id] + doc_ids)
+                conn.commit()
+                self._invalidate_docs(doc_ids)
+                return cursor.rowcount
+        except Exception as e:
+            print(f"批量从分类删除文档失败: {e}")
+            return None
+
+    def move_docs_to_category(self, category_id: int, target_category_id: int,
+                              doc_ids: List[int]) -> Optional[int]:
+        """
+        把文章从一个分类移动到另一个分类，在一个事务中完成。
+
+        已在目标分类中的文档只从原分类删除。返回移出原分类的文档数，
+        目标分类不存在或失败返回 None。
+        """
+        try:
+            doc_ids = list(dict.fromkeys(doc_ids))
+            placeholders = ", ".join("?" for _ in doc_ids)
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM categories WHERE id = ?", (target_category_id,))
+                if not cursor.fetchone():
+                    return None
+                # 与目标分类中已有关联冲突的行保持不动，随后删除
+                cursor.execute(f"""
+                    UPDATE OR IGNORE categories_docs
+                    SET category_id = ?, updated_at = datetime('now')
+                    WHERE category_id = ? AND doc_id IN ({placeholders})
+                """, [target_category_id, category_id] + doc_ids)
+                moved = cursor.rowcount
+                cursor.execute(f"""
+                    DELETE FROM categories_docs
+                    WHERE category_id = ? AND doc_id IN ({placeholders})
+                """, [category_id] + doc_ids)
+                moved += cursor.rowcount
+                conn.commit()
+                self._invalidate_docs(doc_ids)
+                return moved
+        except Exception as e:
+            print(f"移动分类文档失败: {e}")
+            return None
 
     def remove_doc_from_category(self, category_id: int, doc_id: int) -> bool:
         """删除分类目录下的文章"""
@@ -488,53 +2143,62 @@ class NotedocsDB:
                     WHERE category_id = ? AND doc_id = ?
                 """, (category_id, doc_id))
                 conn.commit()
+                self._invalidate_docs([doc_id])
                 return cursor.rowcount > 0
         except Exception as e:
             print(f"从分类删除文档失败: {e}")
             return False
 
-    def get_docs_by_category(self, category_id: int, limit: int = 50, offset: int = 0) -> List[Dict]:
-        """查询分类目录下的所有文章"""
+    def get_docs_by_category(self, category_id: int, limit: int = 50, offset: int = 0,
+                             after: Optional[List] = None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        查询分类目录下的所有文章，after 为上一页最后一行的 (updated_at, id)，传入时忽略 offset。
+
+        fields 为需要返回的字段，None 表示全部；id 和排序键总会返回。
+        """
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT d.id, d.uid, d.url, d.title, d.summary, d.source, d.favicon, 
-                           d.tags, d.evaluate, d.created_at, d.updated_at
+                columns = project(fields, DOC_LIST_FIELDS, ("updated_at", "id"))
+                keyset, keyset_params = self._docs_filters(None, after, ("updated_at", "id"), "d.")
+                if after is not None:
+                    offset = 0
+                cursor.execute(f"""
+                    SELECT {self._doc_columns(columns, "d.")}
                     FROM docs d
                     INNER JOIN categories_docs cd ON d.id = cd.doc_id
-                    WHERE cd.category_id = ?
-                    ORDER BY d.updated_at DESC
+                    WHERE cd.category_id = ? {keyset}
+                    ORDER BY d.updated_at DESC, d.id DESC
                     LIMIT ? OFFSET ?
-                """, (category_id, limit, offset))
-                
-                results = []
-                for row in cursor.fetchall():
-                    results.append({
-                        "id": row["id"],
-                        "uid": row["uid"],
-                        "url": row["url"],
-                        "title": row["title"],
-                        "summary": row["summary"],
-                        "source": row["source"],
-                        "favicon": row["favicon"],
-                        "tags": row["tags"],
-                        "evaluate": row["evaluate"],
-                        "created_at": row["created_at"],
-                        "updated_at": row["updated_at"]
-                    })
-                return results
+                """, [category_id] + keyset_params + [limit, offset])
+                return [self._row_to_doc(row, columns) for row in cursor.fetchall()]
         except Exception as e:
             print(f"查询分类下的文档失败: {e}")
             return []
 
+    def get_category_docs_validator(self, category_id: int) -> Optional[Dict]:
+        """获取分类文档列表的缓存校验信息（category_doc_stats 中的 generation）"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT generation, last_modified FROM category_doc_stats WHERE category_id = ?
+                """, (category_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    return {"generation": 0, "last_modified": None}
+                return {"generation": row["generation"], "last_modified": row["last_modified"]}
+        except Exception as e:
+            print(f"读取分类版本失败: {e}")
+            return None
+
     def get_category_docs_count(self, category_id: int) -> int:
-        """获取分类下的文档总数"""
+        """获取分类下的文档总数，读取触发器维护的 category_doc_stats 计数"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT COUNT(*) FROM categories_docs WHERE category_id = ?
+                    SELECT doc_count FROM category_doc_stats WHERE category_id = ?
                 """, (category_id,))
                 result = cursor.fetchone()
                 return result[0] if result else 0
@@ -0,0 +1,31 @@
+"""
+字段投影 - 列表类接口按 fields 参数只查询客户端需要的列
+"""
+from typing import Iterable, List, Optional, Sequence
+
+# 列表、标签、分类文档接口可选的字段，与 docs 表的列同名
+DOC_LIST_FIELDS = ("id", "uid", "url", "title", "summary", "source", "favicon",
+                   "tags", "evaluate", "created_at", "updated_at")
+# 搜索结果另有正文预览 content（前200个字符）、关键词摘要 snippet（摘要文本及高亮位置）
+# 和相关度排序分 score
+DOC_SEARCH_FIELDS = ("id", "uid", "url", "title", "summary", "content", "snippet", "source", "favicon",
+                     "tags", "evaluate", "created_at", "updated_at", "score")
+# 查询时计算、不是 docs 表的列的字段
+DOC_COMPUTED_FIELDS = ("content", "snippet", "score")
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """解析逗号分隔的字段列表，未指定时返回 None（全部字段），有未知字段时抛出 ValueError"""
+    if fields is None or not fields.strip():
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}")
+    return names
+
+def project(fields: Optional[Iterable[str]], allowed: Sequence[str], sort_keys: Sequence[str]) -> List[str]:
+    """实际查询的字段：请求的字段加上 id 和排序键（生成游标需要），按 allowed 中的顺序排列"""
+    if fields is None:
+        return list(allowed)
+    wanted = set(fields) | {"id"} | set(sort_keys)
+    return [name for name in allowed if name in wanted]
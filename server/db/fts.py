@@ -0,0 +1,124 @@
+"""
+全文检索辅助函数 - SQLite FTS5 / MySQL FULLTEXT
+
+FTS5 自带的 unicode61 分词器把一整段连续的中文当作一个词，无法按词检索中文。
+这里在写入索引前把中日文字展开为重叠的二元组（“文档管理” -> “文档 档管 管理”），
+查询时做同样的展开并以短语匹配，不依赖任何外部分词服务。
+
+模糊匹配另用标题和标签的三元组倒排表（doc_trigrams，中日文为二元组），
+按关键词三元组的命中比例排序，可以容忍拼写错误和只输入半个词。
+"""
+import json
+import re
+from typing import List, Optional
+
+# 与 FTS5 unicode61 分词器一致：连续的字母数字为一个词
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+# 中日韩统一表意文字及日文假名
+_CJK_CHARS = r"぀-ヿ㐀-䶿一-鿿豈-﫿"
+_CJK_RE = re.compile(f"[{_CJK_CHARS}]")
+# 一个词内部的中日文片段与其他片段
+_SEGMENT_RE = re.compile(f"[{_CJK_CHARS}]+|[^{_CJK_CHARS}]+")
+
+def contains_cjk(text: str) -> bool:
+    """是否包含中日韩文字"""
+    return _CJK_RE.search(text) is not None
+
+def _term_tokens(term: str) -> List[str]:
+    """单个词的索引词元：中日文片段展开为二元组，其余部分转小写"""
+    tokens = []
+    for segment in _SEGMENT_RE.findall(term):
+        if _CJK_RE.match(segment):
+            if len(segment) == 1:
+                tokens.append(segment)
+            else:
+                tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            tokens.append(segment.lower())
+    return tokens
+
+def tokenize_for_index(text: Optional[str]) -> str:
+    """把文本转换为写入 FTS5 的词元串（以空格分隔），注册为 SQL 函数 notedocs_tokenize"""
+    if not text:
+        return ""
+    tokens = []
+    for term in _TERM_RE.findall(text):
+        tokens.extend(_term_tokens(term))
+    return " ".join(tokens)
+
+def build_match_query(keyword: str) -> Optional[str]:
+    """
+    把用户输入的关键词转换为 FTS5 MATCH 表达式。
+
+    每个词展开后作为一个短语（加引号，避免被解析为 FTS5 语法），多个词之间为 AND。
+    最后一个词按前缀匹配，适配边输入边搜索。
+    没有可检索的词，或任一个词中有单独的汉字时返回 None，由调用方改用 LIKE 搜索：
+    单个汉字在正文中通常是某个二元组的后一个字（“数据库”索引为“数据 据库”），短语和前缀匹配都找不到。
+    """
+    terms = _TERM_RE.findall(keyword)
+    if not terms:
+        return None
+
+    phrases = []
+    for term in terms:
+        tokens = _term_tokens(term)
+        if any(len(token) == 1 and contains_cjk(token) for token in tokens):
+            return None
+        phrases.append('"%s"' % " ".join(tokens).replace('"', '""'))
+    # 二元组本身已能匹配半个词，末尾是字母数字时才需要前缀匹配
+    if not contains_cjk(_term_tokens(terms[-1])[-1]):
+        phrases[-1] += "*"
+    return " AND ".join(phrases)
+
+def _word_trigrams(term: str, closed: bool = True) -> List[str]:
+    """
+    单个词的三元组：字母数字片段转小写后前面补两个空格、后面补一个空格再切分，
+    closed 为 False 时最后一个片段不补后面的空格；中日文片段没有词边界，改为不补空格的二元组。
+    """
+    grams = []
+    segments = _SEGMENT_RE.findall(term)
+    for index, segment in enumerate(segments):
+        if _CJK_RE.match(segment):
+            grams.extend(_term_tokens(segment))
+        else:
+            tail = " " if closed or index < len(segments) - 1 else ""
+            padded = "  " + segment.lower() + tail
+            grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def text_trigrams(*texts: Optional[str]) -> List[str]:
+    """文本中所有词的三元组（去重），用于模糊匹配的倒排表"""
+    trigrams = {}
+    for text in texts:
+        for term in _TERM_RE.findall(text or ""):
+            trigrams.update(dict.fromkeys(_word_trigrams(term)))
+    return list(trigrams)
+
+def trigrams_for_index(title: Optional[str], tags: Optional[str]) -> str:
+    """标题和标签的三元组（JSON 数组），注册为 SQL 函数 notedocs_trigrams，触发器用 json_each 展开写入"""
+    return json.dumps(text_trigrams(title, tags), ensure_ascii=False)
+
+def query_trigrams(keyword: str) -> List[str]:
+    """
+    关键词的三元组（去重）。
+
+    最后一个词不补词尾的空格，只输入了半个词时也能完全匹配，适配边输入边搜索。
+    """
+    terms = _TERM_RE.findall(keyword)
+    trigrams = {}
+    for index, term in enumerate(terms):
+        trigrams.update(dict.fromkeys(_word_trigrams(term, closed=index < len(terms) - 1)))
+    return list(trigrams)
+
+def build_boolean_query(keyword: str, ngram_token_size: int = 2) -> Optional[str]:
+    """
+    把用户输入的关键词转换为 MySQL BOOLEAN MODE 的 AGAINST 表达式。
+
+    每个词都是必须出现的短语（+"词"），ngram 解析器会把短语内的中文按 ngram 切分后做短语匹配。
+    没有可检索的词，或有词短于 ngram_token_size（如单个汉字、C、R，全文索引中没有这样的词元，
+    必须出现时一定搜不到）时返回 None，由调用方改用 LIKE 搜索。
+    """
+    terms = _TERM_RE.findall(keyword)
+    if not terms or any(len(term) < ngram_token_size for term in terms):
+        return None
+    return " ".join('+"%s"' % term for term in terms)
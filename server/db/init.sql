@@ -25,7 +25,8 @@ CREATE TABLE IF NOT EXISTS docs (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_docs_title (title),
-    INDEX idx_docs_uid (uid)
+    INDEX idx_docs_uid (uid),
+    FULLTEXT INDEX ft_docs_search (title, summary, content, tags) WITH PARSER ngram -- 全文检索（中文按 ngram 分词）
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- 插入测试数据
@@ -54,5 +55,5 @@ CREATE TABLE IF NOT EXISTS categories_docs (
     doc_id BIGINT NOT NULL DEFAULT 0,           -- 所属于文档ID
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_categories_docs_category_id (category_id)
+    UNIQUE INDEX uk_categories_docs_category_doc (category_id, doc_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
\ No newline at end of file
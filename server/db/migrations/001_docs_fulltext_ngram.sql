@@ -0,0 +1,20 @@
+-- 为已有的 MySQL 数据库添加 docs 全文索引（ngram 分词，支持中文）
+-- 用法: mysql -u root -p notedocs < db/migrations/001_docs_fulltext_ngram.sql
+--
+-- 注意：
+-- 1. 需要 MySQL 5.7.6 及以上版本（内置 ngram 解析器）
+-- 2. 分词长度由服务端参数 ngram_token_size 决定，默认 2（中文二元组），修改后需重建索引
+-- 3. 表上第一个 FULLTEXT 索引会重建整张表，请在低峰期执行
+
+USE notedocs;
+
+SET @index_exists := (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'docs' AND index_name = 'ft_docs_search'
+);
+SET @ddl := IF(@index_exists = 0,
+    'ALTER TABLE docs ADD FULLTEXT INDEX ft_docs_search (title, summary, content, tags) WITH PARSER ngram',
+    'SELECT ''ft_docs_search already exists''');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
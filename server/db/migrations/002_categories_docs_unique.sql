@@ -0,0 +1,21 @@
+-- 删除重复的分类-文档关联，并为 (category_id, doc_id) 添加唯一索引
+-- 用法: mysql -u root -p notedocs < db/migrations/002_categories_docs_unique.sql
+--
+-- 每对关联保留 id 最小的一行
+
+USE notedocs;
+
+DELETE cd FROM categories_docs cd
+JOIN categories_docs keep
+  ON keep.category_id = cd.category_id AND keep.doc_id = cd.doc_id AND keep.id < cd.id;
+
+SET @index_exists := (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'categories_docs' AND index_name = 'uk_categories_docs_category_doc'
+);
+SET @ddl := IF(@index_exists = 0,
+    'ALTER TABLE categories_docs ADD UNIQUE INDEX uk_categories_docs_category_doc (category_id, doc_id), DROP INDEX idx_categories_docs_category_id',
+    'SELECT ''uk_categories_docs_category_doc already exists''');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
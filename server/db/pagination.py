@@ -0,0 +1,35 @@
+"""
+游标分页 - 游标是对排序键 (如 updated_at, id) 的不透明编码
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+# 各列表接口的排序键（全部降序），游标即最后一行这些字段的编码
+RECENT_SORT_KEYS = ("updated_at", "id")
+RATED_SORT_KEYS = ("evaluate", "updated_at", "id")
+# 搜索按相关度排序分 score 排列；score 随全库写入变化，翻页期间有写入时可能漏掉或重复个别结果
+SEARCH_SORT_KEYS = ("score", "id")
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """把最后一行的排序键编码为游标"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """解码游标，格式不对或排序键个数不符时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("无效的游标")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("无效的游标")
+    return values
+
+def next_cursor(rows: List[Dict], limit: int, keys: Sequence[str]) -> Optional[str]:
+    """满页时用最后一行生成下一页游标，不满一页说明已经到底"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor([last[key] for key in keys])
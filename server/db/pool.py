@@ -0,0 +1,359 @@
+"""
+数据库连接池
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# SQLite 连接的默认 PRAGMA 配置，每个连接创建时执行一次
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",        # 读写互不阻塞
+    "synchronous": "NORMAL",      # WAL 模式下足够安全，省去每次提交的 fsync
+    "cache_size": -16000,         # 负数单位为 KiB，约 16MB 页缓存
+    "mmap_size": 268435456,       # 256MB 内存映射读
+    "busy_timeout": 5000,         # 毫秒，写锁冲突时等待而不是直接报错
+    "foreign_keys": "ON",         # 让 ON DELETE CASCADE 生效
+    "temp_store": "MEMORY",
+}
+
+
+class PoolTimeoutError(Exception):
+    """等待空闲连接超时"""
+
+
+class PooledConnection:
+    """连接池中的一个连接及其元数据"""
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    通用连接池：容量有界、同一线程优先复用上次的连接、取出时做健康检查。
+
+    子类实现 _connect / _ping / _close / _reset 即可适配不同的数据库驱动。
+    同一线程内嵌套获取连接会拿到同一个连接，只有最外层负责提交或回滚。
+    """
+
+    def __init__(self, max_size: int = 8, timeout: float = 30.0,
+                 health_check_interval: float = 30.0, min_size: int = 0,
+                 max_idle_time: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size 必须大于 0")
+        if not 0 <= min_size <= max_size:
+            raise ValueError("min_size 必须在 0 和 max_size 之间")
+        self.max_size = max_size
+        self.min_size = min_size
+        self.timeout = timeout
+        # 0 表示每次取出都探活
+        self.health_check_interval = health_check_interval
+        # 空闲超过该秒数的连接会被回收（保留 min_size 个），None 表示不回收
+        self.max_idle_time = max_idle_time
+
+        self._cond = threading.Condition()
+        self._idle: List[PooledConnection] = []
+        self._size = 0
+        self._local = threading.local()
+        self._closed = False
+
+        self._created = 0
+        self._checkouts = 0
+        self._reused_by_thread = 0
+        self._health_check_failures = 0
+        self._recycled = 0
+        self._waiters = 0
+        self._wait_count = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+
+    # ========== 驱动相关操作（由子类实现） ==========
+
+    def _connect(self) -> Any:
+        raise NotImplementedError
+
+    def _ping(self, raw: Any) -> None:
+        """连接不可用时抛出异常"""
+        raise NotImplementedError
+
+    def _close(self, raw: Any) -> None:
+        raw.close()
+
+    def _reset(self, raw: Any) -> None:
+        """连接归还前恢复到干净状态"""
+        raw.rollback()
+
+    def _commit(self, raw: Any) -> None:
+        raw.commit()
+
+    # ========== 借出与归还 ==========
+
+    def _new_entry(self) -> PooledConnection:
+        """在锁外创建新连接（调用前已预留名额）"""
+        try:
+            entry = PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return entry
+
+    def _discard(self, entry: PooledConnection) -> None:
+        """关闭连接并释放名额"""
+        try:
+            self._close(entry.raw)
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _collect_expired(self) -> List[PooledConnection]:
+        """取出空闲过久的连接（需持有锁），保留 min_size 个"""
+        if self.max_idle_time is None or not self._idle:
+            return []
+        now = time.monotonic()
+        expired = []
+        # 空闲列表按归还时间排列，最久未用的在前
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0].last_used > self.max_idle_time):
+            expired.append(self._idle.pop(0))
+            self._size -= 1
+        self._recycled += len(expired)
+        return expired
+
+    def _close_quietly(self, entries: List[PooledConnection]) -> None:
+        for entry in entries:
+            try:
+                self._close(entry.raw)
+            except Exception:
+                pass
+
+    def _take(self) -> PooledConnection:
+        """从池中取一个连接，必要时新建或等待"""
+        with self._cond:
+            expired = self._collect_expired()
+            if expired:
+                self._cond.notify(len(expired))
+        self._close_quietly(expired)
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        preferred = getattr(self._local, "entry", None)
+        waited = False
+
+        with self._cond:
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("连接池已关闭")
+                    if self._idle:
+                        self._checkouts += 1
+                        if preferred is not None and preferred in self._idle:
+                            self._idle.remove(preferred)
+                            self._reused_by_thread += 1
+                            return preferred
+                        return self._idle.pop()
+                    if self._size < self.max_size:
+                        self._size += 1
+                        self._checkouts += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"等待数据库连接超时（{self.timeout}s，池大小 {self.max_size}）")
+                    if not waited:
+                        waited = True
+                        self._wait_count += 1
+                    self._waiters += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+            finally:
+                if waited:
+                    elapsed = time.monotonic() - started
+                    self._wait_time_total += elapsed
+                    self._wait_time_max = max(self._wait_time_max, elapsed)
+
+        # 已预留名额，在锁外建立新连接
+        return self._new_entry()
+
+    def _check_health(self, entry: PooledConnection) -> PooledConnection:
+        """空闲超过检查间隔的连接先探活，失效则换新连接"""
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return entry
+        try:
+            self._ping(entry.raw)
+            return entry
+        except Exception as e:
+            print(f"连接健康检查失败，重新建立连接: {e}")
+            try:
+                self._close(entry.raw)
+            except Exception:
+                pass
+            with self._cond:
+                self._health_check_failures += 1
+            # 沿用失效连接的名额
+            return self._new_entry()
+
+    def acquire(self) -> Any:
+        """借出连接；同一线程嵌套调用返回同一个连接"""
+        depth = getattr(self._local, "depth", 0)
+        if depth > 0:
+            self._local.depth = depth + 1
+            return self._local.entry.raw
+
+        entry = self._check_health(self._take())
+        self._local.entry = entry
+        self._local.depth = 1
+        return entry.raw
+
+    def release(self, raw: Any) -> None:
+        """归还连接（嵌套时只有最外层真正归还）"""
+        entry = getattr(self._local, "entry", None)
+        if entry is None or entry.raw is not raw:
+            raise RuntimeError("归还的连接不属于当前线程")
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        try:
+            self._reset(raw)
+        except Exception as e:
+            print(f"重置连接失败，丢弃该连接: {e}")
+            self._local.entry = None
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                closing = True
+            else:
+                self._idle.append(entry)
+                closing = False
+            self._cond.notify()
+        if closing:
+            self._close(raw)
+
+    @contextmanager
+    def connection(self):
+        """
+        借出连接的上下文管理器：正常退出时提交，异常时回滚，最后归还。
+        """
+        raw = self.acquire()
+        outermost = self._local.depth == 1
+        try:
+            yield raw
+            if outermost:
+                self._commit(raw)
+        except BaseException:
+            if outermost:
+                try:
+                    raw.rollback()
+                except Exception:
+                    pass
+            raise
+        finally:
+            self.release(raw)
+
+    def fill(self) -> None:
+        """预先建立连接直到达到 min_size"""
+        created = []
+        try:
+            while True:
+                with self._cond:
+                    if self._closed or self._size >= self.min_size:
+                        break
+                    self._size += 1
+                created.append(self._new_entry())
+        finally:
+            with self._cond:
+                self._idle.extend(created)
+                self._cond.notify(len(created))
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接，借出中的连接在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_quietly(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池状态"""
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiters": self._waiters,
+                "created": self._created,
+                "recycled": self._recycled,
+                "checkouts": self._checkouts,
+                "reused_by_thread": self._reused_by_thread,
+                "health_check_failures": self._health_check_failures,
+                "wait_count": self._wait_count,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "wait_time_avg": round(self._wait_time_total / self._wait_count, 6)
+                                 if self._wait_count else 0.0,
+                "wait_time_max": round(self._wait_time_max, 6),
+                "timeouts": self._timeouts,
+            }
+
+
+class SQLitePool(ConnectionPool):
+    """SQLite 连接池，每个新连接执行一次 PRAGMA 配置并注册自定义 SQL 函数"""
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None,
+                 functions: Optional[Dict[str, Tuple[int, Callable]]] = None, **kwargs):
+        self.db_path = db_path
+        self.pragmas = {**DEFAULT_SQLITE_PRAGMAS, **(pragmas or {})}
+        # 函数名 -> (参数个数, Python 函数)，触发器中用到的函数必须在每个连接上注册
+        self.functions = functions or {}
+        super().__init__(**kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 连接会在不同线程间流转，由连接池保证同一时刻只有一个线程使用
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # 启用行工厂，方便访问列名
+        for name, (num_params, func) in self.functions.items():
+            conn.create_function(name, num_params, func, deterministic=True)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _ping(self, raw: sqlite3.Connection) -> None:
+        raw.execute("SELECT 1").fetchone()
+
+
+class MySQLPool(ConnectionPool):
+    """MySQL 连接池，默认每次取出都 ping 一次，避免拿到被服务端断开的连接"""
+
+    def __init__(self, config: Dict[str, Any], **kwargs):
+        self.config = config
+        kwargs.setdefault("health_check_interval", 0)
+        super().__init__(**kwargs)
+
+    def _connect(self) -> Any:
+        # 只有 MySQL 后端需要 pymysql，SQLite 后端不依赖它
+        import pymysql
+        return pymysql.connect(**self.config)
+
+    def _ping(self, raw: Any) -> None:
+        raw.ping(reconnect=False)
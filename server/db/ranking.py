@@ -0,0 +1,48 @@
+"""
+搜索相关度排序 - BM25 字段加权，再与评分、更新时间混合
+
+排序分取对数形式，越大越靠前：
+    score = ln(相关度) + ln(1 + evaluate_boost * evaluate) + ln2 / 半衰期 * 距 2000-01-01 的天数
+
+相关度乘以评分系数和时间系数后取对数即得到上式。时间项按固定起点计算而不是按“现在”，
+同一文档的分数不随查询时间变化，可以作为游标分页的排序键；但 BM25 依赖全库的文档数、平均长度和词频，
+两次翻页之间有写入或删除时所有文档的分数都会变化，游标可能漏掉或重复个别结果。
+"""
+import math
+import sqlite3
+from typing import Dict, List, Optional
+
+# docs_fts 的列顺序，bm25() 的权重参数按此顺序传入
+FTS_COLUMNS = ("title", "summary", "content", "tags")
+# 时间项的起点
+RECENCY_EPOCH = "2000-01-01"
+
+
+def bm25_weights(config: Dict) -> List[float]:
+    """按 docs_fts 列顺序排列的 BM25 字段权重"""
+    return [config[f"weight_{column}"] for column in FTS_COLUMNS]
+
+
+def recency_rate(config: Dict) -> float:
+    """每天的时间项增量，半衰期为 0 时不考虑时间"""
+    half_life = config['recency_half_life_days']
+    return math.log(2) / half_life if half_life > 0 else 0.0
+
+
+def ln(value: Optional[float]) -> Optional[float]:
+    """SQLite 未编译数学函数时注册的 ln()，非正数返回 NULL（与内置函数一致）"""
+    if value is None or value <= 0:
+        return None
+    return math.log(value)
+
+
+def has_math_functions() -> bool:
+    """当前 SQLite 是否带有 ln() 等数学函数（3.35 起可选编译）"""
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("SELECT ln(1)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
@@ -0,0 +1,248 @@
+"""
+相关文档 - 按用户维护 TF-IDF 稀疏向量，用余弦相似度找出同一主题的其他文档
+
+每个用户的向量在第一次请求时构建：文档的词频矩阵（CSR）和按词排列的倒排矩阵（词 x 文档），
+IDF 在构建时计算。之后的写入、修改、删除由 NotedocsDB 的变更通知增量处理：
+    新文档和修改后的文档放入增量区，用构建时的 IDF 计算向量（新词按只出现一次计）
+    删除和修改前的文档在主矩阵中标记为失效
+增量区或失效的文档超过一定比例时，下次查询前用已有的词频重新计算 IDF 并合并，不需要重新分词。
+
+查询时只取当前文档权重最高的 query_terms 个词，从倒排矩阵取出这些词的行做一次稀疏乘法，
+计算量只与这些词的倒排长度有关。
+"""
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from db.fts import _TERM_RE, _term_tokens, contains_cjk
+
+# 标题和标签中的词按出现两次计
+_FIELD_WEIGHTS = (("title", 2), ("tags", 2), ("summary", 1), ("content", 1))
+
+
+def doc_terms(doc: Dict, max_terms: int, content_chars: int) -> Counter:
+    """文档的词频（与全文索引相同的分词，正文只取前 content_chars 个字符），只保留出现次数最多的 max_terms 个词"""
+    counts = Counter()
+    for field, weight in _FIELD_WEIGHTS:
+        text = doc.get(field) or ""
+        if field == "content":
+            text = text[:content_chars]
+        words = Counter(_TERM_RE.findall(text.lower()))
+        if contains_cjk(text):
+            # 只有中日文需要展开为二元组，每个不同的词只展开一次
+            expanded = Counter()
+            for word, count in words.items():
+                for token in _term_tokens(word):
+                    expanded[token] += count
+            words = expanded
+        if weight != 1:
+            words = Counter({token: count * weight for token, count in words.items()})
+        counts.update(words)
+    if len(counts) > max_terms:
+        counts = Counter(dict(counts.most_common(max_terms)))
+    return counts
+
+
+class _UserVectors:
+    """一个用户所有文档的 TF-IDF 向量"""
+
+    def __init__(self, docs: List[Tuple[int, Counter]]):
+        self.lock = threading.Lock()
+        self.vocab: Dict[str, int] = {}
+        self._build([(doc_id, *self._term_ids(counts)) for doc_id, counts in docs])
+
+    def _term_ids(self, counts: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """词频转换为 (词编号, 次数) 数组，新词加入词表"""
+        cols = np.fromiter((self.vocab.setdefault(term, len(self.vocab)) for term in counts),
+                           dtype=np.int32, count=len(counts))
+        return cols, np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+
+    def _build(self, rows: List[Tuple[int, np.ndarray, np.ndarray]]) -> None:
+        """由各文档的 (文档ID, 词编号, 次数) 构建主矩阵，清空增量区"""
+        n, width = len(rows), len(self.vocab)
+        self.ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(row[1]) for row in rows], out=indptr[1:])
+        indices = np.concatenate([row[1] for row in rows]) if n else np.zeros(0, dtype=np.int32)
+        data = np.concatenate([row[2] for row in rows]) if n else np.zeros(0, dtype=np.float32)
+        self.raw = sparse.csr_matrix((data, indices, indptr), shape=(n, width))
+
+        df = np.bincount(indices, minlength=width)
+        self.idf = (np.log((n + 1) / (df + 1)) + 1).astype(np.float32)
+        # 构建之后才出现的词按只在一篇文档中出现计
+        self.default_idf = np.float32(np.log((n + 1) / 2) + 1)
+        weighted = self.raw.copy()
+        weighted.data = (1 + np.log(weighted.data)) * self.idf[weighted.indices]
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        self.postings = (sparse.diags(1 / norms) @ weighted).T.tocsr()
+
+        self.row_of = {int(doc_id): row for row, doc_id in enumerate(self.ids)}
+        self.alive = np.ones(n, dtype=bool)
+        self.dead = 0
+        self.delta: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta_matrix = None
+
+    def _weights(self, cols: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """词频转换为归一化的 TF-IDF 权重（次数取对数）"""
+        idf = np.full(len(cols), self.default_idf, dtype=np.float32)
+        known = cols < len(self.idf)
+        idf[known] = self.idf[cols[known]]
+        weights = (1 + np.log(counts)) * idf
+        norm = np.sqrt(np.dot(weights, weights))
+        return weights / norm if norm else weights
+
+    def __len__(self) -> int:
+        return len(self.row_of) - self.dead + len(self.delta)
+
+    def add(self, doc_id: int, counts: Counter) -> None:
+        self.remove(doc_id)
+        self.delta[doc_id] = self._term_ids(counts)
+        self._delta_matrix = None
+
+    def remove(self, doc_id: int) -> None:
+        if self.delta.pop(doc_id, None) is not None:
+            self._delta_matrix = None
+        row = self.row_of.get(doc_id)
+        if row is not None and self.alive[row]:
+            self.alive[row] = False
+            self.dead += 1
+
+    def needs_rebuild(self) -> bool:
+        """增量区或失效的文档太多时合并，保证查询仍以主矩阵为主、IDF 不过时"""
+        n = len(self.row_of)
+        return len(self.delta) > max(256, n // 10) or self.dead > max(256, n // 5)
+
+    def rebuild(self) -> None:
+        rows = []
+        for row in np.flatnonzero(self.alive):
+            start, end = self.raw.indptr[row], self.raw.indptr[row + 1]
+            if int(self.ids[row]) not in self.delta:
+                rows.append((int(self.ids[row]), self.raw.indices[start:end], self.raw.data[start:end]))
+        rows.extend((doc_id, cols, counts) for doc_id, (cols, counts) in self.delta.items())
+        self._build(rows)
+
+    def _delta_scores(self, cols: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """增量区文档的得分，增量区的矩阵在有变化（包括词表增加）后的第一次查询时重建"""
+        if not self.delta:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if self._delta_matrix is None:
+            ids = np.fromiter(self.delta.keys(), dtype=np.int64, count=len(self.delta))
+            rows = [self._weights(c, v) for c, v in self.delta.values()]
+            indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum([len(c) for c, _ in self.delta.values()], out=indptr[1:])
+            matrix = sparse.csr_matrix(
+                (np.concatenate(rows), np.concatenate([c for c, _ in self.delta.values()]), indptr),
+                shape=(len(rows), len(self.vocab)))
+            self._delta_matrix = (ids, matrix.T.tocsr())
+        ids, postings = self._delta_matrix
+        return ids, postings[cols].T.dot(weights)
+
+    def similar(self, doc_id: int, limit: int, query_terms: int) -> Optional[List[Tuple[int, float]]]:
+        """与该文档最相似的 limit 篇文档 [(文档ID, 余弦相似度)]，文档不在索引中时返回 None"""
+        if doc_id in self.delta:
+            cols, counts = self.delta[doc_id]
+        else:
+            row = self.row_of.get(doc_id)
+            if row is None or not self.alive[row]:
+                return None
+            start, end = self.raw.indptr[row], self.raw.indptr[row + 1]
+            cols, counts = self.raw.indices[start:end], self.raw.data[start:end]
+        if len(cols) == 0:
+            return []
+
+        weights = self._weights(cols, counts)
+        top = np.argsort(-weights)[:query_terms]
+        cols, weights = cols[top], weights[top]
+
+        in_base = cols < self.postings.shape[0]
+        scores = self.postings[cols[in_base]].T.dot(weights[in_base])
+        scores[~self.alive] = 0
+        delta_ids, delta_scores = self._delta_scores(cols, weights)
+        ids = np.concatenate([self.ids, delta_ids])
+        scores = np.concatenate([scores, delta_scores])
+        scores[ids == doc_id] = 0
+
+        if limit < len(scores):
+            candidates = np.argpartition(-scores, limit)[:limit]
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in candidates if scores[i] > 0]
+
+
+class RelatedIndex:
+    """
+    按用户懒加载的相关文档索引。loader(uid) 返回该用户所有文档的
+    {"id", "title", "summary", "tags", "content"}（正文可以只取前 content_chars 个字符）。
+
+    与 SuggestIndex 相同，加载期间该用户的文档有变化时，加载结果只用于本次请求。
+    """
+
+    def __init__(self, loader: Callable[[int], List[Dict]], max_users: int = 16,
+                 max_terms: int = 100, query_terms: int = 50, content_chars: int = 20000):
+        self.loader = loader
+        self.max_users = max_users
+        # 每篇文档保留的词数，限制矩阵大小
+        self.max_terms = max_terms
+        # 查询时使用的词数，限制一次查询读取的倒排长度
+        self.query_terms = query_terms
+        self.content_chars = content_chars
+        self._users: "OrderedDict[int, _UserVectors]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _vectors(self, uid: int) -> _UserVectors:
+        with self._lock:
+            vectors = self._users.get(uid)
+            if vectors is not None:
+                self._users.move_to_end(uid)
+                return vectors
+            version = self._versions.get(uid, 0)
+
+        vectors = _UserVectors([(doc["id"], doc_terms(doc, self.max_terms, self.content_chars)) for doc in self.loader(uid)])
+
+        with self._lock:
+            if self._versions.get(uid, 0) == version and uid not in self._users:
+                self._users[uid] = vectors
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        return vectors
+
+    def similar(self, uid: int, doc_id: int, limit: int = 10) -> Optional[List[Tuple[int, float]]]:
+        """该用户的文档中与 doc_id 最相似的 limit 篇，doc_id 不属于该用户时返回 None"""
+        vectors = self._vectors(uid)
+        with vectors.lock:
+            if vectors.needs_rebuild():
+                vectors.rebuild()
+            return vectors.similar(doc_id, limit, self.query_terms)
+
+    def on_docs_changed(self, removed: List[Dict], added: List[Dict]) -> None:
+        """文档变更通知：只更新已加载的用户，未加载的用户下次请求时从数据库加载"""
+        with self._lock:
+            for doc in removed + added:
+                self._versions[doc["uid"]] = self._versions.get(doc["uid"], 0) + 1
+            loaded = {uid: self._users[uid] for uid in {doc["uid"] for doc in removed + added}
+                      if uid in self._users}
+        for doc in removed:
+            vectors = loaded.get(doc["uid"])
+            if vectors is not None:
+                with vectors.lock:
+                    vectors.remove(doc["id"])
+        for doc in added:
+            vectors = loaded.get(doc["uid"])
+            if vectors is not None:
+                counts = doc_terms(doc, self.max_terms, self.content_chars)
+                with vectors.lock:
+                    vectors.add(doc["id"], counts)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "max_users": self.max_users,
+                "docs": sum(len(vectors) for vectors in self._users.values()),
+            }
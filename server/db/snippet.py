@@ -0,0 +1,137 @@
+"""
+搜索结果摘要 - 截取关键词附近的一段正文并给出高亮位置
+
+docs_fts 是无内容表，索引里只有二元组词元，FTS5 的 snippet() / highlight() 取不到原文，
+所以由注册到 SQLite 的函数在查询内完成：只对分页后的结果行调用，
+压缩的正文边解压边查找关键词，找到并取够窗口后就停止，不把整篇正文交给上层。
+"""
+import codecs
+import json
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from db.compression import CODEC_ZLIB, decode_prefix
+from db.fts import _TERM_RE, contains_cjk
+
+ELLIPSIS = "..."
+# 边解压边查找时每次解压的字节数
+_CHUNK_SIZE = 16384
+
+
+def keyword_terms(keyword: str) -> List[str]:
+    """高亮用的关键词列表，与 build_match_query 的分词一致；没有可检索的词时整体作为一个词"""
+    terms = _TERM_RE.findall(keyword)
+    if not terms:
+        stripped = keyword.strip()
+        return [stripped] if stripped else []
+    return terms
+
+
+def _is_word_char(ch: str) -> bool:
+    """unicode61 分词器中构成词的非中日文字符"""
+    return (ch.isalnum() or ch == "_") and not contains_cjk(ch)
+
+
+def find_spans(text: str, terms: List[str]) -> List[Tuple[int, int]]:
+    """
+    查找所有关键词出现的位置（不区分大小写），重叠的区间合并。
+
+    与全文索引的匹配方式一致：字母数字开头的词必须从词首开始，
+    除最后一个词（前缀匹配）外还必须到词尾结束；中文按子串匹配。
+    """
+    lowered = text.lower()
+    # 个别字符转小写后长度会变，此时退回区分大小写的查找，保证位置对应原文
+    haystack = lowered if len(lowered) == len(text) else text
+    spans = []
+    for index, term in enumerate(terms):
+        needle = term.lower() if haystack is lowered else term
+        if not needle:
+            continue
+        check_start = _is_word_char(needle[0])
+        check_end = _is_word_char(needle[-1]) and index < len(terms) - 1
+        start = haystack.find(needle)
+        while start != -1:
+            end = start + len(needle)
+            if not (check_start and start > 0 and _is_word_char(haystack[start - 1])) and \
+                    not (check_end and end < len(haystack) and _is_word_char(haystack[end])):
+                spans.append((start, end))
+            start = haystack.find(needle, start + 1)
+    spans.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _text_until_match(codec: Optional[int], data: Any, terms: List[str], width: int) -> str:
+    """
+    取出足够生成摘要的正文前缀：直到第一个关键词之后再多 width 个字符，没有命中时为全文。
+    """
+    if not codec:
+        return data
+    if codec != CODEC_ZLIB:
+        raise ValueError(f"未知的正文编码: {codec}")
+
+    longest = max((len(term) for term in terms), default=0)
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text, scanned, matched_at = "", 0, None
+    for offset in range(0, len(data), _CHUNK_SIZE):
+        text += decoder.decode(decompressor.decompress(data[offset:offset + _CHUNK_SIZE]))
+        if matched_at is None:
+            # 与上一段衔接处可能跨着一个关键词，回退一个关键词的长度再找；
+            # 多回退的一个字符用来判断词首，从这个字符开始的命中不算
+            window_start = max(0, scanned - longest - 1)
+            spans = [span for span in find_spans(text[window_start:], terms)
+                     if window_start == 0 or span[0] > 0]
+            if spans:
+                matched_at = window_start + spans[0][0]
+            scanned = len(text)
+        if matched_at is not None and len(text) >= matched_at + width:
+            return text
+    return text + decoder.decode(decompressor.flush(), final=True)
+
+
+def make_snippet(codec: Optional[int], data: Any, terms: List[str], width: int) -> dict:
+    """
+    生成关键词附近约 width 个字符的摘要，返回 {"text": 摘要, "highlights": [[起, 止], ...]}。
+
+    高亮位置是摘要文本中的字符下标（左闭右开）。正文中没有关键词（只命中标题等）时取开头一段。
+    """
+    if data is None:
+        return {"text": "", "highlights": []}
+    if not terms:
+        text = decode_prefix(codec, data, width + 1) or ""
+        return {"text": text[:width] + (ELLIPSIS if len(text) > width else ""), "highlights": []}
+
+    text = _text_until_match(codec, data, terms, width)
+    spans = find_spans(text, terms)
+    if spans:
+        first_start, first_end = spans[0]
+        # 让第一个命中位于窗口前三分之一处
+        start = max(0, first_start - max(0, width - (first_end - first_start)) // 3)
+    else:
+        start = 0
+    end = min(len(text), start + width)
+    start = max(0, min(start, end - width))
+
+    prefix = ELLIPSIS if start > 0 else ""
+    suffix = ELLIPSIS if end < len(text) else ""
+    highlights = [
+        [max(s, start) - start + len(prefix), min(e, end) - start + len(prefix)]
+        for s, e in spans if s < end and e > start
+    ]
+    return {"text": prefix + text[start:end] + suffix, "highlights": highlights}
+
+
+def snippet_sql(codec: Optional[int], data: Any, terms_json: str, width: int) -> str:
+    """注册为 SQL 函数 notedocs_snippet，结果以 JSON 文本返回"""
+    return json.dumps(make_snippet(codec, data, json.loads(terms_json), width), ensure_ascii=False)
+
+
+def preview_sql(codec: Optional[int], data: Any, length: int) -> Optional[str]:
+    """注册为 SQL 函数 notedocs_preview：正文的前 length 个字符"""
+    return decode_prefix(codec, data, length)
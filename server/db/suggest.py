@@ -0,0 +1,156 @@
+"""
+输入提示 - 按用户在内存中维护标题和标签的有序数组，按前缀二分查找
+
+某个用户第一次请求时才从数据库加载，之后由 NotedocsDB 的写操作通知增量更新；
+超过 max_users 个用户时淘汰最久未使用的用户。
+"""
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from db.tags import normalize_tags
+
+
+class _SortedEntries:
+    """按规范化后的值排序的数组，同一个值出现多次时只计数"""
+
+    def __init__(self):
+        self.keys: List[Tuple[str, str]] = []
+        self.counts: Dict[str, int] = {}
+
+    def extend(self, values: Iterable[str]) -> None:
+        """批量加入后整体排序一次，比逐个插入快得多，用于加载"""
+        for value in values:
+            self.counts[value] = self.counts.get(value, 0) + 1
+        self.keys = sorted((value.strip().lower(), value) for value in self.counts)
+
+    def add(self, value: str) -> None:
+        count = self.counts.get(value, 0)
+        if count == 0:
+            bisect.insort(self.keys, (value.strip().lower(), value))
+        self.counts[value] = count + 1
+
+    def remove(self, value: str) -> None:
+        count = self.counts.get(value, 0)
+        if count <= 1:
+            self.counts.pop(value, None)
+            key = (value.strip().lower(), value)
+            index = bisect.bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+        else:
+            self.counts[value] = count - 1
+
+    def match(self, prefix: str, scan: int) -> List[Tuple[str, int]]:
+        """前缀匹配的前 scan 个值（按字典序）及其计数"""
+        index = bisect.bisect_left(self.keys, (prefix,))
+        result = []
+        while index < len(self.keys) and len(result) < scan:
+            key, value = self.keys[index]
+            if not key.startswith(prefix):
+                break
+            result.append((value, self.counts[value]))
+            index += 1
+        return result
+
+
+class _UserEntries:
+    """一个用户的标题和标签"""
+
+    def __init__(self):
+        self.titles = _SortedEntries()
+        self.tags = _SortedEntries()
+
+    def add_doc(self, title: Optional[str], tags: Optional[str]) -> None:
+        if title:
+            self.titles.add(title)
+        for tag in normalize_tags(tags):
+            self.tags.add(tag)
+
+    def remove_doc(self, title: Optional[str], tags: Optional[str]) -> None:
+        if title:
+            self.titles.remove(title)
+        for tag in normalize_tags(tags):
+            self.tags.remove(tag)
+
+
+class SuggestIndex:
+    """
+    按用户的前缀索引。loader(uid) 返回该用户所有文档的 (title, tags)。
+
+    加载期间如果该用户的文档有变化（version 变了），加载结果只用于本次请求、不放入索引，
+    避免把加载时读到的旧数据留在内存中。
+    """
+
+    def __init__(self, loader: Callable[[int], List[Tuple[str, str]]], max_users: int = 1000,
+                 scan: int = 200):
+        self.loader = loader
+        self.max_users = max_users
+        # 一次查找最多检查的候选数，保证前缀很短时查找时间也有上限
+        self.scan = scan
+        self._users: "OrderedDict[int, _UserEntries]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _entries(self, uid: int) -> _UserEntries:
+        with self._lock:
+            entries = self._users.get(uid)
+            if entries is not None:
+                self._users.move_to_end(uid)
+                return entries
+            version = self._versions.get(uid, 0)
+
+        entries = _UserEntries()
+        docs = self.loader(uid)
+        entries.titles.extend(title for title, _ in docs if title)
+        entries.tags.extend(tag for _, tags in docs for tag in normalize_tags(tags))
+
+        with self._lock:
+            if self._versions.get(uid, 0) == version and uid not in self._users:
+                self._users[uid] = entries
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        return entries
+
+    def lookup(self, uid: int, prefix: str, limit: int = 10) -> Dict[str, List]:
+        """
+        前缀匹配的标题和标签（不区分大小写）。
+
+        标题按字典序返回；标签在前 scan 个候选中按使用次数从多到少返回。
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return {"titles": [], "tags": []}
+        entries = self._entries(uid)
+        with self._lock:
+            titles = entries.titles.match(prefix, limit)
+            tags = entries.tags.match(prefix, self.scan)
+        tags.sort(key=lambda item: (-item[1], item[0]))
+        return {
+            "titles": [title for title, _ in titles],
+            "tags": [{"tag": tag, "count": count} for tag, count in tags[:limit]],
+        }
+
+    def on_docs_changed(self, removed: List[Dict], added: List[Dict]) -> None:
+        """文档变更通知：只更新已加载的用户，未加载的用户下次请求时从数据库加载"""
+        with self._lock:
+            for doc in removed:
+                self._versions[doc["uid"]] = self._versions.get(doc["uid"], 0) + 1
+                entries = self._users.get(doc["uid"])
+                if entries is not None:
+                    entries.remove_doc(doc["title"], doc["tags"])
+            for doc in added:
+                self._versions[doc["uid"]] = self._versions.get(doc["uid"], 0) + 1
+                entries = self._users.get(doc["uid"])
+                if entries is not None:
+                    entries.add_doc(doc["title"], doc["tags"])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "max_users": self.max_users,
+                "titles": sum(len(entries.titles.keys) for entries in self._users.values()),
+                "tags": sum(len(entries.tags.keys) for entries in self._users.values()),
+            }
@@ -0,0 +1,17 @@
+"""
+标签解析 - docs.tags 是逗号分隔的字符串，doc_tags 表存放规范化后的单个标签
+"""
+import re
+from typing import List
+
+# 英文逗号、中文逗号、顿号、分号均视为分隔符
+_TAG_SEPARATOR_RE = re.compile(r"[,，、;；]")
+
+def normalize_tags(tags: str) -> List[str]:
+    """拆分标签字符串：去除首尾空白、转小写、去重并保持原有顺序"""
+    result = []
+    for tag in _TAG_SEPARATOR_RE.split(tags or ""):
+        tag = tag.strip().lower()
+        if tag and tag not in result:
+            result.append(tag)
+    return result
@@ -0,0 +1,89 @@
+"""
+URL 规范化 - 同一个页面的不同写法（跟踪参数、锚点、大小写、默认端口等）得到相同的字符串
+
+规范化后的 URL 存入 docs.canonical_url，用于判断某个页面是否已经保存过，也是文档按用户去重的依据，
+因此只去掉确定不影响页面内容的部分，拿不准的参数一律保留：
+    - 协议和主机名转小写，去掉主机名末尾的点和开头的 www.，http 视同 https
+    - 去掉默认端口和用户名密码
+    - 去掉锚点（#...），但保留单页应用的路由（#/...、#!/...）
+    - 去掉在所有网站上都只用于跟踪的参数（utm_*、fbclid、gclid 等），
+      以及只在特定网站上用于跟踪的参数（如微信公众号文章的 scene、chksm），其余参数按名称排序
+    - 路径末尾的 / 去掉（根路径除外），空路径记为 /
+不是 http/https 的地址（如 about:blank、chrome://）只去掉首尾空白。
+"""
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 在所有网站上都只用于跟踪的参数（参数名转小写后比较）
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+})
+TRACKING_PREFIXES = ("utm_", "hmsr", "hmpl", "hmcu", "hmkw", "hmci")
+
+# 只在这些网站上用于跟踪的参数，按主机名（含子域名）匹配；from、scene 等在其他网站上可能是分页或搜索条件
+HOST_TRACKING_PARAMS = {
+    "mp.weixin.qq.com": frozenset({
+        "scene", "subscene", "srcid", "chksm", "mpshare", "sessionid", "clicktime", "enterid", "from",
+        "isappinstalled", "ascene", "devicetype", "version", "lang", "nettype", "exportkey", "pass_ticket",
+        "key", "uin", "wx_header", "sharer_shareid", "sharer_sharetime", "sharer_shareinfo",
+        "sharer_shareinfo_first",
+    }),
+    "bilibili.com": frozenset({
+        "vd_source", "share_source", "share_medium", "share_plat", "share_session_id", "share_tag",
+        "share_from", "spm_id_from", "from_spmid", "unique_k",
+    }),
+    "baijiahao.baidu.com": frozenset({"wfr", "for"}),
+    "twitter.com": frozenset({"ref_src", "ref_url", "s", "t"}),
+    "x.com": frozenset({"ref_src", "ref_url", "s", "t"}),
+}
+# 阿里系网站的 spm / scm 埋点参数
+for _host in ("taobao.com", "tmall.com", "1688.com", "alibaba.com", "aliyun.com"):
+    HOST_TRACKING_PARAMS[_host] = frozenset({"spm", "scm"})
+
+# 单页应用用锚点表示路由，不同锚点是不同的页面
+_ROUTE_FRAGMENT_PREFIXES = ("/", "!/")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _host_tracking_params(host: str) -> frozenset:
+    """该主机名上额外的跟踪参数"""
+    params = frozenset()
+    for suffix, names in HOST_TRACKING_PARAMS.items():
+        if host == suffix or host.endswith("." + suffix):
+            params |= names
+    return params
+
+
+def canonicalize_url(url: Optional[str]) -> str:
+    """URL 的规范形式，注册为 SQL 函数 notedocs_canonical_url"""
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    host_params = _host_tracking_params(host)
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and port != _DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    params = []
+    for name, value in parse_qsl(parts.query, keep_blank_values=True):
+        lowered = name.lower()
+        if lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES) or lowered in host_params:
+            continue
+        params.append((name, value))
+    fragment = parts.fragment if parts.fragment.startswith(_ROUTE_FRAGMENT_PREFIXES) else ""
+    return urlunsplit(("https", host, path, urlencode(sorted(params)), fragment))
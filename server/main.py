@@ -4,13 +4,23 @@
 from fastapi import FastAPI
 from route import document_router
 from route import category_router
+from route import suggest_router
 from config import API_CONFIG
+from db.database_sqlite import db
+from db.async_db import async_db
 
 app = FastAPI(title="NoteDocs API", description="文档管理系统API", version="1.0.0")
 
 # 注册路由
 app.include_router(document_router)
 app.include_router(category_router)
+app.include_router(suggest_router)
+
+@app.on_event("shutdown")
+async def close_database():
+    """服务退出时关闭数据库线程池和连接池"""
+    async_db.shutdown()
+    db.close()
 
 # 系统接口
 @app.get("/health", summary="健康检查")
@@ -18,6 +28,19 @@ async def health_check():
     """健康检查接口"""
     return {"status": "healthy", "service": "NoteDocs API"}
 
+@app.get("/health/db", summary="数据库连接池状态")
+async def database_health():
+    """连接池、文档缓存、输入提示、相关文档索引和 URL 过滤器的使用情况，用于调整连接池大小和缓存容量"""
+    return {
+        "status": "healthy",
+        "pool": db.get_pool_stats(),
+        "executor": async_db.get_executor_stats(),
+        "cache": db.get_cache_stats(),
+        "suggest": db.get_suggest_stats(),
+        "related": db.get_related_stats(),
+        "urls": db.get_url_filter_stats()
+    }
+
 @app.get("/", summary="API信息")
 async def root():
     """API根路径"""
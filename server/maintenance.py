@@ -0,0 +1,82 @@
+"""
+维护脚本 - 数据库一致性检查等离线任务
+
+用法:
+    python maintenance.py check-counters            # 核对文档计数
+    python maintenance.py check-counters --repair   # 核对并重建不一致的计数
+    python maintenance.py recompress                # 按当前配置重新压缩已有正文
+    python maintenance.py vacuum                    # 整理数据库文件，归还空闲页
+"""
+import argparse
+import os
+import sys
+from db.database_sqlite import db
+
+def check_counters(repair: bool) -> bool:
+    """核对 user_doc_stats / category_doc_stats 与实际数据"""
+    result = db.check_counters(repair=repair)
+    if "error" in result:
+        print(f"❌ 核对失败: {result['error']}")
+        return False
+    
+    if result["consistent"]:
+        print("✅ 计数一致")
+        return True
+    
+    for item in result["user_mismatches"]:
+        print(f"⚠️ 用户 {item['uid']}: 实际 {item['expected']} 篇，计数 {item['actual']}")
+    for item in result["category_mismatches"]:
+        print(f"⚠️ 分类 {item['category_id']}: 实际 {item['expected']} 篇，计数 {item['actual']}")
+    
+    if result["repaired"]:
+        print("🔧 已重建计数表")
+        return True
+    print("💡 使用 --repair 重建计数表")
+    return False
+
+def recompress() -> bool:
+    """把已有正文统一改为 CONTENT_CODEC 配置的编码"""
+    result = db.recompress_content()
+    if "error" in result:
+        print(f"❌ 重新压缩失败: {result['error']}")
+        return False
+    before, after = result["bytes_before"], result["bytes_after"]
+    print(f"✅ 重新编码 {result['rows']} 篇正文: {before / 1048576:.1f}MB -> {after / 1048576:.1f}MB")
+    if result["rows"]:
+        print("💡 执行 vacuum 归还空闲页")
+    return True
+
+def vacuum() -> bool:
+    """VACUUM 数据库，例如正文迁移到 docs_content 之后回收 docs 表腾出的页"""
+    size_before = os.path.getsize(db.db_path)
+    if not db.vacuum():
+        print("❌ 整理失败")
+        return False
+    size_after = os.path.getsize(db.db_path)
+    print(f"✅ 整理完成: {size_before / 1048576:.1f}MB -> {size_after / 1048576:.1f}MB")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="NoteDocs 数据库维护")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    counters = subparsers.add_parser("check-counters", help="核对文档计数")
+    counters.add_argument("--repair", action="store_true", help="不一致时重建计数表")
+    
+    subparsers.add_parser("recompress", help="按当前配置重新压缩已有正文")
+    subparsers.add_parser("vacuum", help="整理数据库文件")
+    
+    args = parser.parse_args()
+    ok = True
+    if args.command == "check-counters":
+        ok = check_counters(args.repair)
+    elif args.command == "recompress":
+        ok = recompress()
+    elif args.command == "vacuum":
+        ok = vacuum()
+    
+    db.close()
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
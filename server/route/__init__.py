@@ -3,5 +3,6 @@
 
 from .document import router as document_router
 from .category import router as category_router
+from .suggest import router as suggest_router
  
-__all__ = ["document_router", "category_router"]
\ No newline at end of file
+__all__ = ["document_router", "category_router", "suggest_router"]
\ No newline at end of file
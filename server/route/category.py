@@ -1,10 +1,17 @@
 """
 文档分类相关路由
 """
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional
-from route.models import CreateCategoryRequest, UpdateCategoryRequest, AddDocToCategoryRequest
-from db.database_sqlite import db
+from route.models import (
+    CreateCategoryRequest, UpdateCategoryRequest, AddDocToCategoryRequest,
+    CategoryDocsBatchRequest, MoveCategoryDocsRequest
+)
+from db.async_db import async_db
+from db.pagination import RECENT_SORT_KEYS, next_cursor
+from db.fields import DOC_LIST_FIELDS
+from route.common import parse_cursor, parse_fields, make_etag, http_date, is_not_modified, validator_headers, not_modified
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
@@ -16,7 +23,7 @@ async def get_categories(
 ):
     """按uid查询所有分类目录"""
     print(f"get_categories: uid={uid}")
-    categories = db.get_categories_by_uid(uid)
+    categories = await async_db.get_categories_by_uid(uid)
     return {
         "success": True,
         "categories": categories,
@@ -26,7 +33,7 @@ async def get_categories(
 @router.post("", summary="创建分类")
 async def create_category(request: CreateCategoryRequest):
     """创建新分类"""
-    category_id = db.create_category(
+    category_id = await async_db.create_category(
         uid=request.uid,
         name=request.name,
         tags=request.tags,
@@ -52,7 +59,7 @@ async def update_category(
     if not any([request.name, request.tags is not None, request.icon is not None]):
         raise HTTPException(status_code=400, detail="至少需要提供一个要更新的字段")
     
-    success = db.update_category_name(
+    success = await async_db.update_category_name(
         category_id=category_id,
         uid=uid,
         name=request.name,
@@ -74,7 +81,7 @@ async def delete_category(
     uid: int = Query(..., description="用户ID，用于权限验证")
 ):
     """删除分类目录（只能删除自己的分类）"""
-    success = db.delete_category(category_id, uid)
+    success = await async_db.delete_category(category_id, uid)
     
     if success:
         return {
@@ -92,7 +99,7 @@ async def add_doc_to_category(
     request: AddDocToCategoryRequest
 ):
     """给分类目录增加文章"""
-    success = db.add_doc_to_category(category_id, request.doc_id)
+    success = await async_db.add_doc_to_category(category_id, request.doc_id)
     
     if success:
         return {
@@ -102,13 +109,64 @@ async def add_doc_to_category(
     else:
         raise HTTPException(status_code=500, detail="添加文档到分类失败")
 
+@router.post("/{category_id}/docs/batch", summary="批量给分类添加文档")
+async def add_docs_to_category(
+    category_id: int,
+    request: CategoryDocsBatchRequest
+):
+    """批量给分类目录增加文章，已在分类中的文档和不存在的文档会被跳过"""
+    added = await async_db.add_docs_to_category(category_id, request.doc_ids)
+    
+    if added is None:
+        raise HTTPException(status_code=500, detail="批量添加文档到分类失败")
+    return {
+        "success": True,
+        "message": f"已添加 {added} 篇文档到分类ID {category_id}",
+        "added": added
+    }
+
+@router.post("/{category_id}/docs/remove", summary="批量从分类中移除文档")
+async def remove_docs_from_category(
+    category_id: int,
+    request: CategoryDocsBatchRequest
+):
+    """批量删除分类目录下的文章"""
+    removed = await async_db.remove_docs_from_category(category_id, request.doc_ids)
+    
+    if removed is None:
+        raise HTTPException(status_code=500, detail="批量从分类移除文档失败")
+    return {
+        "success": True,
+        "message": f"已从分类ID {category_id} 中移除 {removed} 篇文档",
+        "removed": removed
+    }
+
+@router.post("/{category_id}/docs/move", summary="把文档移动到另一个分类")
+async def move_docs_to_category(
+    category_id: int,
+    request: MoveCategoryDocsRequest
+):
+    """把分类目录下的文章移动到目标分类"""
+    if request.target_category_id == category_id:
+        raise HTTPException(status_code=400, detail="目标分类与原分类相同")
+    
+    moved = await async_db.move_docs_to_category(category_id, request.target_category_id, request.doc_ids)
+    
+    if moved is None:
+        raise HTTPException(status_code=404, detail="目标分类不存在或移动失败")
+    return {
+        "success": True,
+        "message": f"已将 {moved} 篇文档从分类ID {category_id} 移动到分类ID {request.target_category_id}",
+        "moved": moved
+    }
+
 @router.delete("/{category_id}/docs/{doc_id}", summary="从分类中移除文档")
 async def remove_doc_from_category(
     category_id: int,
     doc_id: int
 ):
     """删除分类目录下的文章"""
-    success = db.remove_doc_from_category(category_id, doc_id)
+    success = await async_db.remove_doc_from_category(category_id, doc_id)
     
     if success:
         return {
@@ -121,12 +179,28 @@ async def remove_doc_from_category(
 @router.get("/{category_id}/docs", summary="获取分类下的所有文档")
 async def get_docs_by_category(
     category_id: int,
+    request: Request,
+    response: Response,
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
-    offset: int = Query(0, ge=0, description="偏移量")
+    offset: int = Query(0, ge=0, description="偏移量"),
+    cursor: Optional[str] = Query(None, description="游标，传入上一页返回的 next_cursor，优先于 offset"),
+    fields: Optional[str] = Query(None, description="需要返回的字段，逗号分隔（如 title,url），默认全部；id 和排序字段总会返回")
 ):
-    """查询分类目录下的所有文章"""
-    documents = db.get_docs_by_category(category_id, limit, offset)
-    total_count = db.get_category_docs_count(category_id)
+    """查询分类目录下的所有文章，ETag 取自该分类文档列表的 generation"""
+    after = parse_cursor(cursor, RECENT_SORT_KEYS)
+    field_list = parse_fields(fields, DOC_LIST_FIELDS)
+    validator = await async_db.get_category_docs_validator(category_id)
+    if validator is not None:
+        etag = make_etag("category", category_id, validator["generation"])
+        last_modified = http_date(validator["last_modified"])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        response.headers.update(validator_headers(etag, last_modified))
+
+    documents, total_count = await asyncio.gather(
+        async_db.get_docs_by_category(category_id, limit, offset, after, field_list),
+        async_db.get_category_docs_count(category_id)
+    )
     
     return {
         "success": True,
@@ -134,6 +208,7 @@ async def get_docs_by_category(
         "count": total_count,
         "limit": limit,
         "offset": offset,
+        "next_cursor": next_cursor(documents, limit, RECENT_SORT_KEYS),
         "category_id": category_id
     }
 
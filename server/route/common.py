@@ -0,0 +1,93 @@
+"""
+路由公共函数
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response
+from typing import Dict, List, Optional, Sequence
+from db.pagination import decode_cursor
+from db.fields import parse_fields as _parse_fields
+
+def parse_cursor(cursor: Optional[str], sort_keys: tuple) -> Optional[list]:
+    """解析请求中的游标，无效时返回400"""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, len(sort_keys))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """解析请求中的 fields 参数，有未知字段时返回400"""
+    try:
+        return _parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {e}")
+
+# ========== 条件请求（ETag / Last-Modified） ==========
+
+def make_etag(*parts) -> str:
+    """由版本号等片段拼出强 ETag，例如 make_etag("doc", 12, 3) -> "doc-12-3" """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+def parse_if_match(if_match: Optional[str], *parts) -> Optional[List[int]]:
+    """
+    取出 If-Match 中与 make_etag(*parts, 版本号) 格式相同的 ETag 的版本号（强比较，弱 ETag 不算）。
+
+    没有 If-Match 或为 * 时返回 None 表示不检查版本；都不匹配时返回空列表。
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    prefix = make_etag(*parts)[:-1] + "-"
+    versions = []
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            versions.append(int(tag[len(prefix):-1]))
+    return versions
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """SQLite 的 UTC 时间字符串（YYYY-MM-DD HH:MM:SS）转换为 HTTP 日期"""
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.strptime(str(timestamp)[:19], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+    return format_datetime(parsed.replace(tzinfo=timezone.utc), usegmt=True)
+
+def is_conditional(request: Request) -> bool:
+    """请求是否带有 If-None-Match / If-Modified-Since"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """
+    判断客户端缓存是否仍然有效。
+
+    有 If-None-Match 时只比较 ETag（GET 请求按弱比较，忽略 W/ 前缀），
+    否则比较 If-Modified-Since 与 Last-Modified（精确到秒）。
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def validator_headers(etag: str, last_modified: Optional[str]) -> Dict[str, str]:
+    """响应中的缓存校验头，no-cache 要求客户端每次使用缓存前先重新校验"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+def not_modified(etag: str, last_modified: Optional[str]) -> Response:
+    """304 响应，不带响应体"""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -1,17 +1,25 @@
 """
 文档相关路由
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
-from route.models import WriteDocumentRequest, UpdateDocumentRequest
-from db.database_sqlite import db
+import asyncio
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from typing import Dict, Optional
+from route.models import WriteDocumentRequest, UpdateDocumentRequest, BatchWriteDocumentsRequest
+from db.async_db import async_db
+from db.pagination import RECENT_SORT_KEYS, RATED_SORT_KEYS, SEARCH_SORT_KEYS, next_cursor
+from db.fields import DOC_LIST_FIELDS, DOC_SEARCH_FIELDS
+from db.urls import canonicalize_url
+from route.common import (
+    parse_cursor, parse_fields, parse_if_match, make_etag, http_date, is_conditional, is_not_modified,
+    validator_headers, not_modified
+)
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
 @router.post("", summary="创建文档")
 async def create_document(request: WriteDocumentRequest):
-    """创建新文档"""
-    success = db.write_document(
+    """创建新文档，duplicates 为该用户已有的正文近似重复的文档ID"""
+    doc_id = await async_db.write_document(
         uid=request.uid,
         url=request.url,
         title=request.title,
@@ -22,78 +30,190 @@ async def create_document(request: WriteDocumentRequest):
         tags=request.tags,
         evaluate=request.evaluate
     )
-    if success:
-        return {"success": True, "message": f"Document '{request.title}' created successfully"}
-    else:
+    if doc_id is None:
         raise HTTPException(status_code=500, detail="Failed to create document")
+    duplicates = await async_db.get_duplicate_ids([doc_id])
+    return {
+        "success": True,
+        "message": f"Document '{request.title}' created successfully",
+        "id": doc_id,
+        "duplicates": duplicates.get(doc_id, [])
+    }
+
+@router.post("/batch", summary="批量创建文档")
+async def create_documents_batch(request: BatchWriteDocumentsRequest):
+    """批量创建文档（分块事务写入），返回每篇文档的写入结果，duplicates 为近似重复的文档ID"""
+    results = await async_db.write_documents([doc.model_dump() for doc in request.documents])
+    duplicates = await async_db.get_duplicate_ids([item["id"] for item in results if item["success"]])
+    for item in results:
+        item["duplicates"] = duplicates.get(item["id"], [])
+    succeeded = sum(1 for item in results if item["success"])
+    return {
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
 
 @router.get("/id/{doc_id}", summary="根据ID获取文档")
-async def get_document_by_id(doc_id: int):
-    """根据ID获取文档"""
-    document = db.read_document_by_id(doc_id)
+async def get_document_by_id(doc_id: int, request: Request, response: Response):
+    """根据ID获取文档，支持 If-None-Match / If-Modified-Since 条件请求"""
+    if is_conditional(request):
+        # 只按主键查版本号，未修改时直接返回 304，不读取正文
+        validator = await async_db.get_document_validator(doc_id)
+        if validator is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        etag = make_etag("doc", doc_id, validator["version"])
+        last_modified = http_date(validator["updated_at"])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+
+    document = await async_db.read_document_by_id(doc_id)
     if document is None:
         raise HTTPException(status_code=404, detail="Document not found")
+    response.headers.update(validator_headers(
+        make_etag("doc", doc_id, document["version"]), http_date(document["updated_at"])))
     return document
 
+@router.get("/id/{doc_id}/related", summary="获取相关文档")
+async def get_related_documents(
+    doc_id: int,
+    limit: int = Query(10, ge=1, le=50, description="返回数量")
+):
+    """同一用户的其他文档中内容与该文档最相似的几篇（TF-IDF 余弦相似度，score 越大越相似）"""
+    results = await async_db.get_related_documents(doc_id, limit)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "doc_id": doc_id,
+        "results": results,
+        "count": len(results)
+    }
+
+@router.api_route("/exists", methods=["GET", "HEAD"], summary="判断页面是否已保存")
+async def document_exists(
+    request: Request,
+    uid: int = Query(..., description="用户ID"),
+    url: str = Query(..., description="页面URL，按规范化后的形式比较（忽略跟踪参数、锚点等）")
+):
+    """
+    该用户是否保存过这个页面。HEAD 请求以状态码表示：200 已保存，404 未保存；
+    GET 请求返回 exists 及已保存的文档。未保存时由内存中的布隆过滤器直接回答，不查询数据库。
+    """
+    document = await async_db.find_document_by_url(uid, url)
+    if request.method == "HEAD":
+        return Response(status_code=200 if document else 404)
+    return {
+        "uid": uid,
+        "url": url,
+        "canonical_url": canonicalize_url(url),
+        "exists": document is not None,
+        "document": document
+    }
+
+@router.get("/id/{doc_id}/duplicates", summary="获取近似重复文档")
+async def get_duplicate_documents(doc_id: int):
+    """同一用户的文档中正文与该文档近似重复的文档（MinHash 签名），similarity 为估计的词组集合相似度"""
+    results = await async_db.find_duplicates(doc_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "doc_id": doc_id,
+        "results": results,
+        "count": len(results)
+    }
+
+@router.get("/duplicates", summary="列出近似重复文档分组")
+async def list_duplicate_clusters(
+    uid: int = Query(..., description="用户ID"),
+    limit: int = Query(50, ge=1, le=200, description="返回的分组数")
+):
+    """该用户正文近似重复的文档分组，按组内文档数从多到少排列"""
+    clusters = await async_db.get_duplicate_clusters(uid, limit)
+    return {
+        "uid": uid,
+        "clusters": clusters,
+        "count": len(clusters)
+    }
+
 @router.get("", summary="列出文档")
 async def list_documents(
+    request: Request,
+    response: Response,
     uid: Optional[int] = Query(None, description="用户ID过滤"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
-    offset: int = Query(0, ge=0, description="偏移量")
+    offset: int = Query(0, ge=0, description="偏移量"),
+    cursor: Optional[str] = Query(None, description="游标，传入上一页返回的 next_cursor，优先于 offset"),
+    fields: Optional[str] = Query(None, description="需要返回的字段，逗号分隔（如 title,url），默认全部；id 和排序字段总会返回")
 ):
-    """列出文档（支持分页和用户过滤）"""
-    documents = db.list_documents(uid=uid, limit=limit, offset=offset)
-    total_count = db.get_documents_count(uid=uid)
+    """列出文档（支持游标/偏移分页和用户过滤），ETag 取自该用户文档列表的 generation"""
+    after = parse_cursor(cursor, RECENT_SORT_KEYS)
+    field_list = parse_fields(fields, DOC_LIST_FIELDS)
+    # 先取版本再查数据：期间有写入时返回的 ETag 偏旧，只会导致下次多传一次，不会让客户端留着旧数据
+    validator = await async_db.get_documents_validator(uid)
+    if validator is not None:
+        etag = make_etag("docs", "all" if uid is None else uid, validator["generation"])
+        last_modified = http_date(validator["last_modified"])
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        response.headers.update(validator_headers(etag, last_modified))
+
+    # 分页查询和计数互不依赖，并发执行
+    documents, total_count = await asyncio.gather(
+        async_db.list_documents(uid=uid, limit=limit, offset=offset, after=after, fields=field_list),
+        async_db.get_documents_count(uid=uid)
+    )
     return {
         "documents": documents, 
         "count": total_count,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": next_cursor(documents, limit, RECENT_SORT_KEYS)
     }
 
+def _check_patch_result(doc_id: int, result: Optional[Dict]) -> Dict:
+    """patch_document 的结果转换为错误响应：文档不存在 404，版本不一致 412，与同一用户的其他文档 URL 重复 409"""
+    if result is None:
+        raise HTTPException(status_code=500, detail="Failed to update document")
+    if result["status"] == "not_found":
+        raise HTTPException(status_code=404, detail="Document not found")
+    if result["status"] == "precondition_failed":
+        raise HTTPException(status_code=412, detail="Document has been modified",
+                            headers={"ETag": make_etag("doc", doc_id, result["version"])})
+    if result["status"] == "conflict":
+        raise HTTPException(status_code=409, detail="Another document of this user has the same URL")
+    return result
+
 @router.put("/id/{doc_id}", summary="更新文档")
 async def update_document(doc_id: int, request: UpdateDocumentRequest):
-    """更新文档（通过ID）"""
-    
-    print(f"更新文档ID: {doc_id}")
-    
-    # 先获取原文档
-    existing_doc = db.read_document_by_id(doc_id)
-    if existing_doc is None:
-        print(f"错误: 文档ID {doc_id} 不存在")
-        raise HTTPException(status_code=404, detail="Document not found")
-        
-    # 合并更新数据
-    updated_data = {
-        "uid": request.uid if request.uid is not None else existing_doc["uid"],
-        "url": request.url if request.url is not None else existing_doc["url"],
-        "title": request.title if request.title is not None else existing_doc["title"],
-        "summary": request.summary if request.summary is not None else existing_doc["summary"],
-        "content": request.content if request.content is not None else existing_doc["content"],
-        "source": request.source if request.source is not None else existing_doc["source"],
-        "favicon": request.favicon if request.favicon is not None else existing_doc["favicon"],
-        "tags": request.tags if request.tags is not None else existing_doc["tags"],
-        "evaluate": request.evaluate if request.evaluate is not None else existing_doc["evaluate"]
-    }
-    
-    # 检查内容是否真的有变化
-    if request.content is not None:
-        print(f"内容更新: 原内容长度={len(existing_doc.get('content', ''))}, 新内容长度={len(request.content)}")
-        print(f"内容是否相同: {existing_doc.get('content', '') == request.content}")
-    
-    success = db.update_document_by_id(doc_id, **updated_data)
-    print(f"数据库更新结果: {success}")
-    
-    if success:
-        return {"success": True, "message": f"Document with ID {doc_id} updated successfully"}
-    else:
-        print(f"错误: 数据库更新失败")
-        raise HTTPException(status_code=500, detail="Failed to update document")
+    """更新文档（通过ID），只写入给出的、有变化的字段"""
+    result = await async_db.patch_document(doc_id, request.model_dump(exclude_none=True))
+    _check_patch_result(doc_id, result)
+    return {"success": True, "message": f"Document with ID {doc_id} updated successfully"}
+
+@router.patch("/id/{doc_id}", summary="部分更新文档")
+async def patch_document(
+    doc_id: int,
+    request: UpdateDocumentRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="文档的 ETag，与当前版本不一致时返回 412")
+):
+    """
+    部分更新文档：一条 UPDATE 只写入给出的、与当前值不同的字段，都相同时不写入（changed 为 false）。
+    没有给出正文时不读取也不重写正文。响应头中的 ETag 为更新后的版本。
+    """
+    result = await async_db.patch_document(doc_id, request.model_dump(exclude_none=True),
+                                           parse_if_match(if_match, "doc", doc_id))
+    _check_patch_result(doc_id, result)
+    response.headers.update(validator_headers(
+        make_etag("doc", doc_id, result["version"]), http_date(result["updated_at"])))
+    return {"success": True, "changed": result["status"] == "updated", "version": result["version"]}
 
 @router.delete("/id/{doc_id}", summary="根据ID删除文档")
 async def delete_document_by_id(doc_id: int):
     """根据ID删除文档"""
-    success = db.delete_document_by_id(doc_id)
+    success = await async_db.delete_document_by_id(doc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Document not found")
     return {"success": True, "message": f"Document with ID {doc_id} deleted successfully"}
@@ -103,31 +223,54 @@ async def search_documents(
     keyword: str = Query(..., description="搜索关键词"),
     uid: Optional[int] = Query(None, description="用户ID过滤"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
-    offset: int = Query(0, ge=0, description="偏移量")
+    offset: int = Query(0, ge=0, description="偏移量"),
+    cursor: Optional[str] = Query(None, description="游标，传入上一页返回的 next_cursor，优先于 offset。"
+                                                    "score 含 BM25 的全库统计量，两次翻页之间有文档写入或删除时"
+                                                    "所有 score 都会变化，可能漏掉或重复个别结果"),
+    fields: Optional[str] = Query(None, description="需要返回的字段，逗号分隔（如 title,url），默认全部；id 和排序字段总会返回"),
+    fuzzy: bool = Query(False, description="模糊匹配标题和标签，容忍拼写错误和只输入半个词")
 ):
-    """搜索文档（支持多字段搜索、用户过滤和分页）"""
-    results = db.search_documents(keyword=keyword, uid=uid, limit=limit, offset=offset)
+    """
+    搜索文档（支持多字段搜索、用户过滤和分页），按相关度排序分 score 从高到低排列。
+
+    游标按 (score, id) 翻页，只在两次请求之间没有写入时保证不漏不重：score 中的 BM25 依赖全库的文档数和词频，
+    任何写入或删除都会改变已有结果的 score。
+    """
+    after = parse_cursor(cursor, SEARCH_SORT_KEYS)
+    field_list = parse_fields(fields, DOC_SEARCH_FIELDS)
+    results = await async_db.search_documents(keyword=keyword, uid=uid, limit=limit, offset=offset,
+                                              after=after, fields=field_list, fuzzy=fuzzy)
     return {
         "results": results, 
         "count": len(results),
         "keyword": keyword,
+        "fuzzy": fuzzy,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": next_cursor(results, limit, SEARCH_SORT_KEYS)
     }
 
 @router.get("/tags/{tag}", summary="根据标签获取文档")
 async def get_documents_by_tag(
     tag: str,
     uid: Optional[int] = Query(None, description="用户ID过滤"),
+    mode: str = Query("any", pattern="^(any|all)$", description="多个标签（逗号分隔）时：any 包含任一，all 包含全部"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
-    offset: int = Query(0, ge=0, description="偏移量")
+    offset: int = Query(0, ge=0, description="偏移量"),
+    cursor: Optional[str] = Query(None, description="游标，传入上一页返回的 next_cursor，优先于 offset"),
+    fields: Optional[str] = Query(None, description="需要返回的字段，逗号分隔（如 title,url），默认全部；id 和排序字段总会返回")
 ):
-    """根据标签获取文档"""
-    results = db.get_documents_by_tag(tag=tag, uid=uid, limit=limit, offset=offset)
+    """根据标签获取文档（标签完整匹配，支持多个标签的与/或查询）"""
+    after = parse_cursor(cursor, RATED_SORT_KEYS)
+    field_list = parse_fields(fields, DOC_LIST_FIELDS)
+    results = await async_db.get_documents_by_tag(tag=tag, uid=uid, limit=limit, offset=offset,
+                                                  match_all=(mode == "all"), after=after, fields=field_list)
     return {
         "results": results,
         "count": len(results),
         "tag": tag,
+        "mode": mode,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": next_cursor(results, limit, RATED_SORT_KEYS)
     } 
\ No newline at end of file
@@ -1,8 +1,8 @@
 """
 数据模型定义
 """
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class WriteDocumentRequest(BaseModel):
     uid: int
@@ -15,6 +15,9 @@ class WriteDocumentRequest(BaseModel):
     tags: str = ""
     evaluate: int = 0
 
+class BatchWriteDocumentsRequest(BaseModel):
+    documents: List[WriteDocumentRequest] = Field(..., min_length=1, max_length=5000)
+
 class UpdateDocumentRequest(BaseModel):
     uid: Optional[int] = None
     url: Optional[str] = None
@@ -40,6 +43,13 @@ class UpdateCategoryRequest(BaseModel):
 class AddDocToCategoryRequest(BaseModel):
     doc_id: int 
 
+class CategoryDocsBatchRequest(BaseModel):
+    doc_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class MoveCategoryDocsRequest(BaseModel):
+    target_category_id: int
+    doc_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
 class WriteCategoryRequest(BaseModel):
     uid: int
     name: str
@@ -0,0 +1,22 @@
+"""
+输入提示相关路由
+"""
+from fastapi import APIRouter, Query
+from db.async_db import async_db
+
+router = APIRouter(prefix="/api/suggest", tags=["suggest"])
+
+@router.get("", summary="标题和标签输入提示")
+async def suggest(
+    uid: int = Query(..., description="用户ID"),
+    prefix: str = Query(..., min_length=1, max_length=100, description="已输入的前缀（不区分大小写）"),
+    limit: int = Query(10, ge=1, le=50, description="标题和标签各返回的最大数量")
+):
+    """按前缀提示该用户已有的文档标题和标签，从内存中的前缀索引查找（每个用户只在首次请求时从数据库加载）"""
+    result = await async_db.suggest(uid, prefix, limit)
+    return {
+        "uid": uid,
+        "prefix": prefix,
+        "titles": result["titles"],
+        "tags": result["tags"]
+    }
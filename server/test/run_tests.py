@@ -44,6 +44,20 @@ def main():
     tests = [
         ("test_category_simple.py", "分类API快速测试"),
         ("test_category_api.py", "分类API完整测试"),
+        ("test_search.py", "全文搜索测试"),
+        ("test_suggest.py", "输入提示测试"),
+        ("test_related.py", "相关文档测试"),
+        ("test_duplicates.py", "近似重复检测测试"),
+        ("test_exists.py", "已保存页面判断测试"),
+        ("test_upsert.py", "重复保存测试"),
+        ("test_patch.py", "部分更新测试"),
+        ("test_fts.py", "MySQL 全文检索表达式测试"),
+        ("test_batch.py", "批量写入测试"),
+        ("test_category_batch.py", "分类批量操作测试"),
+        ("test_conditional.py", "条件请求测试"),
+        ("test_tags.py", "标签查询测试"),
+        ("test_pagination.py", "游标分页测试"),
+        ("test_fields.py", "字段投影测试"),
         # 可以添加更多测试文件
         # ("test_document_api.py", "文档API测试"),
         # ("test_db.py", "数据库功能测试"),
@@ -0,0 +1,93 @@
+"""
+批量写入测试脚本 - 验证 /api/documents/batch 的分块写入、同一批中的重复页面及分块失败后改为逐篇写入
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1010
+# 超过一个分块（500 篇），第二个分块中有一篇无法写入的文档
+DOC_COUNT = 600
+BAD_INDEX = 550
+
+def make_doc(i, **changes):
+    doc = {
+        "uid": TEST_UID,
+        "url": f"https://example.com/batch-test/{i}",
+        "title": f"Batch test {i}",
+        "summary": "批量写入测试",
+        "content": f"用于批量写入测试的文档正文 {i}",
+        "tags": "batch"
+    }
+    doc.update(changes)
+    return doc
+
+def write_batch(documents):
+    return requests.post(f"{BASE_URL}/api/documents/batch", json={"documents": documents}).json()
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_batch():
+    """分块写入、重复提交、同一批中的重复页面和分块失败后逐篇写入"""
+    failed = 0
+    doc_ids = set()
+
+    print(f"🔸 测试写入 {DOC_COUNT} 篇文档（两个分块，第二个分块中有一篇无法写入）...")
+    documents = [make_doc(i) for i in range(DOC_COUNT)]
+    # 单独的代理对字符无法编码为 UTF-8，整个分块写入失败后改为逐篇写入，只有这一篇失败
+    documents[BAD_INDEX]["summary"] = "无法写入的摘要 \ud800"
+    response = write_batch(documents)
+    results = response["results"]
+    doc_ids.update(item["id"] for item in results if item["id"])
+    failed += check("总数", response["total"], DOC_COUNT)
+    failed += check("成功数", response["succeeded"], DOC_COUNT - 1)
+    failed += check("失败的文档", [item["index"] for item in results if not item["success"]], [BAD_INDEX])
+    failed += check("失败原因非空", bool(results[BAD_INDEX]["error"]), True)
+    failed += check("其余文档都是新写入", all(item["changed"] for item in results if item["success"]), True)
+    failed += check("文档ID不重复", len(doc_ids), DOC_COUNT - 1)
+    for index in (0, BAD_INDEX - 1, BAD_INDEX + 1, DOC_COUNT - 1):
+        document = requests.get(f"{BASE_URL}/api/documents/id/{results[index]['id']}").json()
+        failed += check(f"第 {index} 篇的标题", document["title"], f"Batch test {index}")
+    count = requests.get(f"{BASE_URL}/api/documents", params={"uid": TEST_UID, "limit": 1}).json()["count"]
+    failed += check("该用户的文档数", count, DOC_COUNT - 1)
+
+    print("🔸 测试重复提交和同一批中的重复页面...")
+    response = write_batch([make_doc(0), make_doc(1, summary="修改后的摘要"),
+                            make_doc(2, title="Batch test 2 (old)"),
+                            make_doc(2, url="http://www.example.com/batch-test/2/", title="Batch test 2 (new)"),
+                            make_doc(0, title="")])
+    results = response["results"]
+    failed += check("内容相同", (results[0]["success"], results[0]["changed"]), (True, False))
+    failed += check("修改摘要", results[1]["changed"], True)
+    failed += check("同一页面的两篇得到同一ID", results[2]["id"] == results[3]["id"], True)
+    document = requests.get(f"{BASE_URL}/api/documents/id/{results[3]['id']}").json()
+    failed += check("同一页面以最后一篇为准", document["title"], "Batch test 2 (new)")
+    failed += check("标题为空", (results[4]["success"], results[4]["error"]), (False, "title 不能为空"))
+    count = requests.get(f"{BASE_URL}/api/documents", params={"uid": TEST_UID, "limit": 1}).json()["count"]
+    failed += check("文档数不变", count, DOC_COUNT - 1)
+
+    for doc_id in doc_ids:
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 批量写入测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_batch()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个批量写入用例失败")
+        sys.exit(1)
+    print("\n🎉 批量写入测试通过！")
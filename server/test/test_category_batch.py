@@ -0,0 +1,97 @@
+"""
+分类批量操作测试脚本 - 验证 /api/categories/{id}/docs/batch、/docs/remove 和 /docs/move
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1011
+MISSING_ID = 999999999
+
+def create_doc(i):
+    return requests.post(f"{BASE_URL}/api/documents", json={
+        "uid": TEST_UID,
+        "url": f"https://example.com/category-batch-test/{i}",
+        "title": f"Category batch test {i}",
+        "summary": "分类批量操作测试",
+        "content": f"用于分类批量操作测试的文档 {i}",
+        "tags": ""
+    }).json()["id"]
+
+def create_category(name):
+    return requests.post(f"{BASE_URL}/api/categories",
+                         json={"uid": TEST_UID, "name": name}).json()["category_id"]
+
+def category_docs(category_id):
+    response = requests.get(f"{BASE_URL}/api/categories/{category_id}/docs", params={"limit": 100}).json()
+    return sorted(doc["id"] for doc in response["documents"]), response["count"]
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_category_batch():
+    """批量添加、批量移除和移动（包括移动到同一分类和不存在的分类）"""
+    failed = 0
+    doc_ids = [create_doc(i) for i in range(4)]
+    source = create_category("Category batch test: source")
+    target = create_category("Category batch test: target")
+
+    print("🔸 测试批量添加...")
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/batch",
+                             json={"doc_ids": doc_ids + [doc_ids[0], MISSING_ID]}).json()
+    failed += check("重复和不存在的文档被跳过", response["added"], 4)
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/batch", json={"doc_ids": doc_ids}).json()
+    failed += check("已在分类中的文档被跳过", response["added"], 0)
+    failed += check("分类中的文档和计数", category_docs(source), (sorted(doc_ids), 4))
+
+    print("🔸 测试批量移除...")
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/remove",
+                             json={"doc_ids": [doc_ids[3], MISSING_ID]}).json()
+    failed += check("移除数", response["removed"], 1)
+    failed += check("移除后的文档和计数", category_docs(source), (sorted(doc_ids[:3]), 3))
+
+    print("🔸 测试移动...")
+    requests.post(f"{BASE_URL}/api/categories/{target}/docs", json={"doc_id": doc_ids[0]})
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/move",
+                             json={"target_category_id": target, "doc_ids": doc_ids[:2]}).json()
+    failed += check("移动数（含已在目标分类中的文档）", response["moved"], 2)
+    failed += check("原分类", category_docs(source), ([doc_ids[2]], 1))
+    failed += check("目标分类", category_docs(target), (sorted(doc_ids[:2]), 2))
+
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/move",
+                             json={"target_category_id": source, "doc_ids": [doc_ids[2]]})
+    failed += check("移动到同一分类", response.status_code, 400)
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/move",
+                             json={"target_category_id": MISSING_ID, "doc_ids": [doc_ids[2]]})
+    failed += check("移动到不存在的分类", response.status_code, 404)
+    failed += check("移动失败后原分类不变", category_docs(source), ([doc_ids[2]], 1))
+    response = requests.post(f"{BASE_URL}/api/categories/{source}/docs/move",
+                             json={"target_category_id": target, "doc_ids": []})
+    failed += check("空的文档列表", response.status_code, 422)
+
+    for category_id in (source, target):
+        requests.delete(f"{BASE_URL}/api/categories/{category_id}", params={"uid": TEST_UID})
+    for doc_id in doc_ids:
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 分类批量操作测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_category_batch()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个分类批量操作用例失败")
+        sys.exit(1)
+    print("\n🎉 分类批量操作测试通过！")
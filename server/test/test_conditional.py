@@ -0,0 +1,99 @@
+"""
+条件请求测试脚本 - 验证单篇文档、文档列表和分类文档列表的 ETag / Last-Modified 及 304 响应，写入后 ETag 失效
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1012
+
+TEST_DOC = {
+    "uid": TEST_UID,
+    "url": "https://example.com/conditional-test/article",
+    "title": "Conditional test article",
+    "summary": "条件请求测试",
+    "content": "用于条件请求测试的文档正文",
+    "tags": "conditional"
+}
+
+def get(path, **headers):
+    return requests.get(f"{BASE_URL}{path}", headers=headers)
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def check_cached(name, path, write):
+    """首次请求取得 ETag，带上它再请求应为 304；执行 write 后应为 200 且 ETag 不同"""
+    failed = 0
+    response = get(path)
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    failed += check(f"{name} 有 ETag 和 Last-Modified", bool(etag and last_modified), True)
+    response = get(path, **{"If-None-Match": etag})
+    failed += check(f"{name} If-None-Match", (response.status_code, response.content), (304, b""))
+    failed += check(f"{name} 304 的 ETag", response.headers.get("ETag"), etag)
+    failed += check(f"{name} 弱 ETag", get(path, **{"If-None-Match": f'W/{etag}'}).status_code, 304)
+    failed += check(f"{name} If-Modified-Since", get(path, **{"If-Modified-Since": last_modified}).status_code, 304)
+    failed += check(f"{name} 其他 ETag", get(path, **{"If-None-Match": '"other"'}).status_code, 200)
+
+    write()
+    response = get(path, **{"If-None-Match": etag})
+    failed += check(f"{name} 写入后", response.status_code, 200)
+    failed += check(f"{name} 写入后 ETag 变化", response.headers.get("ETag") != etag, True)
+    return failed
+
+def test_conditional():
+    """单篇文档、该用户的文档列表和分类文档列表"""
+    failed = 0
+    doc_id = requests.post(f"{BASE_URL}/api/documents", json=TEST_DOC).json()["id"]
+    category_id = requests.post(f"{BASE_URL}/api/categories",
+                                json={"uid": TEST_UID, "name": "Conditional test"}).json()["category_id"]
+    requests.post(f"{BASE_URL}/api/categories/{category_id}/docs", json={"doc_id": doc_id})
+
+    print("🔸 测试单篇文档...")
+    failed += check_cached("文档", f"/api/documents/id/{doc_id}",
+                           lambda: requests.patch(f"{BASE_URL}/api/documents/id/{doc_id}", json={"evaluate": 3}))
+    failed += check("不存在的文档", get("/api/documents/id/999999999", **{"If-None-Match": '"doc-1-1"'}).status_code,
+                    404)
+
+    print("🔸 测试文档列表...")
+    other_ids = []
+
+    def create_other():
+        other = dict(TEST_DOC, url=TEST_DOC["url"] + "/other", title="Conditional test other")
+        other_ids.append(requests.post(f"{BASE_URL}/api/documents", json=other).json()["id"])
+
+    failed += check_cached("文档列表", f"/api/documents?uid={TEST_UID}", create_other)
+
+    print("🔸 测试分类文档列表...")
+    failed += check_cached("分类（修改分类中的文档）", f"/api/categories/{category_id}/docs",
+                           lambda: requests.patch(f"{BASE_URL}/api/documents/id/{doc_id}",
+                                                  json={"title": "Conditional test renamed"}))
+    failed += check_cached("分类（添加文档）", f"/api/categories/{category_id}/docs",
+                           lambda: requests.post(f"{BASE_URL}/api/categories/{category_id}/docs",
+                                                 json={"doc_id": other_ids[0]}))
+
+    requests.delete(f"{BASE_URL}/api/categories/{category_id}", params={"uid": TEST_UID})
+    for item in [doc_id] + other_ids:
+        requests.delete(f"{BASE_URL}/api/documents/id/{item}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 条件请求测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_conditional()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个条件请求用例失败")
+        sys.exit(1)
+    print("\n🎉 条件请求测试通过！")
@@ -0,0 +1,77 @@
+"""
+近似重复检测测试脚本 - 验证写入时的 duplicates 标记、按文档和按用户的查询及修改、删除后的结果
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1005
+
+ARTICLE = ("SQLite 的 WAL 模式把写入追加到单独的日志文件，读操作不会被写操作阻塞。"
+           "检查点会把日志中的页写回数据库文件，日志过大时应当手动执行检查点。"
+           "busy_timeout 让写锁冲突的连接等待一段时间而不是立即报错，"
+           "synchronous 设为 NORMAL 时只在检查点时同步磁盘，性能明显提升。")
+
+def create(title, content):
+    data = {"uid": TEST_UID, "url": f"http://test.com/duplicates/{title}", "title": title,
+            "summary": "近似重复测试", "content": content, "tags": ""}
+    return requests.post(f"{BASE_URL}/api/documents", json=data).json()
+
+def clusters():
+    data = requests.get(f"{BASE_URL}/api/documents/duplicates", params={"uid": TEST_UID}).json()
+    return [[doc["id"] for doc in cluster["documents"]] for cluster in data["clusters"]]
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_duplicates():
+    """写入原文、转载和无关文档后查询，再修改、删除转载"""
+    failed = 0
+    print("🔸 测试写入时的标记...")
+    original = create("Duplicates test: 原文", ARTICLE)
+    repost = create("Duplicates test: 转载", "本文转载自技术博客。" + ARTICLE + "如有侵权请联系删除。")
+    other = create("Duplicates test: 无关", "今天去山里徒步，沿着溪水走了三个小时，中午在山顶的小店吃了一碗面。" * 2)
+    failed += check("原文", original["duplicates"], [])
+    failed += check("转载", repost["duplicates"], [original["id"]])
+    failed += check("无关", other["duplicates"], [])
+
+    print("🔸 测试查询...")
+    response = requests.get(f"{BASE_URL}/api/documents/id/{original['id']}/duplicates").json()
+    failed += check("原文的近似重复", [doc["id"] for doc in response["results"]], [repost["id"]])
+    failed += check("分组", clusters(), [[original["id"], repost["id"]]])
+    status = requests.get(f"{BASE_URL}/api/documents/id/999999999/duplicates").status_code
+    failed += check("不存在的文档", status, 404)
+
+    print("🔸 测试修改和删除后的结果...")
+    requests.put(f"{BASE_URL}/api/documents/id/{repost['id']}",
+                 json={"content": "这一篇改写成了完全不同的内容，讲的是如何在家里烤出外脆里软的面包。" * 2})
+    failed += check("修改后的分组", clusters(), [])
+    requests.put(f"{BASE_URL}/api/documents/id/{repost['id']}", json={"content": ARTICLE})
+    failed += check("改回后的分组", clusters(), [[original["id"], repost["id"]]])
+    requests.delete(f"{BASE_URL}/api/documents/id/{repost['id']}")
+    failed += check("删除后的分组", clusters(), [])
+
+    for doc in (original, other):
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc['id']}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 近似重复检测测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+    
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+    
+    failed = test_duplicates()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个近似重复检测用例失败")
+        sys.exit(1)
+    print("\n🎉 近似重复检测测试通过！")
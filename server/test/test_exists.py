@@ -0,0 +1,97 @@
+"""
+已保存页面判断测试脚本 - 验证 /api/documents/exists 的 URL 规范化、GET/HEAD 响应及写入、修改、删除后的结果
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1006
+
+TEST_DOC = {
+    "uid": TEST_UID,
+    "url": "https://Example.com/exists-test/article/?utm_source=newsletter&id=42#comments",
+    "title": "Exists test: article",
+    "summary": "已保存页面判断测试",
+    "content": "用于已保存页面判断测试的文档",
+    "tags": ""
+}
+
+def exists(url):
+    response = requests.get(f"{BASE_URL}/api/documents/exists", params={"uid": TEST_UID, "url": url})
+    return response.json()["exists"]
+
+def head(url):
+    return requests.head(f"{BASE_URL}/api/documents/exists", params={"uid": TEST_UID, "url": url}).status_code
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_exists():
+    """保存前后、修改 URL 后和删除后分别查询"""
+    failed = 0
+    print("🔸 保存前先查询一次，让该用户的过滤器加载到内存...")
+    failed += check("保存前", exists(TEST_DOC["url"]), False)
+
+    doc_id = requests.post(f"{BASE_URL}/api/documents", json=TEST_DOC).json()["id"]
+
+    print("🔸 测试 URL 规范化...")
+    failed += check("原始 URL", exists(TEST_DOC["url"]), True)
+    failed += check("http、www、无跟踪参数", exists("http://www.example.com/exists-test/article?id=42"), True)
+    failed += check("不同的参数", exists("https://example.com/exists-test/article?id=43"), False)
+    failed += check("HEAD 已保存", head("https://example.com/exists-test/article?id=42"), 200)
+    failed += check("HEAD 未保存", head("https://example.com/exists-test/other"), 404)
+    response = requests.get(f"{BASE_URL}/api/documents/exists", params={"uid": TEST_UID, "url": TEST_DOC["url"]}).json()
+    failed += check("canonical_url", response["canonical_url"], "https://example.com/exists-test/article?id=42")
+    failed += check("document.id", response["document"]["id"], doc_id)
+    failed += check("其他用户", requests.get(f"{BASE_URL}/api/documents/exists",
+                                         params={"uid": TEST_UID + 1, "url": TEST_DOC["url"]}).json()["exists"], False)
+
+    print("🔸 测试修改后再次保存同一页面不增加过滤器的 URL 数...")
+    urls = requests.get(f"{BASE_URL}/health/db").json()["urls"]["urls"]
+    for summary in ("再次保存 1", "再次保存 2"):
+        requests.post(f"{BASE_URL}/api/documents", json=dict(TEST_DOC, summary=summary))
+    failed += check("过滤器 URL 数", requests.get(f"{BASE_URL}/health/db").json()["urls"]["urls"], urls)
+
+    print("🔸 测试只在特定网站上去掉的参数和锚点路由...")
+    for url in ("https://example.com/exists-test/search?q=x&from=0", "https://example.com/exists-test/#/doc/1",
+                "https://mp.weixin.qq.com/s?__biz=exists&mid=1&sn=test&scene=21&chksm=ab#wechat_redirect"):
+        requests.post(f"{BASE_URL}/api/documents", json=dict(TEST_DOC, url=url, title=f"Exists test: {url}"))
+    failed += check("from=0 已保存", exists("https://example.com/exists-test/search?q=x&from=0"), True)
+    failed += check("from=20 是另一页", exists("https://example.com/exists-test/search?q=x&from=20"), False)
+    failed += check("#/doc/1 已保存", exists("https://example.com/exists-test/#/doc/1"), True)
+    failed += check("#/doc/2 是另一个路由", exists("https://example.com/exists-test/#/doc/2"), False)
+    failed += check("公众号文章去掉 scene、chksm",
+                    exists("https://mp.weixin.qq.com/s?__biz=exists&mid=1&sn=test&scene=7"), True)
+    saved = requests.get(f"{BASE_URL}/api/documents", params={"uid": TEST_UID, "limit": 100}).json()["documents"]
+    for doc in saved:
+        if doc["id"] != doc_id:
+            requests.delete(f"{BASE_URL}/api/documents/id/{doc['id']}")
+
+    print("🔸 测试修改 URL 和删除后的结果...")
+    requests.put(f"{BASE_URL}/api/documents/id/{doc_id}", json={"url": "https://example.com/exists-test/moved"})
+    failed += check("新 URL", exists("https://example.com/exists-test/moved/"), True)
+    failed += check("旧 URL", exists(TEST_DOC["url"]), False)
+    requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    failed += check("删除后", exists("https://example.com/exists-test/moved"), False)
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 已保存页面判断测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+    
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+    
+    failed = test_exists()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个已保存页面判断用例失败")
+        sys.exit(1)
+    print("\n🎉 已保存页面判断测试通过！")
@@ -0,0 +1,95 @@
+"""
+字段投影测试脚本 - 验证列表、标签、分类文档和搜索接口的 fields 参数只返回请求的字段（及 id 和排序字段）
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1015
+
+TEST_DOC = {
+    "uid": TEST_UID,
+    "url": "https://example.com/fields-test/article",
+    "title": "Fields test 字段投影",
+    "summary": "字段投影测试",
+    "content": "fieldstest " * 100,
+    "tags": "fields-test"
+}
+
+ALL_LIST_FIELDS = ["created_at", "evaluate", "favicon", "id", "source", "summary", "tags", "title", "uid",
+                   "updated_at", "url"]
+ALL_SEARCH_FIELDS = sorted(ALL_LIST_FIELDS + ["content", "snippet", "score"])
+
+def first_keys(path, key, params, fields=None):
+    """返回第一条结果的字段名（排序后），请求出错时返回状态码"""
+    if fields is not None:
+        params = dict(params, fields=fields)
+    response = requests.get(f"{BASE_URL}{path}", params=params)
+    if response.status_code != 200:
+        return response.status_code
+    return sorted(response.json()[key][0])
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_fields():
+    """各接口的默认字段、只请求部分字段、计算字段和未知字段"""
+    failed = 0
+    doc_id = requests.post(f"{BASE_URL}/api/documents", json=TEST_DOC).json()["id"]
+    category_id = requests.post(f"{BASE_URL}/api/categories",
+                                json={"uid": TEST_UID, "name": "Fields test"}).json()["category_id"]
+    requests.post(f"{BASE_URL}/api/categories/{category_id}/docs", json={"doc_id": doc_id})
+
+    # 名称, 路径, 结果字段, 参数, fields=title,url 时额外返回的排序字段
+    list_endpoints = [
+        ("文档列表", "/api/documents", "documents", {"uid": TEST_UID}, ["updated_at"]),
+        ("标签", "/api/documents/tags/fields-test", "results", {"uid": TEST_UID}, ["evaluate", "updated_at"]),
+        ("分类", f"/api/categories/{category_id}/docs", "documents", {}, ["updated_at"]),
+    ]
+    for name, path, key, params, sort_fields in list_endpoints:
+        print(f"🔸 测试{name}...")
+        failed += check(f"{name}默认字段", first_keys(path, key, params), ALL_LIST_FIELDS)
+        failed += check(f"{name} fields=title,url", first_keys(path, key, params, "title,url"),
+                        sorted(["id", "title", "url"] + sort_fields))
+        failed += check(f"{name}未知字段", first_keys(path, key, params, "title,content"), 400)
+
+    print("🔸 测试搜索...")
+    # 全文索引、单个汉字回退到 LIKE、模糊搜索三种查询方式
+    for name, params in (("全文", {"keyword": "fieldstest"}), ("LIKE", {"keyword": "影"}),
+                         ("模糊", {"keyword": "Fields tset", "fuzzy": "true"})):
+        params = dict(params, uid=TEST_UID)
+        failed += check(f"{name}默认字段", first_keys("/api/documents/search", "results", params),
+                        ALL_SEARCH_FIELDS)
+        failed += check(f"{name} fields=title,url", first_keys("/api/documents/search", "results", params,
+                                                               "title,url"), ["id", "score", "title", "url"])
+    response = requests.get(f"{BASE_URL}/api/documents/search",
+                            params={"keyword": "fieldstest", "uid": TEST_UID, "fields": "content"}).json()
+    failed += check("正文预览为前 200 个字符加省略号", response["results"][0]["content"],
+                    TEST_DOC["content"][:200] + "...")
+    failed += check("未知字段", first_keys("/api/documents/search", "results", {"keyword": "fieldstest"}, "body"),
+                    400)
+
+    requests.delete(f"{BASE_URL}/api/categories/{category_id}", params={"uid": TEST_UID})
+    requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 字段投影测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_fields()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个字段投影用例失败")
+        sys.exit(1)
+    print("\n🎉 字段投影测试通过！")
@@ -0,0 +1,45 @@
+"""
+MySQL 全文检索表达式测试脚本 - 验证 build_boolean_query 的转换结果，不需要运行服务或连接数据库
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.fts import build_boolean_query
+
+CASES = [
+    ("数据库", '+"数据库"'),
+    ("Python 数据库", '+"Python" +"数据库"'),
+    ("", None),
+    # 短于 ngram_token_size 的词在全文索引中没有词元，返回 None 改用 LIKE 搜索
+    ("库", None),
+    ("C", None),
+    ("R 语言", None),
+    ("数据库 C", None),
+]
+
+def test_build_boolean_query():
+    """逐个检查关键词转换结果"""
+    failed = 0
+    print("🔸 测试 build_boolean_query（ngram_token_size=2）...")
+    for keyword, expected in CASES:
+        actual = build_boolean_query(keyword, 2)
+        if actual == expected:
+            print(f"  ✅ {keyword!r} -> {actual}")
+        else:
+            print(f"  ❌ {keyword!r} -> {actual}，期望 {expected}")
+            failed += 1
+    actual = build_boolean_query("库", 1)
+    if actual != '+"库"':
+        print(f"  ❌ ngram_token_size=1 时 '库' -> {actual}")
+        failed += 1
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 MySQL 全文检索表达式测试")
+    failed = test_build_boolean_query()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个用例失败")
+        sys.exit(1)
+    print("\n🎉 MySQL 全文检索表达式测试通过！")
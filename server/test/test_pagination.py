@@ -0,0 +1,97 @@
+"""
+游标分页测试脚本 - 沿 next_cursor 一直翻到最后一页，验证文档列表、搜索、标签和分类文档列表不漏不重
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1014
+DOC_COUNT = 7
+PAGE_SIZE = 3
+
+def create_doc(i):
+    return requests.post(f"{BASE_URL}/api/documents", json={
+        "uid": TEST_UID,
+        "url": f"https://example.com/pagination-test/{i}",
+        "title": f"Pagination test {i}",
+        "summary": "游标分页测试",
+        "content": "paginationtest " * (i + 1),
+        "tags": "pagination-test",
+        "evaluate": i % 3
+    }).json()["id"]
+
+def follow_cursor(path, key, params):
+    """从第一页开始沿 next_cursor 翻页，返回每页的文档ID列表"""
+    pages = []
+    cursor = None
+    while True:
+        page_params = dict(params, limit=PAGE_SIZE)
+        if cursor:
+            page_params["cursor"] = cursor
+        response = requests.get(f"{BASE_URL}{path}", params=page_params).json()
+        pages.append([doc["id"] for doc in response[key]])
+        cursor = response["next_cursor"]
+        if cursor is None or len(pages) > DOC_COUNT:
+            return pages
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_pagination():
+    """各列表接口翻到底的结果与一次取全部的结果一致"""
+    failed = 0
+    doc_ids = [create_doc(i) for i in range(DOC_COUNT)]
+    category_id = requests.post(f"{BASE_URL}/api/categories",
+                                json={"uid": TEST_UID, "name": "Pagination test"}).json()["category_id"]
+    requests.post(f"{BASE_URL}/api/categories/{category_id}/docs/batch", json={"doc_ids": doc_ids})
+
+    endpoints = [
+        ("文档列表", "/api/documents", "documents", {"uid": TEST_UID}),
+        ("搜索", "/api/documents/search", "results", {"uid": TEST_UID, "keyword": "paginationtest"}),
+        ("标签", "/api/documents/tags/pagination-test", "results", {"uid": TEST_UID}),
+        ("分类", f"/api/categories/{category_id}/docs", "documents", {}),
+    ]
+    for name, path, key, params in endpoints:
+        print(f"🔸 测试{name}...")
+        pages = follow_cursor(path, key, params)
+        everything = [doc["id"] for doc in
+                      requests.get(f"{BASE_URL}{path}", params=dict(params, limit=100)).json()[key]]
+        failed += check(f"{name}每页数量", [len(page) for page in pages], [3, 3, 1])
+        failed += check(f"{name}翻页结果与一次取全部一致", [doc_id for page in pages for doc_id in page], everything)
+        failed += check(f"{name}包含全部文档", sorted(everything), sorted(doc_ids))
+
+    print("🔸 测试刚好满页和无效的游标...")
+    requests.delete(f"{BASE_URL}/api/documents/id/{doc_ids.pop()}")
+    pages = follow_cursor("/api/documents", "documents", {"uid": TEST_UID})
+    failed += check("最后一页满页时再取一页空页", [len(page) for page in pages], [3, 3, 0])
+    response = requests.get(f"{BASE_URL}/api/documents", params={"uid": TEST_UID, "cursor": "not-a-cursor"})
+    failed += check("无效的游标", response.status_code, 400)
+    # "WzFd" 是 [1] 的编码，搜索游标需要 (score, id) 两个值
+    response = requests.get(f"{BASE_URL}/api/documents/search", params={"keyword": "paginationtest", "cursor": "WzFd"})
+    failed += check("排序键个数不符的游标", response.status_code, 400)
+
+    requests.delete(f"{BASE_URL}/api/categories/{category_id}", params={"uid": TEST_UID})
+    for doc_id in doc_ids:
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 游标分页测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_pagination()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个游标分页用例失败")
+        sys.exit(1)
+    print("\n🎉 游标分页测试通过！")
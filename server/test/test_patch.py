@@ -0,0 +1,83 @@
+"""
+部分更新测试脚本 - 验证 PATCH /api/documents/id/{doc_id} 只修改给出的字段、无变化时不写入及 If-Match 版本检查
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1008
+
+TEST_DOC = {
+    "uid": TEST_UID,
+    "url": "https://example.com/patch-test/article",
+    "title": "Patchtest article",
+    "summary": "部分更新测试",
+    "content": "用于部分更新测试的文档正文。" * 200,
+    "tags": "patch"
+}
+
+def patch(doc_id, changes, etag=None):
+    headers = {"If-Match": etag} if etag else {}
+    return requests.patch(f"{BASE_URL}/api/documents/id/{doc_id}", json=changes, headers=headers)
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_patch():
+    """修改评分、重复提交、过期的 If-Match、修改标题和 URL 冲突"""
+    failed = 0
+    doc_id = requests.post(f"{BASE_URL}/api/documents", json=TEST_DOC).json()["id"]
+    response = requests.get(f"{BASE_URL}/api/documents/id/{doc_id}")
+    etag, version = response.headers["ETag"], response.json()["version"]
+
+    print("🔸 测试只修改评分...")
+    response = patch(doc_id, {"evaluate": 4}, etag)
+    failed += check("状态码", response.status_code, 200)
+    failed += check("changed", response.json()["changed"], True)
+    failed += check("版本号", response.json()["version"], version + 1)
+    failed += check("新的 ETag", response.headers.get("ETag"), f'"doc-{doc_id}-{version + 1}"')
+    document = requests.get(f"{BASE_URL}/api/documents/id/{doc_id}").json()
+    failed += check("评分", document["evaluate"], 4)
+    failed += check("正文不变", document["content"] == TEST_DOC["content"], True)
+
+    print("🔸 测试无变化和版本检查...")
+    response = patch(doc_id, {"evaluate": 4, "title": TEST_DOC["title"]})
+    failed += check("相同的值 changed", response.json()["changed"], False)
+    failed += check("相同的值版本号不变", response.json()["version"], version + 1)
+    response = patch(doc_id, {"evaluate": 5}, etag)
+    failed += check("过期的 If-Match", response.status_code, 412)
+    failed += check("412 的 ETag", response.headers.get("ETag"), f'"doc-{doc_id}-{version + 1}"')
+    failed += check("不存在的文档", patch(999999999, {"evaluate": 1}).status_code, 404)
+
+    print("🔸 测试修改标题和 URL...")
+    patch(doc_id, {"title": "Patchtest renamed"})
+    suggest = requests.get(f"{BASE_URL}/api/suggest", params={"uid": TEST_UID, "prefix": "patchtest"}).json()
+    failed += check("输入提示中的标题", suggest["titles"], ["Patchtest renamed"])
+    other_id = requests.post(f"{BASE_URL}/api/documents",
+                             json=dict(TEST_DOC, url="https://example.com/patch-test/other")).json()["id"]
+    failed += check("URL 与另一篇文档相同", patch(other_id, {"url": TEST_DOC["url"] + "/"}).status_code, 409)
+
+    for item in (doc_id, other_id):
+        requests.delete(f"{BASE_URL}/api/documents/id/{item}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 部分更新测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_patch()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个部分更新用例失败")
+        sys.exit(1)
+    print("\n🎉 部分更新测试通过！")
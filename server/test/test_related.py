@@ -0,0 +1,78 @@
+"""
+相关文档测试脚本 - 验证 /api/documents/id/{doc_id}/related 的结果及写入、修改、删除后的增量更新
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1004
+
+TEST_DOCS = [
+    {"title": "Related test: Rust ownership", "tags": "rust,borrowck",
+     "content": "rust ownership borrow checker lifetimes move semantics"},
+    {"title": "Related test: Rust lifetimes", "tags": "rust,lifetimes",
+     "content": "rust lifetimes borrow checker references ownership"},
+    {"title": "Related test: Sourdough bread", "tags": "baking",
+     "content": "sourdough starter flour water fermentation oven"},
+]
+
+def related(doc_id):
+    response = requests.get(f"{BASE_URL}/api/documents/id/{doc_id}/related", params={"limit": 5})
+    if response.status_code != 200:
+        return response.status_code
+    return [doc["title"] for doc in response.json()["results"]]
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_related():
+    """同主题的文档排在前面，修改和删除后立即反映在结果中"""
+    failed = 0
+    for i, doc in enumerate(TEST_DOCS):
+        data = dict(doc, uid=TEST_UID, url=f"http://test.com/related/{i}", summary="相关文档测试", evaluate=0)
+        requests.post(f"{BASE_URL}/api/documents", json=data)
+    documents = requests.get(f"{BASE_URL}/api/documents?uid={TEST_UID}&limit=100").json().get("documents", [])
+    ids = {doc["title"]: doc["id"] for doc in documents}
+    ownership = ids["Related test: Rust ownership"]
+    bread = ids["Related test: Sourdough bread"]
+
+    print("🔸 测试相关文档...")
+    failed += check("ownership", related(ownership)[0], "Related test: Rust lifetimes")
+    failed += check("不存在的文档", related(999999999), 404)
+
+    print("🔸 测试修改后的相关文档...")
+    updated = dict(TEST_DOCS[2], uid=TEST_UID, url="http://test.com/related/2",
+                   title="Related test: Rust borrow checker", tags="rust,borrowck",
+                   content="rust borrow checker ownership move semantics")
+    requests.put(f"{BASE_URL}/api/documents/id/{bread}", json=updated)
+    failed += check("ownership", related(ownership)[0], "Related test: Rust borrow checker")
+
+    print("🔸 测试删除后的相关文档...")
+    requests.delete(f"{BASE_URL}/api/documents/id/{bread}")
+    failed += check("ownership", related(ownership), ["Related test: Rust lifetimes"])
+    failed += check("已删除的文档", related(bread), 404)
+
+    for doc_id in ids.values():
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 相关文档测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+    
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+    
+    failed = test_related()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个相关文档用例失败")
+        sys.exit(1)
+    print("\n🎉 相关文档测试通过！")
@@ -0,0 +1,144 @@
+"""
+全文搜索测试脚本 - 验证 /api/documents/search 的中英文检索
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1002
+
+TEST_DOCS = [
+    {
+        "uid": TEST_UID,
+        "url": "http://test.com/search/1",
+        "title": "搜索测试：文档管理系统设计",
+        "summary": "介绍一个文档管理系统的整体架构",
+        "content": "本文讨论如何用 FastAPI 和 SQLite 构建文档管理系统，包括全文检索与标签。",
+        "tags": "search-test,架构",
+        "evaluate": 5
+    },
+    {
+        "uid": TEST_UID,
+        "url": "http://test.com/search/2",
+        "title": "Search test: Kubernetes operators",
+        "summary": "Writing operators in Go",
+        "content": "Operators extend Kubernetes with custom controllers.",
+        "tags": "search-test,k8s",
+        "evaluate": 3
+    },
+]
+
+# 关键词 -> 期望命中的标题
+CASES = [
+    ("文档管理", ["搜索测试：文档管理系统设计"]),
+    ("全文检索", ["搜索测试：文档管理系统设计"]),
+    ("管理系", ["搜索测试：文档管理系统设计"]),
+    ("kubernetes", ["Search test: Kubernetes operators"]),
+    ("kuber", ["Search test: Kubernetes operators"]),
+    ("operators controllers", ["Search test: Kubernetes operators"]),
+    ("FastAPI 标签", ["搜索测试：文档管理系统设计"]),
+    # 单独的汉字是二元组的后一个字（“何用”），与其他词一起搜索时也要改用 LIKE
+    ("用 FastAPI", ["搜索测试：文档管理系统设计"]),
+    ("不存在的关键词组合", []),
+]
+
+def create_docs():
+    """创建测试文档，返回文档ID列表"""
+    for doc in TEST_DOCS:
+        response = requests.post(f"{BASE_URL}/api/documents", json=doc)
+        print(f"  创建文档 '{doc['title']}': HTTP {response.status_code}")
+    
+    response = requests.get(f"{BASE_URL}/api/documents?uid={TEST_UID}&limit=100")
+    titles = {doc["title"] for doc in TEST_DOCS}
+    return [doc["id"] for doc in response.json().get("documents", []) if doc["title"] in titles]
+
+def test_search():
+    """按关键词搜索并核对命中结果"""
+    print("🔸 测试全文搜索...")
+    failed = 0
+    for keyword, expected in CASES:
+        response = requests.get(f"{BASE_URL}/api/documents/search",
+                                params={"keyword": keyword, "uid": TEST_UID})
+        titles = [doc["title"] for doc in response.json().get("results", [])]
+        if sorted(titles) == sorted(expected):
+            print(f"  ✅ '{keyword}' -> {titles}")
+        else:
+            failed += 1
+            print(f"  ❌ '{keyword}' -> {titles}，期望 {expected}")
+    return failed
+
+# 模糊搜索（fuzzy=true）：拼写错误、只输入半个词
+FUZZY_CASES = [
+    ("kubernets operater", ["Search test: Kubernetes operators"]),
+    ("Kuber", ["Search test: Kubernetes operators"]),
+    ("文档管", ["搜索测试：文档管理系统设计"]),
+    ("archtecture", []),
+]
+
+def test_fuzzy_search():
+    """模糊搜索标题和标签"""
+    print("🔸 测试模糊搜索...")
+    failed = 0
+    for keyword, expected in FUZZY_CASES:
+        response = requests.get(f"{BASE_URL}/api/documents/search",
+                                params={"keyword": keyword, "uid": TEST_UID, "fuzzy": "true"})
+        titles = [doc["title"] for doc in response.json().get("results", [])]
+        if titles == expected:
+            print(f"  ✅ '{keyword}' -> {titles}")
+        else:
+            failed += 1
+            print(f"  ❌ '{keyword}' -> {titles}，期望 {expected}")
+    return failed
+
+# 关键词 -> 摘要中期望高亮的文字
+SNIPPET_CASES = [
+    ("全文检索", ["全文检索"]),
+    ("kubernetes custom", ["Kubernetes", "custom"]),
+]
+
+def test_snippets():
+    """搜索结果的关键词摘要与高亮位置"""
+    print("🔸 测试搜索摘要...")
+    failed = 0
+    for keyword, expected in SNIPPET_CASES:
+        response = requests.get(f"{BASE_URL}/api/documents/search",
+                                params={"keyword": keyword, "uid": TEST_UID, "fields": "title,snippet"})
+        results = response.json().get("results", [])
+        snippet = results[0]["snippet"] if results else {"text": "", "highlights": []}
+        marked = [snippet["text"][start:end] for start, end in snippet["highlights"]]
+        if marked == expected:
+            print(f"  ✅ '{keyword}' -> {snippet['text']}")
+        else:
+            failed += 1
+            print(f"  ❌ '{keyword}' -> {snippet}，期望高亮 {expected}")
+    return failed
+
+def cleanup(doc_ids):
+    """删除测试文档"""
+    for doc_id in doc_ids:
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    print(f"🧹 清理文档: {doc_ids}")
+
+if __name__ == "__main__":
+    print("🚀 全文搜索测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+    
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+    
+    doc_ids = create_docs()
+    try:
+        failed = test_search()
+        failed += test_snippets()
+        failed += test_fuzzy_search()
+    finally:
+        cleanup(doc_ids)
+    
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个搜索用例失败")
+        sys.exit(1)
+    print("\n🎉 搜索测试通过！")
@@ -0,0 +1,77 @@
+"""
+输入提示测试脚本 - 验证 /api/suggest 的前缀匹配及写入、修改、删除后的增量更新
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1003
+
+TEST_DOC = {
+    "uid": TEST_UID,
+    "url": "http://test.com/suggest/1",
+    "title": "Suggest test: Zebrafish genome",
+    "summary": "输入提示测试",
+    "content": "用于输入提示测试的文档",
+    "tags": "zebrafish,genomics",
+    "evaluate": 0
+}
+
+def suggest(prefix):
+    response = requests.get(f"{BASE_URL}/api/suggest", params={"uid": TEST_UID, "prefix": prefix})
+    data = response.json()
+    return data["titles"], [item["tag"] for item in data["tags"]]
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_suggest():
+    """写入、修改、删除文档后立即查询提示"""
+    failed = 0
+    print("🔸 写入前先查询一次，让该用户的索引加载到内存...")
+    failed += check("'suggest'", suggest("suggest"), ([], []))
+
+    response = requests.post(f"{BASE_URL}/api/documents", json=TEST_DOC)
+    print(f"  创建文档: HTTP {response.status_code}")
+    documents = requests.get(f"{BASE_URL}/api/documents?uid={TEST_UID}&limit=100").json().get("documents", [])
+    doc_id = next(doc["id"] for doc in documents if doc["title"] == TEST_DOC["title"])
+
+    print("🔸 测试写入后的提示...")
+    failed += check("'SUGGEST t'", suggest("SUGGEST t"), (["Suggest test: Zebrafish genome"], []))
+    failed += check("'zeb'", suggest("zeb"), ([], ["zebrafish"]))
+    failed += check("'gen'", suggest("gen"), ([], ["genomics"]))
+
+    print("🔸 测试修改后的提示...")
+    updated = dict(TEST_DOC, title="Suggest test: Medaka genome", tags="medaka")
+    requests.put(f"{BASE_URL}/api/documents/id/{doc_id}", json=updated)
+    failed += check("'suggest test: m'", suggest("suggest test: m"), (["Suggest test: Medaka genome"], []))
+    failed += check("'suggest test: z'", suggest("suggest test: z"), ([], []))
+    failed += check("'zeb'", suggest("zeb"), ([], []))
+    failed += check("'med'", suggest("med"), ([], ["medaka"]))
+
+    print("🔸 测试删除后的提示...")
+    requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    failed += check("'suggest'", suggest("suggest"), ([], []))
+    failed += check("'med'", suggest("med"), ([], []))
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 输入提示测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+    
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+    
+    failed = test_suggest()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个输入提示用例失败")
+        sys.exit(1)
+    print("\n🎉 输入提示测试通过！")
@@ -0,0 +1,85 @@
+"""
+标签查询测试脚本 - 验证 /api/documents/tags/{tag} 的完整匹配、多个标签的 any / all 模式及修改标签后的结果
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1013
+
+# 标题 -> (标签, 评分)；结果按评分从高到低排列
+TEST_DOCS = {
+    "Tag test A": ("tagtest-python,tagtest-web", 5),
+    "Tag test B": ("tagtest-python", 4),
+    "Tag test C": ("TagTest-Web；tagtest-db", 3),
+    "Tag test D": ("tagtest-pythonic", 2),
+}
+
+def create_doc(title, tags, evaluate, uid=TEST_UID):
+    return requests.post(f"{BASE_URL}/api/documents", json={
+        "uid": uid,
+        "url": f"https://example.com/tag-test/{title.split()[-1]}",
+        "title": title,
+        "summary": "标签查询测试",
+        "content": "用于标签查询测试的文档",
+        "tags": tags,
+        "evaluate": evaluate
+    }).json()["id"]
+
+def tagged(tag, mode="any", uid=TEST_UID):
+    response = requests.get(f"{BASE_URL}/api/documents/tags/{tag}", params={"uid": uid, "mode": mode})
+    return [doc["title"] for doc in response.json()["results"]]
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_tags():
+    """单个标签、多个标签的 any / all、用户过滤和修改标签"""
+    failed = 0
+    doc_ids = {title: create_doc(title, tags, evaluate) for title, (tags, evaluate) in TEST_DOCS.items()}
+    other_id = create_doc("Tag test other user", "tagtest-python", 5, uid=TEST_UID + 1)
+
+    print("🔸 测试单个标签...")
+    failed += check("完整匹配，不匹配 tagtest-pythonic", tagged("tagtest-python"), ["Tag test A", "Tag test B"])
+    failed += check("大小写和中文分号", tagged("TAGTEST-DB"), ["Tag test C"])
+    failed += check("不存在的标签", tagged("tagtest-none"), [])
+
+    print("🔸 测试多个标签...")
+    failed += check("any", tagged("tagtest-python,tagtest-web"), ["Tag test A", "Tag test B", "Tag test C"])
+    failed += check("all", tagged("tagtest-python,tagtest-web", "all"), ["Tag test A"])
+    failed += check("all，中文逗号分隔", tagged("tagtest-web，tagtest-db", "all"), ["Tag test C"])
+    failed += check("all，其中一个标签不存在", tagged("tagtest-python,tagtest-none", "all"), [])
+    failed += check("重复的标签", tagged("tagtest-db,TagTest-DB", "all"), ["Tag test C"])
+    response = requests.get(f"{BASE_URL}/api/documents/tags/tagtest-python", params={"mode": "both"})
+    failed += check("无效的 mode", response.status_code, 422)
+
+    print("🔸 测试修改标签后的结果...")
+    requests.patch(f"{BASE_URL}/api/documents/id/{doc_ids['Tag test B']}", json={"tags": "tagtest-web"})
+    failed += check("移除标签", tagged("tagtest-python"), ["Tag test A"])
+    failed += check("新增标签", tagged("tagtest-web"), ["Tag test A", "Tag test B", "Tag test C"])
+    failed += check("其他用户", tagged("tagtest-python", uid=TEST_UID + 1), ["Tag test other user"])
+
+    for doc_id in list(doc_ids.values()) + [other_id]:
+        requests.delete(f"{BASE_URL}/api/documents/id/{doc_id}")
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 标签查询测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_tags()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个标签查询用例失败")
+        sys.exit(1)
+    print("\n🎉 标签查询测试通过！")
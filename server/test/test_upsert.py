@@ -0,0 +1,89 @@
+"""
+重复保存测试脚本 - 验证同一用户再次保存同一页面时原地更新、内容不变时不写入，不同用户的同名文档互不影响
+"""
+import sys
+import requests
+
+# 配置
+BASE_URL = "http://127.0.0.1:8000"
+TEST_UID = 1007
+
+TEST_DOC = {
+    "uid": TEST_UID,
+    "url": "https://example.com/upsert-test/article?id=7",
+    "title": "Upsert test: article",
+    "summary": "重复保存测试",
+    "content": "用于重复保存测试的文档正文",
+    "tags": "upsert"
+}
+
+def save(**changes):
+    return requests.post(f"{BASE_URL}/api/documents", json=dict(TEST_DOC, **changes)).json()["id"]
+
+def version(doc_id):
+    return requests.get(f"{BASE_URL}/api/documents/id/{doc_id}").json()["version"]
+
+def check(name, actual, expected):
+    if actual == expected:
+        print(f"  ✅ {name} -> {actual}")
+        return 0
+    print(f"  ❌ {name} -> {actual}，期望 {expected}")
+    return 1
+
+def test_upsert():
+    """重复保存、修改后保存、其他用户保存同名文档和批量写入"""
+    failed = 0
+    doc_id = save()
+    first_version = version(doc_id)
+
+    print("🔸 测试重复保存同一页面...")
+    failed += check("内容相同时文档ID", save(), doc_id)
+    failed += check("内容相同时版本号不变", version(doc_id), first_version)
+    failed += check("URL 写法不同、标题修改后文档ID",
+                    save(url="http://www.example.com/upsert-test/article/?id=7&utm_source=feed",
+                         title="Upsert test: renamed"), doc_id)
+    failed += check("修改后版本号加一", version(doc_id), first_version + 1)
+    document = requests.get(f"{BASE_URL}/api/documents/id/{doc_id}").json()
+    failed += check("修改后的标题", document["title"], "Upsert test: renamed")
+
+    print("🔸 测试分类关联和其他用户的同名文档...")
+    category_id = requests.post(f"{BASE_URL}/api/categories",
+                                json={"uid": TEST_UID, "name": "Upsert test"}).json()["category_id"]
+    requests.post(f"{BASE_URL}/api/categories/{category_id}/docs", json={"doc_id": doc_id})
+    save(summary="修改摘要后再次保存")
+    category_docs = requests.get(f"{BASE_URL}/api/categories/{category_id}/docs").json()["documents"]
+    failed += check("再次保存后仍在分类中", [doc["id"] for doc in category_docs], [doc_id])
+    other_id = save(uid=TEST_UID + 1, title="Upsert test: renamed")
+    failed += check("其他用户保存同名文档得到新文档", other_id != doc_id, True)
+    failed += check("原文档仍然存在",
+                    requests.get(f"{BASE_URL}/api/documents/id/{doc_id}").status_code, 200)
+
+    print("🔸 测试批量写入的 changed 标记...")
+    current = requests.get(f"{BASE_URL}/api/documents/id/{doc_id}").json()
+    unchanged = {name: current[name] for name in ("uid", "url", "title", "summary", "content", "tags")}
+    results = requests.post(f"{BASE_URL}/api/documents/batch", json={"documents": [
+        unchanged, dict(TEST_DOC, url="https://example.com/upsert-test/other", title="Upsert test: other")
+    ]}).json()["results"]
+    failed += check("内容相同", (results[0]["id"], results[0]["changed"]), (doc_id, False))
+    failed += check("新页面", results[1]["changed"], True)
+
+    for item in (doc_id, other_id, results[1]["id"]):
+        requests.delete(f"{BASE_URL}/api/documents/id/{item}")
+    requests.delete(f"{BASE_URL}/api/categories/{category_id}", params={"uid": TEST_UID})
+    return failed
+
+if __name__ == "__main__":
+    print("🚀 重复保存测试")
+    print(f"请确保API服务运行在: {BASE_URL}")
+
+    try:
+        requests.get(f"{BASE_URL}/health", timeout=3)
+    except Exception as e:
+        print(f"❌ 无法连接API服务: {e}")
+        sys.exit(1)
+
+    failed = test_upsert()
+    if failed:
+        print(f"\n⚠️ 有 {failed} 个重复保存用例失败")
+        sys.exit(1)
+    print("\n🎉 重复保存测试通过！")